@@ -0,0 +1,62 @@
+"""
+Batch pricing benchmark - saved carts repriced per cart vs. as rows.
+
+Prices the same saved carts two ways and checks they agree:
+    per cart    build a ShoppingCart per order and call total_cents()
+    rows        price_rows() on a RowBatch, with no carts built at all
+                (uses NumPy if installed, pure Python otherwise)
+
+Run from the repository root:
+    python -m benchmarks.bench_batch_pricing
+"""
+
+import random
+import time
+
+from src.batch_pricing import RowBatch, np, price_rows
+from src.catalog import ProductCatalog
+from src.checkout import Order, price_order
+from src.pricing import BulkRule
+
+CARTS = 100_000
+PRODUCTS = 1_000
+
+
+def _orders(rng):
+    return [
+        Order(
+            f"cart-{i}",
+            tuple((rng.randrange(PRODUCTS), rng.randint(1, 5)) for _ in range(rng.randint(1, 12))),
+            rng.choice([0, 10]),
+        )
+        for i in range(CARTS)
+    ]
+
+
+def _timed(label, func, baseline=None):
+    start = time.perf_counter()
+    result = func()
+    elapsed = time.perf_counter() - start
+    speedup = f"  ({baseline / elapsed:.1f}x per cart)" if baseline else ""
+    print(f"{label:<12} {elapsed:8.3f} s  {CARTS / elapsed:12,.0f} carts/sec{speedup}")
+    return result, elapsed
+
+
+def main():
+    rng = random.Random(340)
+    catalog = ProductCatalog()
+    for i in range(PRODUCTS):
+        catalog.get(f"Product {i}", rng.randint(1, 10_000) / 100)
+    rules = [BulkRule(catalog.product(i), 2, 1) for i in range(0, PRODUCTS, 100)]
+    orders = _orders(rng)
+    print(f"{CARTS:,} carts, NumPy {'enabled' if np is not None else 'not installed'}")
+
+    expected, per_cart = _timed(
+        "per cart", lambda: [price_order(order, catalog, rules) for order in orders])
+    rows, _ = _timed(
+        "rows", lambda: price_rows(RowBatch.from_orders(orders), catalog, rules), per_cart)
+    assert rows == expected, "row totals differ from per-cart totals"
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,269 @@
+"""
+Cart scaling benchmark - time and peak memory of ShoppingCart hot paths.
+
+Sweeps cart size (total units and distinct products) for two workloads,
+"plain" and "bulk" (every product has a buy-2-get-1 rule), and measures
+each operation on a prepared cart:
+
+    add             add(product, 1)
+    remove          remove(product, 1)
+    get_quantity    get_quantity(product)
+    contains        contains(product)
+    recalculate     _recalculate_total() followed by total()
+    apply_discount  apply_discount(p) followed by total()
+    mixed           60% add, 30% remove, 10% total()
+
+Results (seconds per call, the best of REPEATS timed passes, and peak
+traced bytes over the calls) can be saved as a JSON baseline and compared
+against on later runs; the run exits with status 1 if any operation got
+slower than the baseline by more than --threshold plus TIME_SLACK_SECONDS,
+or its peak memory grew by more than --memory-threshold plus
+MEMORY_SLACK_BYTES. The minimum is the least noisy estimate of a call's
+cost, and the absolute slack keeps sub-microsecond operations, where
+scheduler jitter is a large fraction of the time, from flapping. An
+apparent time regression is measured again on a fresh cart up to
+--retries times, keeping the best time, before it fails the run.
+
+Run from the repository root:
+    python -m benchmarks.bench_cart_scaling --quick
+    python -m benchmarks.bench_cart_scaling --save baseline.json
+    python -m benchmarks.bench_cart_scaling --baseline baseline.json --threshold 0.5
+    python -m benchmarks.bench_cart_scaling --baseline baseline.json --retries 5
+    python -m benchmarks.bench_cart_scaling --baseline baseline.json --memory-threshold 0.1
+"""
+
+import argparse
+import json
+import random
+import sys
+import time
+import tracemalloc
+
+from src.product import Product
+from src.shopping_cart import ShoppingCart
+
+UNITS = [1, 100, 10_000, 1_000_000]
+DISTINCT = [1, 100, 10_000, 100_000]
+QUICK_UNITS = [1, 1_000, 100_000]
+QUICK_DISTINCT = [1, 1_000]
+WORKLOADS = ["plain", "bulk"]
+REPEATS = 9
+# Slowdown always tolerated, in seconds per call, on top of --threshold.
+TIME_SLACK_SECONDS = 1e-6
+# Peak growth always tolerated, in bytes, on top of --memory-threshold.
+MEMORY_SLACK_BYTES = 4096
+
+
+def build_cart(units, distinct, workload):
+    """A cart holding `units` units spread over `distinct` products."""
+    products = [Product(f"Product {i}", (i % 100) + 0.99) for i in range(distinct)]
+    cart = ShoppingCart()
+    if workload == "bulk":
+        for product in products:
+            cart.set_bulk_discount(product, buy_quantity=2, free_quantity=1)
+    per_product, extra = divmod(units, distinct)
+    lines = [(p, per_product + (1 if i < extra else 0)) for i, p in enumerate(products)]
+    cart.add_many([(p, qty) for p, qty in lines if qty])
+    cart.total()
+    return cart, products
+
+
+def _op_add(cart, products, rng):
+    product = rng.choice(products)
+    return lambda: cart.add(product, 1)
+
+
+def _op_remove(cart, products, rng):
+    product = rng.choice(products)
+    cart.add(product, 1)
+    return lambda: cart.remove(product, 1)
+
+
+def _op_get_quantity(cart, products, rng):
+    product = rng.choice(products)
+    return lambda: cart.get_quantity(product)
+
+
+def _op_contains(cart, products, rng):
+    product = rng.choice(products)
+    return lambda: cart.contains(product)
+
+
+def _op_recalculate(cart, products, rng):
+    def call():
+        cart._recalculate_total()
+        cart.total()
+    return call
+
+
+def _op_apply_discount(cart, products, rng):
+    percent = rng.randint(1, 50)
+
+    def call():
+        cart.apply_discount(percent)
+        cart.total()
+    return call
+
+
+def _op_mixed(cart, products, rng):
+    product = rng.choice(products)
+    roll = rng.random()
+    if roll < 0.6:
+        return lambda: cart.add(product, 1)
+    if roll < 0.9:
+        cart.add(product, 1)
+        return lambda: cart.remove(product, 1)
+    cart.add(product, 1)
+    return cart.total
+
+
+OPERATIONS = {
+    "add": _op_add,
+    "remove": _op_remove,
+    "get_quantity": _op_get_quantity,
+    "contains": _op_contains,
+    "recalculate": _op_recalculate,
+    "apply_discount": _op_apply_discount,
+    "mixed": _op_mixed,
+}
+
+
+def _calls_for(op, distinct):
+    """Fewer calls for operations that scan every line."""
+    if op in ("recalculate",):
+        return max(3, min(1_000, 200_000 // distinct))
+    return 1_000
+
+
+def measure(cart, products, op, calls, seed=340):
+    """Return (best seconds per call, peak bytes) for one operation."""
+    rng = random.Random(seed)
+    make = OPERATIONS[op]
+    timings = []
+    for _ in range(REPEATS):
+        prepared = [make(cart, products, rng) for _ in range(calls)]
+        start = time.perf_counter()
+        for call in prepared:
+            call()
+        timings.append((time.perf_counter() - start) / calls)
+
+    prepared = [make(cart, products, rng) for _ in range(calls)]
+    tracemalloc.start()
+    tracemalloc.reset_peak()
+    baseline, _ = tracemalloc.get_traced_memory()
+    for call in prepared:
+        call()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return min(timings), peak - baseline
+
+
+def run(units_sweep, distinct_sweep, workloads, operations):
+    """Run the sweep and return {key: {"seconds": s, "peak_bytes": b}}."""
+    results = {}
+    for workload in workloads:
+        for units in units_sweep:
+            for distinct in distinct_sweep:
+                if distinct > units:
+                    continue
+                cart, products = build_cart(units, distinct, workload)
+                for op in operations:
+                    seconds, peak = measure(cart, products, op, _calls_for(op, distinct))
+                    key = f"{workload}/units={units}/distinct={distinct}/{op}"
+                    results[key] = {"seconds": seconds, "peak_bytes": peak}
+                    print(f"{key:<55} {seconds * 1e6:10.2f} us  {peak:>10,} B")
+    return results
+
+
+def remeasure(results, keys):
+    """Time the given result keys again, keeping each one's best time."""
+    groups = {}
+    for key in keys:
+        workload, units, distinct, op = key.split("/")
+        config = (workload, int(units.split("=")[1]), int(distinct.split("=")[1]))
+        groups.setdefault(config, []).append((key, op))
+    for (workload, units, distinct), ops in groups.items():
+        cart, products = build_cart(units, distinct, workload)
+        for key, op in ops:
+            seconds, _ = measure(cart, products, op, _calls_for(op, distinct))
+            results[key]["seconds"] = min(results[key]["seconds"], seconds)
+
+
+def compare(results, baseline, threshold, memory_threshold=None):
+    """
+    Return (key, metric, before, after) for every regression.
+
+    Time regresses above baseline * (1 + threshold) + TIME_SLACK_SECONDS;
+    peak memory above baseline * (1 + memory_threshold) + MEMORY_SLACK_BYTES.
+    The memory threshold defaults to the time threshold.
+    """
+    if memory_threshold is None:
+        memory_threshold = threshold
+    regressions = []
+    for key, current in results.items():
+        previous = baseline.get(key)
+        if previous is None:
+            continue
+        if current["seconds"] > previous["seconds"] * (1 + threshold) + TIME_SLACK_SECONDS:
+            regressions.append(
+                (key, "seconds", previous["seconds"], current["seconds"])
+            )
+        allowed = previous["peak_bytes"] * (1 + memory_threshold) + MEMORY_SLACK_BYTES
+        if current["peak_bytes"] > allowed:
+            regressions.append(
+                (key, "peak_bytes", previous["peak_bytes"], current["peak_bytes"])
+            )
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="ShoppingCart scaling benchmark")
+    parser.add_argument("--quick", action="store_true", help="smaller sweep")
+    parser.add_argument("--workload", choices=WORKLOADS, action="append")
+    parser.add_argument("--op", choices=sorted(OPERATIONS), action="append")
+    parser.add_argument("--save", metavar="PATH", help="write results as a baseline")
+    parser.add_argument("--baseline", metavar="PATH", help="compare against a baseline")
+    parser.add_argument("--threshold", type=float, default=0.25,
+                        help="allowed slowdown, e.g. 0.25 = 25%% (default)")
+    parser.add_argument("--memory-threshold", type=float, default=None,
+                        help="allowed peak memory growth (default: --threshold)")
+    parser.add_argument("--retries", type=int, default=2,
+                        help="re-measure apparent time regressions this many times")
+    args = parser.parse_args(argv)
+
+    results = run(
+        QUICK_UNITS if args.quick else UNITS,
+        QUICK_DISTINCT if args.quick else DISTINCT,
+        args.workload or WORKLOADS,
+        args.op or list(OPERATIONS),
+    )
+
+    if args.save:
+        with open(args.save, "w") as f:
+            json.dump(results, f, indent=2, sort_keys=True)
+        print(f"baseline written to {args.save}")
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        regressions = compare(results, baseline, args.threshold, args.memory_threshold)
+        for _ in range(args.retries):
+            slower = [key for key, metric, _, _ in regressions if metric == "seconds"]
+            if not slower:
+                break
+            print(f"re-measuring {len(slower)} apparent time regressions")
+            remeasure(results, slower)
+            regressions = compare(results, baseline, args.threshold, args.memory_threshold)
+        for key, metric, before, after in regressions:
+            if metric == "seconds":
+                print(f"REGRESSION {key}: {before * 1e6:.2f} us -> {after * 1e6:.2f} us")
+            else:
+                print(f"REGRESSION {key}: peak {before:,} B -> {after:,} B")
+        if regressions:
+            return 1
+        print("no time or memory regressions beyond the thresholds")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
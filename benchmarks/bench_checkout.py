@@ -0,0 +1,55 @@
+"""
+Checkout scaling benchmark - orders per second by number of workers.
+
+Prices the same batch with checkout_serial() and run_batch_checkout() at
+increasing worker counts, and checks every run matches the serial totals.
+
+Run from the repository root:
+    python -m benchmarks.bench_checkout
+"""
+
+import os
+import random
+import time
+
+from src.catalog import ProductCatalog
+from src.checkout import Order, checkout_serial, run_batch_checkout
+from src.pricing import BulkRule
+
+ORDERS = 100_000
+PRODUCTS = 1_000
+
+
+def main():
+    rng = random.Random(340)
+    catalog = ProductCatalog()
+    for i in range(PRODUCTS):
+        catalog.get(f"Product {i}", rng.randint(1, 10_000) / 100)
+    rules = [BulkRule(catalog.product(i), 2, 1) for i in range(0, PRODUCTS, 10)]
+    orders = [
+        Order(
+            f"cart-{i}",
+            tuple((rng.randrange(PRODUCTS), rng.randint(1, 5)) for _ in range(8)),
+            rng.choice([0, 10]),
+        )
+        for i in range(ORDERS)
+    ]
+
+    start = time.perf_counter()
+    expected = checkout_serial(orders, catalog, rules)
+    serial = time.perf_counter() - start
+    print(f"serial      {ORDERS / serial:12,.0f} orders/sec")
+
+    workers = 1
+    while workers <= (os.cpu_count() or 1):
+        start = time.perf_counter()
+        results = run_batch_checkout(orders, catalog, rules, workers=workers)
+        elapsed = time.perf_counter() - start
+        assert results == expected, "parallel results differ from serial"
+        print(f"workers={workers:<3} {ORDERS / elapsed:12,.0f} orders/sec"
+              f"  ({serial / elapsed:.2f}x serial)")
+        workers *= 2
+
+
+if __name__ == "__main__":
+    main()
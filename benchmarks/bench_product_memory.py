@@ -0,0 +1,70 @@
+"""
+Product memory benchmark - bytes per product before and after slotting.
+
+Compares the original dict-backed Product layout with the slotted Product,
+and shows what interning through ProductCatalog saves when the same
+products are requested repeatedly.
+
+Run from the repository root:
+    python -m benchmarks.bench_product_memory
+"""
+
+import tracemalloc
+
+from src.catalog import ProductCatalog
+from src.money import to_cents
+from src.product import Product
+
+COUNT = 100_000
+DISTINCT = 1_000
+
+
+class DictProduct:
+    """The same fields as Product, stored the old way in a __dict__."""
+
+    def __init__(self, name, price, category="general"):
+        self.name = name.strip()
+        self.price = float(price)
+        self.price_cents = to_cents(price)
+        self.category = category
+        self._hash = hash((self.name, self.price))
+
+
+def _measure(build):
+    """Return (bytes allocated, objects) for the objects build() returns."""
+    tracemalloc.start()
+    before = tracemalloc.take_snapshot()
+    objects = build()
+    after = tracemalloc.take_snapshot()
+    tracemalloc.stop()
+    size = sum(stat.size_diff for stat in after.compare_to(before, "filename"))
+    return size, objects
+
+
+def main():
+    # Names are built up front so only the product objects are measured.
+    names = [f"Product {i % DISTINCT}" for i in range(COUNT)]
+    prices = [float(i % DISTINCT) for i in range(COUNT)]
+
+    def dict_products():
+        return [DictProduct(n, p) for n, p in zip(names, prices)]
+
+    def slotted_products():
+        return [Product(n, p) for n, p in zip(names, prices)]
+
+    def interned_products():
+        catalog = ProductCatalog()
+        return [catalog.get(n, p) for n, p in zip(names, prices)]
+
+    print(f"{COUNT:,} products ({DISTINCT:,} distinct)")
+    for label, build in [
+        ("dict-backed (before)", dict_products),
+        ("slotted", slotted_products),
+        ("slotted + catalog", interned_products),
+    ]:
+        size, _ = _measure(build)
+        print(f"  {label:<22} {size / COUNT:8.1f} bytes/product")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,57 @@
+"""
+Quote cache benchmark - cost of add + total() on a large cart, cached or not.
+
+The cache key is a running fingerprint, so looking a cart up should cost
+about the same however many lines it has. This times add() followed by
+total() on a cart of LINES distinct lines, with and without a QuoteCache,
+and fails if the cached cart is more than MAX_RATIO times slower.
+
+Run from the repository root:
+    python -m benchmarks.bench_quote_cache
+"""
+
+import sys
+import time
+
+from src.product import Product
+from src.quote_cache import QuoteCache
+from src.shopping_cart import ShoppingCart
+
+LINES = 20_000
+UPDATES = 200
+REPEATS = 5
+# Rebuilding a 20k-line key per total() would be ~1000x slower.
+MAX_RATIO = 10
+
+
+def seconds_per_update(cache):
+    """Best time per add() + total() over REPEATS passes."""
+    cart = ShoppingCart(quote_cache=cache)
+    cart.add_many((Product(f"Item {i}", 1.00), 1) for i in range(LINES))
+    cart.total()
+    extra = Product("Extra", 1.00)
+    best = float("inf")
+    for _ in range(REPEATS):
+        start = time.perf_counter()
+        for _ in range(UPDATES):
+            cart.add(extra)
+            cart.total()
+        best = min(best, (time.perf_counter() - start) / UPDATES)
+    return best
+
+
+def main():
+    uncached = seconds_per_update(None)
+    cached = seconds_per_update(QuoteCache())
+    print(f"{LINES:,} lines")
+    print(f"uncached  {uncached * 1e6:8.2f} us per add + total")
+    print(f"cached    {cached * 1e6:8.2f} us per add + total "
+          f"({cached / uncached:.1f}x)")
+    if cached > MAX_RATIO * uncached:
+        print(f"REGRESSION: cached lookups are over {MAX_RATIO}x slower")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,64 @@
+"""
+Repository benchmark - cart mutations per second with and without batching.
+
+Runs the same random add/remove workload against CartRepository with
+batch_size=1 (every change is its own transaction) and with write-behind
+batching, then checks both databases hold the same carts.
+
+Run from the repository root:
+    python -m benchmarks.bench_repository
+"""
+
+import os
+import random
+import tempfile
+import time
+
+from src.catalog import ProductCatalog
+from src.repository import CartRepository
+
+OPERATIONS = 5_000
+CARTS = 50
+PRODUCTS = 200
+
+
+def _workload(catalog, seed=340):
+    rng = random.Random(seed)
+    for _ in range(OPERATIONS):
+        cart_id = f"cart-{rng.randrange(CARTS)}"
+        product = catalog.product(rng.randrange(PRODUCTS))
+        yield cart_id, product, rng.randint(1, 3)
+
+
+def _run(path, catalog, batch_size):
+    start = time.perf_counter()
+    with CartRepository(path, catalog, batch_size=batch_size) as repo:
+        for cart_id, product, qty in _workload(catalog):
+            cart = repo.get(cart_id)
+            if cart.contains(product) and qty == 1:
+                repo.remove(cart_id, product, 1)
+            else:
+                repo.add(cart_id, product, qty)
+    return time.perf_counter() - start
+
+
+def main():
+    catalog = ProductCatalog()
+    for i in range(PRODUCTS):
+        catalog.get(f"Product {i}", (i % 50) + 0.99)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        totals = {}
+        for batch_size in (1, 500):
+            path = os.path.join(tmp, f"carts-{batch_size}.db")
+            elapsed = _run(path, catalog, batch_size)
+            print(f"batch_size={batch_size:<4} {OPERATIONS / elapsed:12,.0f} mutations/sec")
+            with CartRepository(path, catalog) as repo:
+                totals[batch_size] = [
+                    repo.get(f"cart-{i}").total_cents() for i in range(CARTS)
+                ]
+        assert totals[1] == totals[500], "batched and unbatched carts differ"
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+"""
+Cart service load generator - latency percentiles and throughput.
+
+Starts a CartService on a local TCP port (or connects to a running one)
+and drives it from many concurrent pipelining clients. Each client works
+on its own cart with a mix of adds, removes and totals.
+
+Run from the repository root:
+    python -m benchmarks.load_cart_service
+    python -m benchmarks.load_cart_service --clients 64 --requests 2000
+    python -m benchmarks.load_cart_service --port 9000   # existing server
+"""
+
+import argparse
+import asyncio
+import random
+import statistics
+import time
+
+from src.catalog import ProductCatalog
+from src.service import CartClient, CartService, CartServiceError
+
+PRODUCTS = 100
+
+
+def _catalog():
+    catalog = ProductCatalog()
+    for i in range(PRODUCTS):
+        catalog.get(f"Product {i}", (i % 20) + 0.49)
+    return catalog
+
+
+async def _client(host, port, cart_id, requests, in_flight, latencies, seed):
+    rng = random.Random(seed)
+    client = await CartClient.connect(host, port)
+    semaphore = asyncio.Semaphore(in_flight)
+
+    async def one(line):
+        async with semaphore:
+            start = time.perf_counter()
+            try:
+                await client.request(line)
+            except CartServiceError:
+                pass
+            latencies.append(time.perf_counter() - start)
+
+    lines = []
+    for _ in range(requests):
+        roll = rng.random()
+        product_id = rng.randrange(PRODUCTS)
+        if roll < 0.6:
+            lines.append(f"ADD {cart_id} {product_id} {rng.randint(1, 3)}")
+        elif roll < 0.9:
+            lines.append(f"REMOVE {cart_id} {product_id} 1")
+        else:
+            lines.append(f"TOTAL {cart_id}")
+    await asyncio.gather(*(one(line) for line in lines))
+    await client.close()
+
+
+async def main(args):
+    server = None
+    port = args.port
+    if port is None:
+        server = await CartService(_catalog()).start_server()
+        port = server.sockets[0].getsockname()[1]
+
+    latencies = []
+    start = time.perf_counter()
+    await asyncio.gather(*(
+        _client(args.host, port, f"cart-{i}", args.requests, args.in_flight,
+                latencies, seed=i)
+        for i in range(args.clients)
+    ))
+    elapsed = time.perf_counter() - start
+
+    if server is not None:
+        server.close()
+        await server.wait_closed()
+
+    cuts = statistics.quantiles(latencies, n=100)
+    print(f"{len(latencies):,} requests from {args.clients} clients in {elapsed:.2f}s")
+    print(f"  throughput  {len(latencies) / elapsed:12,.0f} ops/sec")
+    print(f"  p50         {cuts[49] * 1000:12.3f} ms")
+    print(f"  p99         {cuts[98] * 1000:12.3f} ms")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, help="use an already running server")
+    parser.add_argument("--clients", type=int, default=32)
+    parser.add_argument("--requests", type=int, default=1000, help="per client")
+    parser.add_argument("--in-flight", type=int, default=16,
+                        help="pipelined requests per client")
+    asyncio.run(main(parser.parse_args()))
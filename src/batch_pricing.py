@@ -0,0 +1,181 @@
+"""
+Batch pricing - compute totals for many saved carts in one pass.
+
+Saved carts, e.g. checkout Orders or a repository dump, are packed as raw
+(product id, quantity) rows into a RowBatch: a sparse carts x products
+matrix in compressed sparse row (CSR) form, with one flat array of product
+ids and quantities plus an index of where each cart's lines start. No
+Product or ShoppingCart is built; price_rows() compiles the rules into
+per-product columns once and prices every line with a few whole-array
+passes (NumPy when it is installed, a tight pure-Python loop otherwise).
+See benchmarks/bench_batch_pricing.py.
+
+Carts that already exist as ShoppingCart objects are cheapest to price
+with their own total_cents(), which is memoized.
+
+The pricing rules are the same PricingPipeline the cart uses:
+    line  = price * (qty - (qty // (buy + free)) * free), less category %
+    total = pipeline.cart_total(sum(lines))
+so every batch total is identical to the cart's own total_cents().
+"""
+
+from array import array
+
+from src.catalog import ColumnarCatalog
+from src.money import percent_of
+from src.pricing import CartPercentRule, PricingPipeline
+
+try:
+    import numpy as np
+except ImportError:     # optional: the pure-Python path gives the same totals
+    np = None
+
+
+class RowBatch:
+    """
+    Saved carts as CSR rows of catalog product ids.
+
+    Attributes:
+        indptr (array): Cart i's lines are entries indptr[i]:indptr[i + 1]
+        product_ids (array): Catalog product id of each entry
+        quantities (array): Quantity of each entry
+        percents (list): Cart-wide discount percentage of each cart (0 if none)
+    """
+
+    def __init__(self):
+        """Create an empty batch."""
+        self.indptr = array("q", [0])
+        self.product_ids = array("q")
+        self.quantities = array("q")
+        self.percents = []
+
+    @classmethod
+    def from_orders(cls, orders):
+        """Pack checkout Orders (see src/checkout.py) into a new batch."""
+        batch = cls()
+        for order in orders:
+            batch.append(order.lines, order.percent)
+        return batch
+
+    def append(self, lines, percent=0):
+        """
+        Add one cart from (product id, quantity) pairs.
+
+        Repeated product ids are combined, as ShoppingCart.add_many does.
+
+        Raises:
+            ValueError: If any product id is negative or not an integer, or
+                any quantity is not a positive integer
+        """
+        merged = {}
+        for product_id, qty in lines:
+            if type(product_id) is not int or product_id < 0:
+                raise ValueError(f"Invalid product id {product_id!r}")
+            if type(qty) is not int or qty < 1:
+                raise ValueError(f"Invalid quantity {qty!r} for product {product_id}")
+            merged[product_id] = merged.get(product_id, 0) + qty
+        self.product_ids.extend(merged)
+        self.quantities.extend(merged.values())
+        self.indptr.append(len(self.product_ids))
+        self.percents.append(percent)
+
+    def __len__(self):
+        return len(self.percents)
+
+
+def _rule_columns(catalog, pipeline):
+    """Per-product-id price, bulk cycle, free units and line percent."""
+    if isinstance(catalog, ColumnarCatalog):
+        prices, categories = catalog.prices_cents, catalog.categories
+    else:
+        products = [catalog.product(i) for i in range(len(catalog))]
+        prices = [product.price_cents for product in products]
+        categories = [product.category for product in products]
+    cycles = [0] * len(prices)
+    frees = [0] * len(prices)
+    for product, (cycle_size, free) in pipeline.bulk_by_product.items():
+        try:
+            product_id = catalog.id_of(product)
+        except ValueError:
+            continue        # no row can hold it, so the rule never applies
+        cycles[product_id] = cycle_size
+        frees[product_id] = free
+    by_category = pipeline.percent_by_category
+    percents = [by_category.get(c, 0) for c in categories] if by_category else None
+    return prices, cycles, frees, percents
+
+
+def _subtotals_python(batch, prices, cycles, frees, percents):
+    line_totals = [
+        prices[pid] * (qty - (qty // cycles[pid]) * frees[pid] if cycles[pid] else qty)
+        for pid, qty in zip(batch.product_ids, batch.quantities)
+    ]
+    if percents is not None:
+        for i, pid in enumerate(batch.product_ids):
+            if percents[pid]:
+                line_totals[i] -= percent_of(line_totals[i], percents[pid])
+    indptr = batch.indptr
+    return [sum(line_totals[start:end]) for start, end in zip(indptr, indptr[1:])]
+
+
+def _subtotals_numpy(batch, prices, cycles, frees, percents):
+    ids = np.asarray(batch.product_ids, dtype=np.int64)
+    qty = np.asarray(batch.quantities, dtype=np.int64)
+    cycle = np.asarray(cycles, dtype=np.int64)[ids]
+    paid = qty - (qty // np.maximum(cycle, 1)) * np.asarray(frees, dtype=np.int64)[ids]
+    line_totals = np.asarray(prices, dtype=np.int64)[ids] * np.where(cycle > 0, paid, qty)
+    if percents is not None:
+        whole = [p if isinstance(p, int) else 0 for p in percents]
+        line_totals -= (line_totals * np.asarray(whole, dtype=np.int64)[ids] + 50) // 100
+        # Fractional percentages need percent_of's exact Decimal rounding.
+        for i in np.flatnonzero(np.asarray([p != w for p, w in zip(percents, whole)])[ids]):
+            line_totals[i] -= percent_of(int(line_totals[i]), percents[ids[i]])
+    running = np.concatenate(([0], np.cumsum(line_totals)))
+    indptr = np.asarray(batch.indptr, dtype=np.int64)
+    return (running[indptr[1:]] - running[indptr[:-1]]).tolist()
+
+
+# Line totals, their percentages and the running sum stay below this in int64.
+_INT64_LIMIT = 2**63 // 100
+
+
+def _fits_int64(batch, prices):
+    """True if no intermediate of _subtotals_numpy can overflow int64."""
+    if not batch.quantities:
+        return True
+    return max(prices, default=0) * sum(batch.quantities) < _INT64_LIMIT
+
+
+def price_rows(batch, catalog, rules=()):
+    """
+    Return the total in cents of every cart in a RowBatch, in order.
+
+    Args:
+        batch: The RowBatch to price
+        catalog: ProductCatalog or ColumnarCatalog the product ids refer to
+        rules: Pricing rules applied to every cart (e.g. store promotions)
+
+    Totals equal building each cart with these rules, adding its lines,
+    applying its percent with apply_discount() and calling total_cents().
+    Prices large enough to overflow 64-bit arithmetic are summed in Python.
+
+    Raises:
+        IndexError: If a product id is not in the catalog
+    """
+    rules = list(rules)
+    base = PricingPipeline(rules)
+    columns = _rule_columns(catalog, base)
+    prices = columns[0]
+    if batch.product_ids and max(batch.product_ids) >= len(prices):
+        raise IndexError(f"No product with id {max(batch.product_ids)}")
+    vectorized = np is not None and _fits_int64(batch, prices)
+    subtotals = (_subtotals_numpy if vectorized else _subtotals_python)(batch, *columns)
+    pipelines = {0: base}
+    totals = []
+    for subtotal, percent in zip(subtotals, batch.percents):
+        pipeline = pipelines.get(percent)
+        if pipeline is None:
+            pipeline = PricingPipeline(rules + [CartPercentRule(percent)])
+            pipelines[percent] = pipeline
+        totals.append(pipeline.cart_total(subtotal))
+    return totals
@@ -0,0 +1,57 @@
+"""
+Cart diffs - the line-level difference between two carts.
+
+ShoppingCart.diff() and ShoppingCart.merge() return a CartDiff, a small
+delta that can be sent to a client instead of the whole cart.
+"""
+
+from dataclasses import dataclass, field
+
+MERGE_POLICIES = ("sum", "max", "prefer-other")
+
+
+@dataclass
+class CartDiff:
+    """
+    Line changes between two carts.
+
+    Attributes:
+        added (dict): Product -> quantity, for lines that are new
+        removed (dict): Product -> previous quantity, for lines that are gone
+        changed (dict): Product -> (old quantity, new quantity)
+    """
+
+    added: dict = field(default_factory=dict)
+    removed: dict = field(default_factory=dict)
+    changed: dict = field(default_factory=dict)
+
+    def record(self, product, old, new):
+        """File one line's change under added, removed or changed."""
+        if old == new:
+            return
+        if not old:
+            self.added[product] = new
+        elif not new:
+            self.removed[product] = old
+        else:
+            self.changed[product] = (old, new)
+
+    def __bool__(self):
+        return bool(self.added or self.removed or self.changed)
+
+    def __len__(self):
+        return len(self.added) + len(self.removed) + len(self.changed)
+
+    def to_dict(self):
+        """The diff as JSON-ready data, products identified by name and price."""
+        def line(product, **quantities):
+            return {"name": product.name, "price": product.price, **quantities}
+
+        return {
+            "added": [line(p, quantity=q) for p, q in self.added.items()],
+            "removed": [line(p, quantity=q) for p, q in self.removed.items()],
+            "changed": [
+                line(p, old_quantity=old, new_quantity=new)
+                for p, (old, new) in self.changed.items()
+            ],
+        }
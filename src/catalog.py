@@ -0,0 +1,399 @@
+"""
+Product catalogs.
+
+ProductCatalog hands out one shared Product instance per distinct product,
+so carts and loaders that build products through it hold each product once
+and equality checks short-circuit on identity. Each product has a stable
+id that survives price changes. Carts registered with track() are kept in
+a reverse index by product id (for their lines and their bulk rules), so
+update_price() reprices only the affected line of the affected carts.
+
+ColumnarCatalog stores a large catalog as parallel columns (names, prices
+in cents, categories) loaded from CSV or JSONL in one pass. Product objects
+are only created for rows that actually end up in a cart.
+"""
+
+import csv
+import json
+import sys
+import weakref
+from array import array
+from decimal import Decimal, InvalidOperation
+from typing import NamedTuple
+
+from src.money import to_cents
+from src.product import Product
+
+# Largest price the signed 64-bit prices_cents column can hold.
+_MAX_CENTS = 2**63 - 1
+
+
+def _key(product):
+    """The identity of a product within a catalog: name, exact price, category."""
+    return (product.name, product.price_cents, product.category)
+
+
+class ProductCatalog:
+    """
+    An interning (flyweight) registry of Product instances.
+
+    Example:
+        catalog = ProductCatalog()
+        a = catalog.get("Apple", 1.50)
+        b = catalog.get("Apple", 1.50)
+        assert a is b
+    """
+
+    def __init__(self):
+        """Create an empty catalog."""
+        self._products = {}
+        self._ids = {}
+        self._by_id = []
+        self._carts_by_id = {}
+        self._bulk_carts_by_id = {}
+        self.version = 0
+
+    def __getstate__(self):
+        # Tracked carts (held in WeakSets) belong to this process; a pickled
+        # copy, e.g. one sent to a worker process, starts with none.
+        state = self.__dict__.copy()
+        state["_carts_by_id"] = {}
+        state["_bulk_carts_by_id"] = {}
+        return state
+
+    def get(self, name: str, price: float, category: str = "general") -> Product:
+        """
+        Return the shared Product for name/price/category, creating it once.
+
+        Raises:
+            ValueError: If the product would be invalid (see Product)
+        """
+        try:
+            product = self._products.get((name.strip(), to_cents(price), category))
+        except (ArithmeticError, TypeError, ValueError):
+            product = None      # invalid; Product below raises the right error
+        if product is None:
+            product = Product(name, price, category)
+            product = self._products.get(_key(product)) or self._register(product)
+        return product
+
+    def intern(self, product: Product) -> Product:
+        """Return the catalog's instance equal to product, adding it if new."""
+        existing = self._products.get(_key(product))
+        if existing is None:
+            existing = self._register(product)
+        return existing
+
+    def _register(self, product):
+        key = _key(product)
+        self._products[key] = product
+        self._ids[key] = len(self._by_id)
+        self._by_id.append(product)
+        return product
+
+    def id_of(self, product: Product) -> int:
+        """
+        Return the stable integer id of a product in this catalog.
+
+        Raises:
+            ValueError: If the product is not in the catalog
+        """
+        try:
+            return self._ids[_key(product)]
+        except KeyError:
+            raise ValueError(f"{product!r} is not in the catalog") from None
+
+    def product(self, product_id: int) -> Product:
+        """
+        Return the current product with the given id.
+
+        Raises:
+            IndexError: If no product has that id (ids are never negative)
+        """
+        if not 0 <= product_id < len(self._by_id):
+            raise IndexError(f"No product with id {product_id}")
+        return self._by_id[product_id]
+
+    def update_price(self, product_id: int, price: float) -> Product:
+        """
+        Change a product's price, keeping its id, and reprice open carts.
+
+        Products are immutable, so this creates a new Product. Every tracked
+        cart holding the old one has that line (and any bulk rule on it)
+        moved to the new product; no other line or cart is touched.
+
+        Returns:
+            The new Product.
+
+        Raises:
+            IndexError: If no product has that id
+            ValueError: If the price is invalid or the new name/price/category
+                already belongs to another product
+        """
+        old = self.product(product_id)
+        new = Product(old.name, price, old.category)
+        key = _key(new)
+        if self._ids.get(key, product_id) != product_id and key in self._products:
+            raise ValueError(f"{new!r} already exists with another id")
+        del self._products[_key(old)]
+        self._products[key] = new
+        self._ids[key] = product_id
+        self._by_id[product_id] = new
+        self.version += 1
+        carts = set(self._carts_by_id.get(product_id, ()))
+        carts.update(self._bulk_carts_by_id.get(product_id, ()))
+        for cart in carts:
+            cart.replace_product(old, new)
+        return new
+
+    def track(self, cart):
+        """Index an open cart's lines so price changes reach it."""
+        if self not in cart._observers:
+            cart._observers.append(self)
+            for product in cart._quantities:
+                self.line_added(cart, product)
+            for product in cart.pricing.bulk_by_product:
+                self.bulk_rule_added(cart, product)
+
+    def untrack(self, cart):
+        """Stop updating a cart (e.g. after checkout)."""
+        if self in cart._observers:
+            cart._observers.remove(self)
+            for product in cart._quantities:
+                self.line_removed(cart, product)
+            for product in cart.pricing.bulk_by_product:
+                self.bulk_rule_removed(cart, product)
+
+    def carts_with(self, product_id: int):
+        """The tracked carts that currently hold the product."""
+        return list(self._carts_by_id.get(product_id, ()))
+
+    def line_added(self, cart, product):
+        self._index_cart(self._carts_by_id, cart, product)
+
+    def line_removed(self, cart, product):
+        self._unindex_cart(self._carts_by_id, cart, product)
+
+    def bulk_rule_added(self, cart, product):
+        self._index_cart(self._bulk_carts_by_id, cart, product)
+
+    def bulk_rule_removed(self, cart, product):
+        self._unindex_cart(self._bulk_carts_by_id, cart, product)
+
+    def _index_cart(self, index, cart, product):
+        product_id = self._ids.get(_key(product))
+        if product_id is not None:
+            index.setdefault(product_id, weakref.WeakSet()).add(cart)
+
+    def _unindex_cart(self, index, cart, product):
+        product_id = self._ids.get(_key(product))
+        carts = index.get(product_id)
+        if carts is not None:
+            carts.discard(cart)
+            if not carts:
+                del index[product_id]
+
+    def __len__(self):
+        return len(self._products)
+
+    def __contains__(self, product):
+        if not isinstance(product, Product):
+            return False
+        return _key(product) in self._products
+
+    def __iter__(self):
+        return iter(self._products.values())
+
+
+class RowError(NamedTuple):
+    """A row rejected while loading a ColumnarCatalog."""
+
+    line: int
+    message: str
+
+
+class ColumnarCatalog:
+    """
+    A read-mostly product catalog stored column by column.
+
+    Attributes:
+        names (list[str]): Stripped product names
+        prices_cents (array): Prices in whole cents (signed 64-bit)
+        categories (list[str]): Product categories (interned strings)
+
+    Row numbers are positions in these columns and double as product ids.
+    """
+
+    def __init__(self):
+        """Create an empty catalog."""
+        self.names = []
+        self.prices_cents = array("q")
+        self.categories = []
+        self._views = {}
+        self._row_of = None
+
+    @classmethod
+    def load_csv(cls, path):
+        """
+        Load a CSV file with a header row of name, price and optional category.
+
+        Returns:
+            (catalog, errors): The loaded catalog and a list of RowError for
+            every rejected row. Line numbers count the header as line 1.
+        """
+        with open(path, newline="", encoding="utf-8") as f:
+            reader = csv.DictReader(f)
+            rows = (
+                (line, row.get("name"), row.get("price"), row.get("category"))
+                for line, row in enumerate(reader, start=2)
+            )
+            catalog = cls()
+            errors = catalog.extend(rows)
+        return catalog, errors
+
+    @classmethod
+    def load_jsonl(cls, path):
+        """
+        Load a JSON Lines file of {"name", "price", "category"} objects.
+
+        Returns:
+            (catalog, errors): As for load_csv. Blank lines are skipped and
+            malformed JSON is reported as a row error.
+        """
+        errors = []
+
+        def rows(f):
+            for line, text in enumerate(f, start=1):
+                if not text.strip():
+                    continue
+                try:
+                    record = json.loads(text)
+                except json.JSONDecodeError:
+                    errors.append(RowError(line, "Invalid JSON"))
+                    continue
+                if not isinstance(record, dict):
+                    errors.append(RowError(line, "Row must be a JSON object"))
+                    continue
+                yield (line, record.get("name"), record.get("price"),
+                       record.get("category"))
+
+        with open(path, encoding="utf-8") as f:
+            catalog = cls()
+            errors.extend(catalog.extend(rows(f)))
+        errors.sort()
+        return catalog, errors
+
+    def extend(self, rows):
+        """
+        Validate and append rows of (line, name, price, category).
+
+        Runs the same checks as Product.__init__ in a single pass that
+        appends straight to the columns; no Product is constructed. Plain
+        "123.45" price strings take an integer fast path, other values are
+        parsed exactly with Decimal.
+
+        Returns:
+            A list of RowError for rejected rows; valid rows are appended.
+        """
+        names, prices, categories = self.names, self.prices_cents, self.categories
+        intern = sys.intern
+        self._row_of = None
+        errors = []
+        for line, name, price, category in rows:
+            name = name.strip() if isinstance(name, str) else ""
+            if not name:
+                errors.append(RowError(line, "Product name cannot be empty"))
+                continue
+            if category is not None and not isinstance(category, str):
+                errors.append(RowError(line, "Category must be text"))
+                continue
+            cents = _parse_cents(price)
+            if cents is None:
+                errors.append(RowError(line, "Price is not a number"))
+            elif cents < 0:
+                errors.append(RowError(line, "Price cannot be negative"))
+            elif cents > _MAX_CENTS:
+                errors.append(RowError(line, "Price is too large"))
+            else:
+                names.append(name)
+                prices.append(cents)
+                categories.append(intern(category or "general"))
+        return errors
+
+    def __len__(self):
+        return len(self.names)
+
+    def product(self, row: int) -> Product:
+        """
+        Return the Product view of a row, creating it on first use.
+
+        Raises:
+            IndexError: If there is no such row (rows are never negative)
+        """
+        view = self._views.get(row)
+        if view is None:
+            if not 0 <= row < len(self.names):
+                raise IndexError(f"No product in row {row}")
+            view = Product.from_cents(
+                self.names[row], self.prices_cents[row], self.categories[row]
+            )
+            self._views[row] = view
+        return view
+
+    def id_of(self, product: Product) -> int:
+        """
+        Return the row of a product, building the reverse index on first use.
+
+        Raises:
+            ValueError: If no row matches the product
+        """
+        if self._row_of is None:
+            self._row_of = {
+                key: row
+                for row, key in enumerate(
+                    zip(self.names, self.prices_cents, self.categories)
+                )
+            }
+        key = (product.name, product.price_cents, product.category)
+        try:
+            return self._row_of[key]
+        except KeyError:
+            raise ValueError(f"{product!r} is not in the catalog") from None
+
+    def add_to_cart(self, cart, row: int, quantity: int = 1) -> Product:
+        """Add a catalog row to a cart, materializing its Product view."""
+        product = self.product(row)
+        cart.add(product, quantity)
+        return product
+
+
+def _parse_cents(value):
+    """
+    Parse a price cell to cents, or None if it is not a number.
+
+    Any negative price gives a negative result, even one that would round
+    to 0 cents, since Product rejects it too.
+    """
+    if isinstance(value, str):
+        value = value.strip()
+        whole, dot, frac = value.partition(".")
+        if (whole.isascii() and whole.isdigit() and len(frac) <= 2
+                and (not dot or (frac.isascii() and frac.isdigit()))):
+            # "12", "12.3", "12.34": exact, so no rounding is involved.
+            return int(whole) * 100 + (int(frac) * (10 if len(frac) == 1 else 1) if frac else 0)
+    elif type(value) is int:
+        return value * 100
+    elif isinstance(value, bool) or value is None:
+        return None
+    try:
+        decimal = Decimal(str(value))
+    except InvalidOperation:
+        return None
+    if not decimal.is_finite():
+        return None
+    if decimal < 0:
+        return -1
+    if decimal.adjusted() > 16:
+        # Too many digits for to_cents' rounding and far beyond int64 cents.
+        return int(decimal) * 100
+    return to_cents(decimal)
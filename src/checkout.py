@@ -0,0 +1,101 @@
+"""
+Batch checkout - price large batches of orders across processes.
+
+Orders are sharded by a stable hash of their cart id and each shard is
+priced in a worker process. The catalog and any store-wide pricing rules
+are sent to each worker once, through the pool initializer; tasks carry
+only (cart id, product id, quantity) tuples, never Product objects.
+
+Totals are integer cents and the merge restores input order, so results
+are bit-identical to checkout_serial(), the single-process path.
+"""
+
+import os
+import zlib
+from concurrent.futures import ProcessPoolExecutor
+from typing import NamedTuple
+
+from src.shopping_cart import ShoppingCart
+
+
+class Order(NamedTuple):
+    """An order to check out: product ids with quantities, plus a discount."""
+
+    cart_id: str
+    lines: tuple
+    percent: float = 0
+
+
+def price_order(order, catalog, rules=()):
+    """Build a ShoppingCart for one order and return its total in cents."""
+    product = catalog.product
+    cart = ShoppingCart()
+    for rule in rules:
+        cart.add_rule(rule)
+    cart.add_many([(product(product_id), qty) for product_id, qty in order.lines])
+    if order.percent:
+        cart.apply_discount(order.percent)
+    return cart.total_cents()
+
+
+def checkout_serial(orders, catalog, rules=()):
+    """Price every order in this process; returns [(cart id, cents)]."""
+    return [(order.cart_id, price_order(order, catalog, rules)) for order in orders]
+
+
+# The catalog and rules a worker process received from the initializer.
+_worker_catalog = None
+_worker_rules = ()
+
+
+def _init_worker(catalog, rules):
+    global _worker_catalog, _worker_rules
+    _worker_catalog = catalog
+    _worker_rules = rules
+
+
+def _price_shard(shard):
+    """Price one shard of (input position, order) pairs in a worker."""
+    return [
+        (position, order.cart_id, price_order(order, _worker_catalog, _worker_rules))
+        for position, order in shard
+    ]
+
+
+def shard_of(cart_id, shards):
+    """Stable shard number for a cart id (the same in every process)."""
+    return zlib.crc32(str(cart_id).encode("utf-8")) % shards
+
+
+def run_batch_checkout(orders, catalog, rules=(), workers=None, shards=None):
+    """
+    Price orders in a pool of worker processes.
+
+    Args:
+        orders: Iterable of Order
+        catalog: Any picklable catalog with product(id)
+        rules: Pricing rules applied to every cart (e.g. store promotions)
+        workers: Number of processes (default: os.cpu_count())
+        shards: Number of shards (default: 4 per worker, for load balance)
+
+    Returns:
+        [(cart id, total cents)] in the same order as orders.
+    """
+    workers = workers or os.cpu_count() or 1
+    shards = shards or workers * 4
+    buckets = [[] for _ in range(shards)]
+    count = 0
+    for position, order in enumerate(orders):
+        buckets[shard_of(order.cart_id, shards)].append((position, order))
+        count += 1
+
+    results = [None] * count
+    with ProcessPoolExecutor(
+        max_workers=workers,
+        initializer=_init_worker,
+        initargs=(catalog, tuple(rules)),
+    ) as pool:
+        for priced in pool.map(_price_shard, [b for b in buckets if b]):
+            for position, cart_id, cents in priced:
+                results[position] = (cart_id, cents)
+    return results
@@ -0,0 +1,153 @@
+"""
+Concurrent shopping cart - a ShoppingCart safe to share between threads.
+
+The cart's lines are split across a fixed number of stripes. Each stripe
+is an ordinary ShoppingCart guarded by its own lock, and a product always
+lives in the same stripe, so adds and removes of different products
+usually take different locks and do not wait on each other.
+
+Operations that need a consistent view of the whole cart (total,
+item_count, rule changes, clear) take every stripe lock, always in stripe
+order, which makes them linearizable and rules out deadlock.
+"""
+
+import threading
+from contextlib import ExitStack, contextmanager
+
+from src.money import from_cents
+from src.pricing import BulkRule, CartPercentRule, CategoryPercentRule, PricingPipeline
+from src.shopping_cart import ShoppingCart
+
+
+class ConcurrentShoppingCart:
+    """
+    A thread-safe cart with the same interface as ShoppingCart.
+
+    All stripes share one PricingPipeline; line prices are computed inside
+    each stripe and the cart-level rules are applied to their sum.
+    """
+
+    def __init__(self, stripes=16):
+        """Create an empty cart split into the given number of stripes."""
+        self.pricing = PricingPipeline()
+        self._stripes = []
+        for _ in range(stripes):
+            stripe = ShoppingCart()
+            stripe.pricing = self.pricing
+            self._stripes.append(stripe)
+        self._locks = [threading.Lock() for _ in range(stripes)]
+
+    def _index(self, product):
+        return hash(product) % len(self._stripes)
+
+    @contextmanager
+    def _all_locks(self):
+        with ExitStack() as stack:
+            for lock in self._locks:
+                stack.enter_context(lock)
+            yield
+
+    @contextmanager
+    def _locks_for(self, indexes):
+        with ExitStack() as stack:
+            for i in sorted(indexes):
+                stack.enter_context(self._locks[i])
+            yield
+
+    # -------------------------------------------------------------------------
+    # Single-line operations (one stripe lock)
+    # -------------------------------------------------------------------------
+
+    def add(self, product, quantity=1):
+        i = self._index(product)
+        with self._locks[i]:
+            self._stripes[i].add(product, quantity)
+
+    def remove(self, product, quantity=1):
+        i = self._index(product)
+        with self._locks[i]:
+            self._stripes[i].remove(product, quantity)
+
+    def contains(self, product):
+        i = self._index(product)
+        with self._locks[i]:
+            return self._stripes[i].contains(product)
+
+    def get_quantity(self, product):
+        i = self._index(product)
+        with self._locks[i]:
+            return self._stripes[i].get_quantity(product)
+
+    # -------------------------------------------------------------------------
+    # Multi-line operations (only the stripes involved)
+    # -------------------------------------------------------------------------
+
+    def add_many(self, lines):
+        """Add several (product, quantity) pairs atomically."""
+        groups = self._group(ShoppingCart._collect(lines, minimum=1))
+        with self._locks_for(groups):
+            for i, group in groups.items():
+                self._stripes[i].add_many(group)
+
+    def remove_many(self, lines):
+        """Remove several (product, quantity) pairs atomically."""
+        groups = self._group(ShoppingCart._collect(lines, minimum=1))
+        with self._locks_for(groups):
+            for i, group in groups.items():
+                for product, _ in group:
+                    if not self._stripes[i].contains(product):
+                        raise ValueError("Product not in cart")
+            for i, group in groups.items():
+                self._stripes[i].remove_many(group)
+
+    def _group(self, deltas):
+        groups = {}
+        for product, qty in deltas.items():
+            groups.setdefault(self._index(product), []).append((product, qty))
+        return groups
+
+    # -------------------------------------------------------------------------
+    # Whole-cart operations (every stripe lock)
+    # -------------------------------------------------------------------------
+
+    def is_empty(self):
+        return self.item_count() == 0
+
+    def item_count(self):
+        with self._all_locks():
+            return sum(stripe.item_count() for stripe in self._stripes)
+
+    def total(self):
+        return from_cents(self.total_cents())
+
+    def total_cents(self):
+        with self._all_locks():
+            subtotal = sum(stripe.subtotal_cents() for stripe in self._stripes)
+            return self.pricing.cart_total(subtotal)
+
+    def clear(self):
+        with self._all_locks():
+            for stripe in self._stripes:
+                stripe.clear()
+
+    def apply_discount(self, percent):
+        self.add_rule(CartPercentRule(percent))
+
+    def remove_discount(self):
+        self.remove_rule(CartPercentRule(0))
+
+    def set_bulk_discount(self, product, buy_quantity, free_quantity):
+        self.add_rule(BulkRule(product, buy_quantity, free_quantity))
+
+    def set_category_discount(self, category, percent):
+        self.add_rule(CategoryPercentRule(category, percent))
+
+    def add_rule(self, rule):
+        with self._all_locks():
+            for stripe in self._stripes:
+                stripe.add_rule(rule)
+
+    def remove_rule(self, rule):
+        with self._all_locks():
+            for stripe in self._stripes:
+                stripe.remove_rule(rule)
@@ -0,0 +1,84 @@
+"""
+Copy-on-write mapping used by ShoppingCart.fork().
+
+A CowDict reads through to a shared base mapping and keeps its own
+writes (including deletions) in a small overlay dict. Two carts that
+layer CowDicts over the same base share every line they have not changed,
+and each write costs the same as a dict write.
+
+The base must not be mutated while CowDicts are layered on it.
+"""
+
+from collections.abc import MutableMapping
+
+_MISSING = object()
+_DELETED = object()
+
+
+class CowDict(MutableMapping):
+    """A mutable view over a read-only base mapping."""
+
+    __slots__ = ("_base", "_changes", "_len", "depth")
+
+    def __init__(self, base):
+        self._base = base
+        self._changes = {}
+        self._len = len(base)
+        self.depth = base.depth + 1 if isinstance(base, CowDict) else 1
+
+    def shareable(self):
+        """
+        A read-only mapping equal to this one, for new CowDicts to layer on.
+
+        Without local changes that is simply the base, so forking an
+        unchanged cart again does not deepen the chain.
+        """
+        return self if self._changes else self._base
+
+    def __getitem__(self, key):
+        value = self._changes.get(key, _MISSING)
+        if value is _MISSING:
+            return self._base[key]
+        if value is _DELETED:
+            raise KeyError(key)
+        return value
+
+    def get(self, key, default=None):
+        value = self._changes.get(key, _MISSING)
+        if value is _MISSING:
+            return self._base.get(key, default)
+        if value is _DELETED:
+            return default
+        return value
+
+    def __contains__(self, key):
+        value = self._changes.get(key, _MISSING)
+        if value is _MISSING:
+            return key in self._base
+        return value is not _DELETED
+
+    def __setitem__(self, key, value):
+        if key not in self:
+            self._len += 1
+        self._changes[key] = value
+
+    def __delitem__(self, key):
+        if key not in self:
+            raise KeyError(key)
+        self._changes[key] = _DELETED
+        self._len -= 1
+
+    def __iter__(self):
+        changes = self._changes
+        for key, value in changes.items():
+            if value is not _DELETED:
+                yield key
+        for key in self._base:
+            if key not in changes:
+                yield key
+
+    def __len__(self):
+        return self._len
+
+    def __repr__(self):
+        return f"CowDict({dict(self)!r})"
@@ -0,0 +1,225 @@
+"""
+Event-sourced cart - an operation log with snapshots, undo and redo.
+
+EventSourcedCart wraps a ShoppingCart and records every change as an
+event in a log. Each event carries enough to be reversed (a remove logs
+how many units it actually removed, a rule change logs the rule it
+replaced), so undo and redo are O(1) per step.
+
+Every `snapshot_every` events the current lines and rules are saved, and
+any earlier version can be rebuilt by replaying from the nearest snapshot.
+compact() drops the events and snapshots before the latest snapshot at or
+below the current version.
+
+Undo moves a cursor back through the log. A new change made after an undo
+discards the undone events, like the redo stack in an editor.
+"""
+
+from bisect import bisect_right
+from typing import NamedTuple
+
+from src.pricing import BulkRule, CartPercentRule, CategoryPercentRule
+from src.shopping_cart import ShoppingCart
+
+
+# ShoppingCart attributes that only read the cart and are passed through.
+# Anything else (add_many, merge, replace_product, ...) would change the
+# cart without logging an event, so it is not exposed.
+_READ_ONLY = {
+    "is_empty", "item_count", "total", "total_cents", "subtotal_cents",
+    "contains", "get_quantity", "lines", "lines_in_category", "top_lines",
+    "diff", "items", "overall_total", "original_total", "discount_amount",
+    "bulk_discounts",
+}
+
+
+class CartEvent(NamedTuple):
+    """One logged change: an operation name and its arguments."""
+
+    op: str
+    args: tuple
+
+
+class EventSourcedCart:
+    """
+    A ShoppingCart whose changes are logged and can be undone.
+
+    Reads (total, get_quantity, contains, item_count, ...) are passed
+    through to the wrapped cart; other ShoppingCart methods are not
+    available, since they would change the cart without logging.
+
+    Attributes:
+        cart (ShoppingCart): The current state
+        version (int): Number of events applied since the cart was created
+    """
+
+    def __init__(self, snapshot_every=100):
+        """Create an empty cart, snapshotting every snapshot_every events."""
+        self.cart = ShoppingCart()
+        self.version = 0
+        self._snapshot_every = snapshot_every
+        self._events = []
+        self._base = 0
+        self._snapshot_versions = [0]
+        self._snapshots = [({}, ())]
+
+    def __getattr__(self, name):
+        if name not in _READ_ONLY:
+            raise AttributeError(f"{name} is not supported on an event-sourced cart")
+        return getattr(self.cart, name)
+
+    # -------------------------------------------------------------------------
+    # Changes
+    # -------------------------------------------------------------------------
+
+    def add(self, product, quantity=1):
+        if quantity <= 0:
+            return
+        self._record(CartEvent("add", (product, quantity)))
+
+    def remove(self, product, quantity=1):
+        if not self.cart.contains(product):
+            raise ValueError("Product not in cart")
+        removed = min(self.cart.get_quantity(product), max(quantity, 0))
+        self._record(CartEvent("remove", (product, removed)))
+
+    def clear(self):
+        self._record(CartEvent("clear", (dict(self.cart._quantities),)))
+
+    def apply_discount(self, percent):
+        self.add_rule(CartPercentRule(percent))
+
+    def remove_discount(self):
+        self.remove_rule(CartPercentRule(0))
+
+    def set_bulk_discount(self, product, buy_quantity, free_quantity):
+        self.add_rule(BulkRule(product, buy_quantity, free_quantity))
+
+    def set_category_discount(self, category, percent):
+        self.add_rule(CategoryPercentRule(category, percent))
+
+    def add_rule(self, rule):
+        self._record(CartEvent("rule", (rule, self.cart.pricing.find(rule))))
+
+    def remove_rule(self, rule):
+        existing = self.cart.pricing.find(rule)
+        if existing is not None:
+            self._record(CartEvent("unrule", (existing,)))
+
+    def _record(self, event):
+        self._apply(event)
+        position = self.version - self._base
+        if position < len(self._events):
+            self._discard_redo(position)
+        self._events.append(event)
+        self.version += 1
+        if self.version % self._snapshot_every == 0:
+            self._snapshot_versions.append(self.version)
+            self._snapshots.append(self._capture())
+
+    def _discard_redo(self, position):
+        del self._events[position:]
+        keep = bisect_right(self._snapshot_versions, self.version)
+        del self._snapshot_versions[keep:]
+        del self._snapshots[keep:]
+
+    def _apply(self, event, cart=None):
+        cart = cart or self.cart
+        op, args = event
+        if op == "add":
+            cart.add(*args)
+        elif op == "remove":
+            cart.remove(*args)
+        elif op == "clear":
+            cart.clear()
+        elif op == "rule":
+            cart.add_rule(args[0])
+        elif op == "unrule":
+            cart.remove_rule(args[0])
+
+    def _apply_inverse(self, event):
+        op, args = event
+        if op == "add":
+            self.cart.remove(*args)
+        elif op == "remove":
+            self.cart.add(*args)
+        elif op == "clear":
+            self.cart.add_many(args[0].items())
+        elif op == "rule":
+            rule, previous = args
+            if previous is None:
+                self.cart.remove_rule(rule)
+            else:
+                self.cart.add_rule(previous)
+        elif op == "unrule":
+            self.cart.add_rule(args[0])
+
+    def _capture(self):
+        return (dict(self.cart._quantities), tuple(self.cart.pricing.rules))
+
+    # -------------------------------------------------------------------------
+    # Undo / redo and history
+    # -------------------------------------------------------------------------
+
+    def can_undo(self):
+        return self.version > self._base
+
+    def can_redo(self):
+        return self.version - self._base < len(self._events)
+
+    def undo(self):
+        """
+        Reverse the most recent event.
+
+        Raises:
+            IndexError: If there is nothing left to undo (or it was compacted)
+        """
+        if not self.can_undo():
+            raise IndexError("Nothing to undo")
+        self.version -= 1
+        self._apply_inverse(self._events[self.version - self._base])
+
+    def redo(self):
+        """
+        Re-apply the most recently undone event.
+
+        Raises:
+            IndexError: If there is nothing to redo
+        """
+        if not self.can_redo():
+            raise IndexError("Nothing to redo")
+        self._apply(self._events[self.version - self._base])
+        self.version += 1
+
+    def history(self):
+        """The logged events, oldest first (after any compaction)."""
+        return list(self._events)
+
+    def at_version(self, version) -> ShoppingCart:
+        """
+        Rebuild the cart as it was after `version` events.
+
+        Raises:
+            IndexError: If the version was compacted away or never existed
+        """
+        if not self._base <= version <= self._base + len(self._events):
+            raise IndexError(f"Version {version} is not in the log")
+        i = bisect_right(self._snapshot_versions, version) - 1
+        lines, rules = self._snapshots[i]
+        cart = ShoppingCart()
+        cart.add_many(lines.items())
+        for rule in rules:
+            cart.add_rule(rule)
+        start = self._snapshot_versions[i] - self._base
+        for event in self._events[start:version - self._base]:
+            self._apply(event, cart)
+        return cart
+
+    def compact(self):
+        """Drop events and snapshots older than the latest usable snapshot."""
+        i = bisect_right(self._snapshot_versions, self.version) - 1
+        keep_from = self._snapshot_versions[i]
+        del self._events[:keep_from - self._base]
+        del self._snapshot_versions[:i]
+        del self._snapshots[:i]
+        self._base = keep_from
@@ -0,0 +1,204 @@
+"""
+Cart instrumentation - opt-in call counts and latency histograms.
+
+Instrumentation is installed per cart by shadowing the measured methods
+with instance attributes. A cart without instrumentation runs the plain
+class methods, so it costs nothing when disabled.
+
+When enabled, every call is counted. Latency and cart size (distinct
+lines at call time) are recorded for a sample of calls, every Nth call
+per method, so it can stay on under load. total_cents() is the pricing
+entry point used by total(), discount_amount, checkout and replay, so
+a total() call is counted under both names. Repricing work is counted
+from the cart itself: passes that priced the cart (recomputations) and
+dirty lines flushed by any caller (repriced_lines).
+
+Stats export as a dict (to_dict) or Prometheus text format (to_prometheus).
+"""
+
+import time
+from bisect import bisect_left
+
+INSTRUMENTED_METHODS = ("add", "remove", "total", "total_cents", "apply_discount")
+
+# Upper bounds in seconds, as in Prometheus client defaults scaled to
+# in-process calls.
+DEFAULT_LATENCY_BUCKETS = (
+    1e-6, 2.5e-6, 5e-6, 1e-5, 2.5e-5, 5e-5, 1e-4, 2.5e-4, 5e-4, 1e-3, 1e-2, 0.1, 1.0,
+)
+DEFAULT_SIZE_BUCKETS = (1, 10, 100, 1_000, 10_000, 100_000, 1_000_000)
+
+
+class Histogram:
+    """Cumulative-bucket histogram in the Prometheus style."""
+
+    def __init__(self, bounds):
+        self.bounds = tuple(bounds)
+        self.counts = [0] * (len(self.bounds) + 1)
+        self.sum = 0
+        self.count = 0
+
+    def observe(self, value):
+        self.counts[bisect_left(self.bounds, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def cumulative(self):
+        """[(upper bound, observations <= bound)], ending with +Inf."""
+        running = 0
+        result = []
+        for bound, count in zip(self.bounds + (float("inf"),), self.counts):
+            running += count
+            result.append((bound, running))
+        return result
+
+    def to_dict(self):
+        return {
+            "buckets": {_label(b): n for b, n in self.cumulative()},
+            "sum": self.sum,
+            "count": self.count,
+        }
+
+
+class MethodStats:
+    """Counters and histograms for one cart method."""
+
+    def __init__(self, latency_buckets, size_buckets):
+        self.calls = 0
+        self.latency = Histogram(latency_buckets)
+        self.lines = Histogram(size_buckets)
+
+
+class CartInstrumentation:
+    """
+    Shared stats for one or more instrumented carts.
+
+    Attributes:
+        methods (dict): Method name -> MethodStats
+        recomputations (int): total_cents() calls that repriced the cart
+            rather than reusing a memoized or cached total
+        repriced_lines (int): Dirty lines repriced, by total_cents() or by
+            any other method that flushes them
+
+    Example:
+        stats = CartInstrumentation(sample_rate=0.1)
+        cart.enable_instrumentation(stats)
+        ...
+        print(stats.to_prometheus())
+    """
+
+    def __init__(self, sample_rate=1.0, latency_buckets=DEFAULT_LATENCY_BUCKETS,
+                 size_buckets=DEFAULT_SIZE_BUCKETS):
+        """
+        Args:
+            sample_rate: Fraction of calls whose latency and size are recorded
+                (0 < rate <= 1); calls are always counted
+        """
+        if not 0 < sample_rate <= 1:
+            raise ValueError("Sample rate must be in (0, 1]")
+        self.sample_every = max(1, round(1 / sample_rate))
+        self.methods = {
+            name: MethodStats(latency_buckets, size_buckets)
+            for name in INSTRUMENTED_METHODS
+        }
+        self.recomputations = 0
+        self.repriced_lines = 0
+
+    def install(self, cart):
+        """Shadow the measured methods of one cart with timing wrappers."""
+        for name in INSTRUMENTED_METHODS:
+            method = getattr(type(cart), name).__get__(cart)
+            setattr(cart, name, self._wrap(cart, name, method))
+        flush = type(cart)._flush_dirty_lines.__get__(cart)
+
+        def count_flushed():
+            self.repriced_lines += len(cart._dirty)
+            flush()
+
+        count_flushed.__wrapped__ = flush
+        cart._flush_dirty_lines = count_flushed
+
+    @staticmethod
+    def uninstall(cart):
+        """Remove the wrappers so the cart uses the plain methods again."""
+        for name in INSTRUMENTED_METHODS + ("_flush_dirty_lines",):
+            cart.__dict__.pop(name, None)
+
+    def _wrap(self, cart, name, method):
+        stats = self.methods[name]
+        sample_every = self.sample_every
+        clock = time.perf_counter
+        call = method
+        if name == "total_cents":
+            def call(*args, **kwargs):
+                before = cart.recomputations
+                try:
+                    return method(*args, **kwargs)
+                finally:
+                    self.recomputations += cart.recomputations - before
+
+        def wrapper(*args, **kwargs):
+            stats.calls += 1
+            if stats.calls % sample_every:
+                return call(*args, **kwargs)
+            stats.lines.observe(len(cart._quantities))
+            start = clock()
+            try:
+                return call(*args, **kwargs)
+            finally:
+                stats.latency.observe(clock() - start)
+
+        wrapper.__wrapped__ = method
+        return wrapper
+
+    def to_dict(self):
+        """All stats as plain data (JSON-serializable)."""
+        return {
+            "sample_every": self.sample_every,
+            "recomputations": self.recomputations,
+            "repriced_lines": self.repriced_lines,
+            "methods": {
+                name: {
+                    "calls": stats.calls,
+                    "latency_seconds": stats.latency.to_dict(),
+                    "lines_at_call": stats.lines.to_dict(),
+                }
+                for name, stats in self.methods.items()
+            },
+        }
+
+    def to_prometheus(self, prefix="cart"):
+        """All stats in the Prometheus text exposition format."""
+        out = [
+            f"# HELP {prefix}_calls_total Calls per cart method.",
+            f"# TYPE {prefix}_calls_total counter",
+        ]
+        for name, stats in self.methods.items():
+            out.append(f'{prefix}_calls_total{{method="{name}"}} {stats.calls}')
+        out += [
+            f"# HELP {prefix}_recomputations_total Cart totals priced, not reused.",
+            f"# TYPE {prefix}_recomputations_total counter",
+            f"{prefix}_recomputations_total {self.recomputations}",
+            f"# HELP {prefix}_repriced_lines_total Dirty lines repriced.",
+            f"# TYPE {prefix}_repriced_lines_total counter",
+            f"{prefix}_repriced_lines_total {self.repriced_lines}",
+        ]
+        for metric, attribute, help_text in (
+            ("call_latency_seconds", "latency", "Sampled call latency."),
+            ("lines_at_call", "lines", "Sampled distinct lines in the cart at call time."),
+        ):
+            full = f"{prefix}_{metric}"
+            out += [f"# HELP {full} {help_text}", f"# TYPE {full} histogram"]
+            for name, stats in self.methods.items():
+                histogram = getattr(stats, attribute)
+                for bound, count in histogram.cumulative():
+                    out.append(
+                        f'{full}_bucket{{method="{name}",le="{_label(bound)}"}} {count}'
+                    )
+                out.append(f'{full}_sum{{method="{name}"}} {histogram.sum}')
+                out.append(f'{full}_count{{method="{name}"}} {histogram.count}')
+        return "\n".join(out) + "\n"
+
+
+def _label(bound):
+    return "+Inf" if bound == float("inf") else repr(bound)
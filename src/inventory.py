@@ -0,0 +1,180 @@
+"""
+Inventory - stock levels with per-cart reservations.
+
+Stock is kept per SKU (by default the product name, so reservations
+survive price changes) in a fixed number of shards. Each shard has its
+own lock, so reservations for different SKUs rarely contend; a hot SKU
+only ever holds its shard's lock for a few dict operations.
+
+A reservation belongs to a holder (normally a ShoppingCart) and expires
+`ttl` seconds after it was last extended. expire() returns stock held by
+abandoned carts; it uses a per-shard heap of deadlines, so it only looks
+at reservations that are actually due.
+
+Carts created with ShoppingCart(inventory=...) reserve on add and release
+on remove, and an add that cannot be reserved fails with InsufficientStock
+before the cart changes.
+"""
+
+import heapq
+import itertools
+import threading
+import time
+
+
+class InsufficientStock(ValueError):
+    """Raised when a reservation asks for more than is available."""
+
+
+class _Shard:
+    __slots__ = ("lock", "on_hand", "reserved", "holds", "deadlines")
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.on_hand = {}       # sku -> units in stock
+        self.reserved = {}      # sku -> units reserved by all holders
+        self.holds = {}         # (sku, holder) -> [units, expires at]
+        self.deadlines = []     # heap of (expires at, seq, sku, holder)
+
+
+class Inventory:
+    """
+    Sharded stock counters with TTL-based reservations.
+
+    Example:
+        inventory = Inventory(ttl=900)
+        inventory.set_stock(apple, 10)
+        cart = ShoppingCart(inventory=inventory)
+        cart.add(apple, quantity=3)     # reserves 3
+        inventory.available(apple)      # 7
+    """
+
+    def __init__(self, shards=64, ttl=900.0, clock=time.monotonic, sku=None):
+        """
+        Args:
+            shards: Number of independently locked shards
+            ttl: Seconds a reservation lives after it was last extended
+            clock: Time source (seconds), replaceable in tests
+            sku: Function mapping a product to its SKU key (default: name)
+        """
+        self._shards = [_Shard() for _ in range(shards)]
+        self.ttl = ttl
+        self._clock = clock
+        self._sku = sku or (lambda product: product.name)
+        # Heap tie-breaker; next() on a count is atomic under the GIL.
+        self._seq = itertools.count()
+
+    def _locate(self, product):
+        sku = self._sku(product)
+        return sku, self._shards[hash(sku) % len(self._shards)]
+
+    def set_stock(self, product, quantity):
+        """Set the units on hand for a product (reservations are kept)."""
+        if quantity < 0:
+            raise ValueError("Stock cannot be negative")
+        sku, shard = self._locate(product)
+        with shard.lock:
+            shard.on_hand[sku] = quantity
+
+    def available(self, product):
+        """Units on hand that are not reserved."""
+        sku, shard = self._locate(product)
+        with shard.lock:
+            return shard.on_hand.get(sku, 0) - shard.reserved.get(sku, 0)
+
+    def reserved_by(self, product, holder):
+        """Units of product currently reserved by holder."""
+        sku, shard = self._locate(product)
+        with shard.lock:
+            hold = shard.holds.get((sku, holder))
+            return hold[0] if hold else 0
+
+    def reserve(self, product, quantity, holder):
+        """
+        Reserve units for holder and extend its deadline for this product.
+
+        Raises:
+            InsufficientStock: If fewer than quantity units are available
+        """
+        sku, shard = self._locate(product)
+        with shard.lock:
+            reserved = shard.reserved.get(sku, 0)
+            if shard.on_hand.get(sku, 0) - reserved < quantity:
+                raise InsufficientStock(f"Insufficient stock for {sku}")
+            shard.reserved[sku] = reserved + quantity
+            expires = self._clock() + self.ttl
+            hold = shard.holds.get((sku, holder))
+            if hold is None:
+                shard.holds[(sku, holder)] = [quantity, expires]
+            else:
+                hold[0] += quantity
+                hold[1] = expires
+            heapq.heappush(shard.deadlines, (expires, next(self._seq), sku, holder))
+
+    def release(self, product, quantity, holder):
+        """Return up to quantity reserved units of holder to stock."""
+        sku, shard = self._locate(product)
+        with shard.lock:
+            self._release(shard, sku, holder, quantity)
+
+    @staticmethod
+    def _release(shard, sku, holder, quantity):
+        hold = shard.holds.get((sku, holder))
+        if hold is None:
+            return 0
+        released = min(quantity, hold[0])
+        hold[0] -= released
+        if not hold[0]:
+            del shard.holds[(sku, holder)]
+        remaining = shard.reserved[sku] - released
+        if remaining:
+            shard.reserved[sku] = remaining
+        else:
+            del shard.reserved[sku]
+        return released
+
+    def commit(self, product, quantity, holder):
+        """
+        Turn reserved units into a sale: remove them from stock.
+
+        If the hold has shrunk (e.g. expire() released it), the missing
+        units are reserved again first, so a sale never takes stock that
+        is not there.
+
+        Raises:
+            InsufficientStock: If the missing units are no longer available
+        """
+        sku, shard = self._locate(product)
+        with shard.lock:
+            hold = shard.holds.get((sku, holder))
+            missing = quantity - (hold[0] if hold else 0)
+            reserved = shard.reserved.get(sku, 0)
+            if missing > 0:
+                if shard.on_hand.get(sku, 0) - reserved < missing:
+                    raise InsufficientStock(f"Insufficient stock for {sku}")
+                shard.reserved[sku] = reserved + missing
+                if hold is None:
+                    hold = shard.holds[(sku, holder)] = [0, self._clock() + self.ttl]
+                hold[0] += missing
+            sold = self._release(shard, sku, holder, quantity)
+            shard.on_hand[sku] = shard.on_hand.get(sku, 0) - sold
+
+    def expire(self):
+        """
+        Release every reservation past its deadline.
+
+        Returns:
+            The number of units returned to stock.
+        """
+        now = self._clock()
+        released = 0
+        for shard in self._shards:
+            with shard.lock:
+                deadlines = shard.deadlines
+                while deadlines and deadlines[0][0] <= now:
+                    expires, _, sku, holder = heapq.heappop(deadlines)
+                    hold = shard.holds.get((sku, holder))
+                    # Entries for holds that were extended or released are stale.
+                    if hold is not None and hold[1] == expires:
+                        released += self._release(shard, sku, holder, hold[0])
+        return released
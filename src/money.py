@@ -0,0 +1,47 @@
+"""
+Money helpers - exact fixed-point arithmetic in integer cents.
+
+Prices enter the system as dollars (int, float, str or Decimal) and are
+converted once to whole cents. Everything after that is integer math, so
+totals never drift no matter how many additions and removals happen.
+
+Rounding mode: ROUND_HALF_UP, applied only where a fraction of a cent can
+appear (converting a price, taking a percentage).
+"""
+
+from decimal import Decimal, ROUND_HALF_UP
+
+CENTS_PER_DOLLAR = 100
+
+_ONE = Decimal(1)
+
+
+def to_cents(amount) -> int:
+    """
+    Convert a dollar amount to whole cents.
+
+    Floats go through their shortest repr, so 0.1 becomes exactly 10 cents
+    rather than 10.000000000000000555 cents.
+    """
+    if isinstance(amount, int):
+        return amount * CENTS_PER_DOLLAR
+    value = Decimal(str(amount)) * CENTS_PER_DOLLAR
+    return int(value.quantize(_ONE, rounding=ROUND_HALF_UP))
+
+
+def from_cents(cents: int) -> float:
+    """Convert whole cents back to a dollar float for display."""
+    return cents / CENTS_PER_DOLLAR
+
+
+def percent_of(cents: int, percent) -> int:
+    """
+    Return percent% of a non-negative cents amount, rounded half up.
+
+    Integer percentages stay in pure integer math; fractional ones are
+    evaluated exactly with Decimal.
+    """
+    if isinstance(percent, int):
+        return (cents * percent + 50) // 100
+    value = Decimal(cents) * Decimal(str(percent)) / 100
+    return int(value.quantize(_ONE, rounding=ROUND_HALF_UP))
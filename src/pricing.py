@@ -0,0 +1,200 @@
+"""
+Pricing rules - declared once, compiled into indexes, evaluated per line.
+
+A PricingPipeline holds the active rules and keeps them indexed by what
+they apply to, so pricing a line is a couple of dict lookups no matter
+how many rules exist. Evaluation order is fixed:
+
+    per line:  BulkRule (buy X get Y free) -> CategoryPercentRule
+    per cart:  ThresholdRule (best one reached) -> CartPercentRule
+
+Each rule has a key; adding a rule with the same key as an existing one
+replaces it (e.g. a new cart percentage replaces the old one).
+"""
+
+from bisect import bisect_right
+from dataclasses import dataclass
+
+from src.money import percent_of, to_cents
+from src.product import Product
+from src.quote_cache import FINGERPRINT_MASK, digest
+
+
+def _rule_digest(rule):
+    """A keyed digest of a rule's type and fields (see src/quote_cache.py)."""
+    if isinstance(rule, BulkRule):
+        product = rule.product
+        parts = ("BulkRule", product.name, product.price_cents, product.category,
+                 rule.buy, rule.free)
+    else:
+        parts = (type(rule).__name__,) + tuple(vars(rule).values())
+    return digest(parts)
+
+
+def _check_percent(percent):
+    # Written so that NaN fails too; it would poison every later total.
+    if not 0 <= percent <= 100:
+        raise ValueError("Discount must be between 0 and 100.")
+
+
+@dataclass(frozen=True)
+class BulkRule:
+    """Buy `buy` units of product and get `free` more for free."""
+
+    product: Product
+    buy: int
+    free: int
+
+    def __post_init__(self):
+        if self.buy < 0 or self.free < 0 or self.buy + self.free == 0:
+            raise ValueError("Bulk discount quantities must be positive")
+
+    @property
+    def key(self):
+        return ("bulk", self.product)
+
+
+@dataclass(frozen=True)
+class CategoryPercentRule:
+    """Take percent off every line whose product is in category."""
+
+    category: str
+    percent: float
+
+    def __post_init__(self):
+        _check_percent(self.percent)
+
+    @property
+    def key(self):
+        return ("category", self.category)
+
+
+@dataclass(frozen=True)
+class CartPercentRule:
+    """Take percent off the whole cart (after thresholds)."""
+
+    percent: float
+
+    def __post_init__(self):
+        _check_percent(self.percent)
+
+    @property
+    def key(self):
+        return ("cart",)
+
+
+@dataclass(frozen=True)
+class ThresholdRule:
+    """Take percent off the cart once its subtotal reaches minimum dollars."""
+
+    minimum: float
+    percent: float
+
+    def __post_init__(self):
+        if not 0 <= self.minimum < float("inf"):
+            raise ValueError("Threshold must be a finite, non-negative amount")
+        _check_percent(self.percent)
+
+    @property
+    def key(self):
+        return ("threshold", to_cents(self.minimum))
+
+
+class PricingPipeline:
+    """
+    The compiled set of pricing rules for one cart.
+
+    Attributes:
+        bulk_by_product (dict): Product -> (cycle size, free units)
+        percent_by_category (dict): Category -> line percentage
+        cart_percent: Cart-wide percentage (0 if none)
+    """
+
+    def __init__(self, rules=()):
+        """Create a pipeline from an iterable of rules."""
+        self._rules = {}
+        # Order-independent digest of the active rules (sum of their digests,
+        # kept per key), updated by add/remove so quote caches key on it in O(1).
+        self.fingerprint = 0
+        self._digests = {}
+        self.bulk_by_product = {}
+        self.percent_by_category = {}
+        self.cart_percent = 0
+        self._threshold_minimums = []
+        self._threshold_percents = []
+        for rule in rules:
+            self.add(rule)
+
+    @property
+    def rules(self):
+        """The active rules in the order they were declared."""
+        return list(self._rules.values())
+
+    def add(self, rule):
+        """Add or replace a rule and update the indexes it belongs to."""
+        key = rule.key
+        rule_digest = _rule_digest(rule)
+        previous = self._digests.get(key, 0)
+        self._rules[key] = rule
+        self._digests[key] = rule_digest
+        self.fingerprint = (self.fingerprint + rule_digest - previous) & FINGERPRINT_MASK
+        self._index(rule, present=True)
+
+    def find(self, rule):
+        """Return the active rule with the same key as rule, or None."""
+        return self._rules.get(rule.key)
+
+    def remove(self, rule):
+        """Remove the rule with the same key as rule, if there is one."""
+        existing = self._rules.pop(rule.key, None)
+        if existing is not None:
+            previous = self._digests.pop(rule.key)
+            self.fingerprint = (self.fingerprint - previous) & FINGERPRINT_MASK
+            self._index(existing, present=False)
+
+    def _index(self, rule, present):
+        if isinstance(rule, BulkRule):
+            if present:
+                self.bulk_by_product[rule.product] = (rule.buy + rule.free, rule.free)
+            else:
+                del self.bulk_by_product[rule.product]
+        elif isinstance(rule, CategoryPercentRule):
+            if present:
+                self.percent_by_category[rule.category] = rule.percent
+            else:
+                del self.percent_by_category[rule.category]
+        elif isinstance(rule, CartPercentRule):
+            self.cart_percent = rule.percent if present else 0
+        elif isinstance(rule, ThresholdRule):
+            thresholds = sorted(
+                (r.key[1], r.percent)
+                for r in self._rules.values()
+                if isinstance(r, ThresholdRule)
+            )
+            self._threshold_minimums = [m for m, _ in thresholds]
+            self._threshold_percents = [p for _, p in thresholds]
+        else:
+            raise TypeError(f"Unknown pricing rule: {rule!r}")
+
+    def line_total(self, product, qty):
+        """Price in cents of qty units of product after line-level rules."""
+        bulk = self.bulk_by_product.get(product)
+        if bulk is None:
+            total = product.price_cents * qty
+        else:
+            cycle_size, free = bulk
+            total = product.price_cents * (qty - (qty // cycle_size) * free)
+        percent = self.percent_by_category.get(product.category)
+        if percent:
+            total -= percent_of(total, percent)
+        return total
+
+    def cart_total(self, subtotal):
+        """Apply the cart-level rules to a subtotal of line totals, in cents."""
+        total = subtotal
+        i = bisect_right(self._threshold_minimums, subtotal)
+        if i:
+            total -= percent_of(total, self._threshold_percents[i - 1])
+        if self.cart_percent:
+            total -= percent_of(total, self.cart_percent)
+        return total
@@ -5,16 +5,30 @@ This class was developed using TDD. See tests/test_product.py for the tests
 that drove this implementation.
 """
 
+import math
+from decimal import Decimal, InvalidOperation
+
+from src.money import to_cents
+
 
 class Product:
     """
     Represents a product that can be added to a shopping cart.
+
+    Products are immutable and slotted: there is no per-instance __dict__,
+    and the hash is computed once at creation since name and price can no
+    longer change. Equality and the hash use the name and price_cents, so
+    prices beyond float precision stay distinct. Use src.catalog.ProductCatalog to share one instance per
+    distinct product.
     
     Attributes:
         name (str): The name of the product
         price (float): The price of the product (must be non-negative)
+        price_cents (int): The price in whole cents, used for all arithmetic
         category (str): Optional category for discount purposes
     """
+
+    __slots__ = ("name", "price", "price_cents", "category", "_hash")
     
     def __init__(self, name: str, price: float, category: str = "general"):
         """
@@ -26,24 +40,74 @@ class Product:
             category: Optional category (default: "general")
             
         Raises:
-            ValueError: If price is negative or name is empty
+            ValueError: If price is negative, not finite, too large to
+                express in cents, or name is empty
         """
         if not name or not name.strip():
             raise ValueError("Product name cannot be empty")
         if price < 0:
             raise ValueError("Price cannot be negative")
         
-        self.name = name.strip()
-        self.price = float(price)
-        self.category = category
+        name = name.strip()
+        price_float = float(price)
+        if not math.isfinite(price_float):
+            raise ValueError("Price must be a finite number")
+        try:
+            price_cents = to_cents(price)
+        except InvalidOperation:
+            raise ValueError("Price is too large") from None
+        _set = object.__setattr__
+        _set(self, "name", name)
+        _set(self, "price", price_float)
+        _set(self, "price_cents", price_cents)
+        _set(self, "category", category)
+        _set(self, "_hash", hash((name, price_cents)))
+
+    @classmethod
+    def from_cents(cls, name: str, price_cents: int, category: str = "general"):
+        """
+        Create a product from a price already expressed in whole cents.
+
+        The price is passed on as an exact Decimal, so price_cents equals
+        the given cents even beyond float precision (2**53 cents).
+        """
+        if price_cents < 0:
+            raise ValueError("Price cannot be negative")
+        return cls(name, Decimal(price_cents) / 100, category)
     
+    def __setattr__(self, name, value):
+        raise AttributeError("Product is immutable")
+
+    def __delattr__(self, name):
+        raise AttributeError("Product is immutable")
+
+    def __reduce__(self):
+        # The exact cents travel with the original price, which may be finer
+        # than a cent (1.005) or coarser than the cents (beyond 2**53).
+        return (_restore, (self.__class__, self.name, self.price,
+                           self.price_cents, self.category))
+
     def __repr__(self):
         return f"Product('{self.name}', ${self.price:.2f})"
     
     def __eq__(self, other):
+        if self is other:
+            return True
         if not isinstance(other, Product):
             return False
-        return self.name == other.name and self.price == other.price
+        return self.name == other.name and self.price_cents == other.price_cents
     
     def __hash__(self):
-        return hash((self.name, self.price))
+        return self._hash
+
+
+def _restore(cls, name, price, price_cents, category):
+    """Rebuild a pickled or copied Product without re-validating it."""
+    product = object.__new__(cls)
+    _set = object.__setattr__
+    _set(product, "name", name)
+    _set(product, "price", price)
+    _set(product, "price_cents", price_cents)
+    _set(product, "category", category)
+    _set(product, "_hash", hash((name, price_cents)))
+    return product
@@ -0,0 +1,116 @@
+"""
+Quote cache - share computed totals between carts with identical contents.
+
+Carts built from the same promo bundle or subscription box end up with the
+same lines and rules. QuoteCache maps a fingerprint of a cart's pricing
+inputs to its total in cents. Carts created with
+ShoppingCart(quote_cache=cache) consult it transparently in total().
+
+The fingerprint is order-independent and costs O(1) to read: each cart
+keeps a running sum over its lines of salt * quantity, where a product's
+salt is a 128-bit BLAKE2b digest of its (name, price, category) keyed by a
+per-process random secret, updated as lines change. Its PricingPipeline
+keeps a sum of the same digests of its rules. Because prices and rules are
+part of the key, a price change or a new bulk rule simply misses.
+
+Two different carts share a key only if the salts cancel out, which with
+independent random salts is about as likely as a random 128-bit match.
+hash() would not do: tuple hashes are close to linear in their last
+element with the same factor for every line, so moving units between two
+lines left a sum of hash() values unchanged and served another cart's
+total.
+
+The cache holds at most maxsize entries and evicts the least recently used.
+"""
+
+import hashlib
+import os
+from collections import OrderedDict
+from functools import lru_cache
+
+FINGERPRINT_MASK = (1 << 128) - 1
+_DIGEST_KEY = os.urandom(16)
+
+
+@lru_cache(maxsize=1 << 16)
+def digest(parts):
+    """A keyed 128-bit digest of a tuple of str/int/float parts (cached)."""
+    data = repr(parts).encode("utf-8", "surrogatepass")
+    return int.from_bytes(
+        hashlib.blake2b(data, digest_size=16, key=_DIGEST_KEY).digest(), "big")
+
+
+def line_fingerprint(fingerprint, product, previous, qty):
+    """Update a running lines fingerprint for a line going previous -> qty."""
+    # Odd, so no single line's quantity change can wrap back to zero.
+    salt = digest((product.name, product.price_cents, product.category)) | 1
+    return (fingerprint + salt * (qty - previous)) & FINGERPRINT_MASK
+
+
+class QuoteCache:
+    """
+    A bounded LRU cache of cart totals keyed by cart fingerprint.
+
+    Attributes:
+        hits (int): Lookups answered from the cache
+        misses (int): Lookups that had to price the cart
+        evictions (int): Entries dropped to stay within maxsize
+    """
+
+    def __init__(self, maxsize=1024):
+        """Create an empty cache holding at most maxsize quotes."""
+        if maxsize < 1:
+            raise ValueError("Cache size must be at least 1")
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries = OrderedDict()
+
+    @staticmethod
+    def fingerprint(cart):
+        """The order-independent key for a cart's pricing inputs, in O(1)."""
+        pricing = cart.pricing
+        return (cart._lines_fingerprint, len(cart._quantities), cart._unit_count,
+                pricing.fingerprint, len(pricing._rules))
+
+    def get(self, key):
+        """Return the cached total for key (or None), updating recency."""
+        total = self._entries.get(key)
+        if total is None:
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return total
+
+    def put(self, key, total_cents):
+        """Store a total, evicting the least recently used entry if full."""
+        if key in self._entries:
+            self._entries.move_to_end(key)
+        self._entries[key] = total_cents
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def clear(self):
+        """
+        Drop every entry (counters are kept).
+
+        Keys are digests, so quotes cannot be dropped per product. Since
+        prices are part of the key this is only needed to free memory early,
+        e.g. when a catalog retires an old price.
+        """
+        self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def stats(self):
+        """Counters as a dict."""
+        return {
+            "size": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+        }
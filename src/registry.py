@@ -0,0 +1,289 @@
+"""
+Cart registry - one ShoppingCart per session with bounded memory.
+
+CartRegistry keeps carts in an OrderedDict in least-recently-used order.
+Each resident cart is charged an estimated size of CART_BYTES plus
+LINE_BYTES per distinct line, re-estimated whenever the cart is accessed.
+A cart is evicted when it has been idle for longer than `ttl`, or, oldest
+first, when the resident total exceeds `memory_budget`.
+
+With a store, evicted carts are spilled rather than dropped and are
+loaded back the next time their session asks for them. A store is any
+object with save(session_id, cart), load(session_id, cart) -> cart or
+None (filling the given empty cart) and discard(session_id);
+DirectoryStore keeps one snapshot file per session. Reloaded carts are
+built by the registry's cart_factory, so they keep its inventory and
+quote cache. An evicted cart's stock reservations are released; a
+reloaded one takes them again for whatever is still in stock, and lines
+sold out in the meantime are cut down (counted in unreserved_units). A
+cart whose save fails stays resident and is retried later.
+"""
+
+import hashlib
+import os
+import time
+from collections import OrderedDict
+
+from src.instrumentation import DEFAULT_LATENCY_BUCKETS, Histogram
+from src.inventory import InsufficientStock
+from src.shopping_cart import ShoppingCart
+from src.snapshot import dumps, loads
+
+# Rough CPython costs: an empty cart with its dicts and pipeline, and one
+# more entry in each per-line dict (quantities, line totals, category index).
+CART_BYTES = 2_048
+LINE_BYTES = 320
+
+
+def estimate_size(cart):
+    """Estimated resident bytes for a cart, from its distinct lines."""
+    return CART_BYTES + LINE_BYTES * len(cart._quantities)
+
+
+class DirectoryStore:
+    """Spill store writing one snapshot file per session into a directory."""
+
+    def __init__(self, path, catalog):
+        """
+        Args:
+            path: Directory for the snapshot files (created if missing)
+            catalog: Catalog used to encode and decode products
+        """
+        self.path = path
+        self.catalog = catalog
+        os.makedirs(path, exist_ok=True)
+
+    def _file(self, session_id):
+        digest = hashlib.sha1(str(session_id).encode("utf-8")).hexdigest()
+        return os.path.join(self.path, digest + ".cart")
+
+    def save(self, session_id, cart):
+        data = dumps(cart, self.catalog)
+        path = self._file(session_id)
+        tmp = path + ".tmp"
+        with open(tmp, "wb") as f:
+            f.write(data)
+        os.replace(tmp, path)
+
+    def load(self, session_id, cart=None):
+        try:
+            with open(self._file(session_id), "rb") as f:
+                data = f.read()
+        except FileNotFoundError:
+            return None
+        return loads(data, self.catalog, cart)
+
+    def discard(self, session_id):
+        try:
+            os.remove(self._file(session_id))
+        except FileNotFoundError:
+            pass
+
+
+class CartRegistry:
+    """
+    Session id -> ShoppingCart with TTL and memory-budget eviction.
+
+    Example:
+        registry = CartRegistry(memory_budget=64 * 1024 * 1024, ttl=1800,
+                                store=DirectoryStore("carts", catalog))
+        cart = registry.get(session_id)     # created, resident or reloaded
+        cart.add(apple)
+    """
+
+    def __init__(self, memory_budget=64 * 1024 * 1024, ttl=1800.0, store=None,
+                 clock=time.monotonic, cart_factory=ShoppingCart,
+                 latency_buckets=DEFAULT_LATENCY_BUCKETS):
+        """
+        Args:
+            memory_budget: Estimated bytes the resident carts may use
+            ttl: Seconds of inactivity after which a cart is evicted
+            store: Optional spill store; without one evicted carts are dropped
+            clock: Time source (seconds), replaceable in tests
+            cart_factory: Called with no arguments to create a new cart
+            latency_buckets: Histogram bounds for store reloads, in seconds
+        """
+        if memory_budget <= 0:
+            raise ValueError("Memory budget must be positive")
+        self.memory_budget = memory_budget
+        self.ttl = ttl
+        self.store = store
+        self._clock = clock
+        self._cart_factory = cart_factory
+        # session id -> [cart, last access, estimated size], oldest first.
+        self._resident = OrderedDict()
+        self.resident_bytes = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.spills = 0
+        self.spill_errors = 0
+        self.reloads = 0
+        self.unreserved_units = 0
+        self.reload_latency = Histogram(latency_buckets)
+
+    def __len__(self):
+        return len(self._resident)
+
+    def __contains__(self, session_id):
+        return session_id in self._resident
+
+    def get(self, session_id, create=True):
+        """
+        Return the session's cart, reloading it from the store if spilled.
+
+        Args:
+            session_id: Session key
+            create: Create an empty cart when the session has none
+
+        Returns:
+            The cart, or None if there is none and create is False.
+        """
+        now = self._clock()
+        self.evict_expired(now)
+        entry = self._resident.get(session_id)
+        if entry is not None:
+            self._resident.move_to_end(session_id)
+            entry[1] = now
+            self._resize(entry)
+        else:
+            cart = self._reload(session_id)
+            if cart is None:
+                if not create:
+                    return None
+                cart = self._cart_factory()
+            entry = [cart, now, estimate_size(cart)]
+            self._resident[session_id] = entry
+            self.resident_bytes += entry[2]
+        self._enforce_budget(session_id)
+        return entry[0]
+
+    def put(self, session_id, cart):
+        """Register a cart for a session, replacing any existing one."""
+        self.discard(session_id)
+        entry = [cart, self._clock(), estimate_size(cart)]
+        self._resident[session_id] = entry
+        self.resident_bytes += entry[2]
+        self._enforce_budget(session_id)
+
+    def discard(self, session_id):
+        """Forget a session's cart, in memory and in the store."""
+        entry = self._resident.pop(session_id, None)
+        if entry is not None:
+            self.resident_bytes -= entry[2]
+        if self.store is not None:
+            self.store.discard(session_id)
+
+    def evict_expired(self, now=None):
+        """
+        Evict every cart idle for longer than the TTL.
+
+        Returns:
+            The number of carts evicted.
+        """
+        if now is None:
+            now = self._clock()
+        evicted = 0
+        # Access order is time order, so expired carts are all at the front.
+        while self._resident:
+            session_id, entry = next(iter(self._resident.items()))
+            if now - entry[1] < self.ttl:
+                break
+            if self._evict(session_id):
+                evicted += 1
+            else:
+                # Keep it and try again once another TTL has passed.
+                entry[1] = now
+                self._resident.move_to_end(session_id)
+        self.expirations += evicted
+        return evicted
+
+    def metrics(self):
+        """Registry counters as a plain dict."""
+        return {
+            "resident_carts": len(self._resident),
+            "resident_bytes": self.resident_bytes,
+            "memory_budget": self.memory_budget,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+            "spills": self.spills,
+            "spill_errors": self.spill_errors,
+            "reloads": self.reloads,
+            "unreserved_units": self.unreserved_units,
+            "reload_latency": self.reload_latency.to_dict(),
+        }
+
+    def _resize(self, entry):
+        size = estimate_size(entry[0])
+        self.resident_bytes += size - entry[2]
+        entry[2] = size
+
+    def _enforce_budget(self, keep):
+        # keep is the cart being handed out; it is never evicted. Each other
+        # cart is tried at most once, so failed spills cannot loop forever.
+        attempts = len(self._resident) - 1
+        while self.resident_bytes > self.memory_budget and attempts > 0:
+            attempts -= 1
+            session_id, entry = next(iter(self._resident.items()))
+            if session_id == keep:
+                self._resident.move_to_end(session_id)
+                session_id, entry = next(iter(self._resident.items()))
+            # Its lines may have changed since it was last measured.
+            self._resize(entry)
+            if not self._evict(session_id):
+                self._resident.move_to_end(session_id)
+        self._resident.move_to_end(keep)
+
+    def _evict(self, session_id):
+        """Spill (if there is a store) and drop a cart; False if the save failed."""
+        cart, _, size = self._resident[session_id]
+        if self.store is not None:
+            try:
+                self.store.save(session_id, cart)
+            except Exception:
+                self.spill_errors += 1
+                return False
+            self.spills += 1
+        # The cart is gone from memory; a reload reserves its stock again.
+        cart._release_all(cart._quantities)
+        del self._resident[session_id]
+        self.resident_bytes -= size
+        self.evictions += 1
+        return True
+
+    def _reload(self, session_id):
+        if self.store is None:
+            return None
+        start = time.perf_counter()
+        cart = self._cart_factory()
+        # Load without reserving, then reserve only what is still in stock.
+        inventory, cart.inventory = cart.inventory, None
+        loaded = self.store.load(session_id, cart)
+        cart.inventory = inventory
+        if loaded is None:
+            return None
+        if inventory is not None:
+            self._reserve_reloaded(cart, inventory)
+        self.reloads += 1
+        self.reload_latency.observe(time.perf_counter() - start)
+        return cart
+
+    def _reserve_reloaded(self, cart, inventory):
+        """Reserve a reloaded cart's lines, dropping units no longer in stock."""
+        shortfall = {}
+        for product, qty in cart._quantities.items():
+            while True:
+                take = max(0, min(qty, inventory.available(product)))
+                if not take:
+                    break
+                try:
+                    inventory.reserve(product, take, cart)
+                    break
+                except InsufficientStock:
+                    continue        # sold concurrently; look again
+            if take < qty:
+                shortfall[product] = qty - take
+        if shortfall:
+            cart.inventory = None
+            cart.remove_many(shortfall.items())
+            cart.inventory = inventory
+            self.unreserved_units += sum(shortfall.values())
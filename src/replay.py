@@ -0,0 +1,199 @@
+"""
+Streaming replay of cart-operation logs.
+
+A log is JSON Lines, one event per line:
+
+    {"cart": "c1", "op": "add", "product": 12, "qty": 3}
+    {"cart": "c1", "op": "remove", "product": 12, "qty": 1}
+    {"cart": "c1", "op": "discount", "percent": 10}
+    {"cart": "c1", "op": "remove_discount"}
+    {"cart": "c1", "op": "bulk", "product": 12, "buy": 2, "free": 1}
+    {"cart": "c1", "op": "checkout"}
+
+Products are catalog ids. The replay is a chain of generators, so only
+one chunk of the file and the currently open carts are in memory at any
+time. A cart is finished, written out and dropped at its "checkout"
+event. Carts still open at the end of the log are written with status
+"open". If more than max_open_carts are open at once, the least recently
+used one is written with status "evicted" and dropped. Its id is
+remembered (ids only, not carts): if the log mentions it again, the new
+cart holds only the later events, so it is written with status "partial"
+however it ends and counted in ReplayStats.partial_carts.
+
+Cart ids must be strings or integers; other events count as errors.
+
+Run from the repository root:
+    python -m src.replay events.jsonl totals.jsonl --catalog products.csv
+"""
+
+import argparse
+import json
+import time
+from collections import OrderedDict
+
+from src.catalog import ColumnarCatalog
+from src.shopping_cart import ShoppingCart
+
+
+class ReplayStats:
+    """Counters for one replay run."""
+
+    def __init__(self):
+        self.events = 0
+        self.errors = 0
+        self.carts = 0
+        self.partial_carts = 0
+        self.started = time.perf_counter()
+        self.elapsed = 0.0
+
+    @property
+    def events_per_second(self):
+        return self.events / self.elapsed if self.elapsed else 0.0
+
+    def __repr__(self):
+        return (
+            f"ReplayStats(events={self.events}, errors={self.errors}, "
+            f"carts={self.carts}, partial_carts={self.partial_carts}, "
+            f"{self.events_per_second:,.0f} events/sec)"
+        )
+
+
+def read_lines(f, chunk_size=1 << 16):
+    """Yield complete lines from a text file, reading chunk_size at a time."""
+    pending = ""
+    while chunk := f.read(chunk_size):
+        lines = (pending + chunk).split("\n")
+        pending = lines.pop()
+        yield from lines
+    if pending:
+        yield pending
+
+
+def parse_events(lines, stats):
+    """Yield event dicts, counting lines that are not valid events as errors."""
+    for line in lines:
+        if not line.strip():
+            continue
+        try:
+            event = json.loads(line)
+        except json.JSONDecodeError:
+            stats.errors += 1
+            continue
+        if not isinstance(event, dict) or "cart" not in event or "op" not in event:
+            stats.errors += 1
+            continue
+        if not isinstance(event["cart"], (str, int)) or isinstance(event["cart"], bool):
+            stats.errors += 1
+            continue
+        yield event
+
+
+def replay(events, catalog, stats, max_open_carts=None):
+    """
+    Apply events to carts and yield (cart id, cart, status) as carts finish.
+
+    Args:
+        events: Iterable of event dicts (see module docstring)
+        catalog: Any catalog with product(id)
+        stats: ReplayStats to update
+        max_open_carts: Upper bound on carts held in memory (None: no bound)
+    """
+    open_carts = OrderedDict()
+    evicted_ids = set()
+
+    def finish(cart_id, cart, status):
+        stats.carts += 1
+        if cart_id in evicted_ids:
+            stats.partial_carts += 1
+            status = "partial"
+        return cart_id, cart, status
+
+    for event in events:
+        stats.events += 1
+        cart_id = event["cart"]
+        cart = open_carts.get(cart_id)
+        if cart is None:
+            cart = open_carts[cart_id] = ShoppingCart()
+            if max_open_carts is not None and len(open_carts) > max_open_carts:
+                evicted_id, evicted = open_carts.popitem(last=False)
+                yield finish(evicted_id, evicted, "evicted")
+                evicted_ids.add(evicted_id)
+        else:
+            open_carts.move_to_end(cart_id)
+
+        if event["op"] == "checkout":
+            del open_carts[cart_id]
+            yield finish(cart_id, cart, "checkout")
+            continue
+        try:
+            _apply(cart, event, catalog)
+        except (ValueError, KeyError, IndexError, TypeError):
+            stats.errors += 1
+
+    for cart_id, cart in open_carts.items():
+        yield finish(cart_id, cart, "open")
+
+
+def _apply(cart, event, catalog):
+    op = event["op"]
+    if op == "add":
+        cart.add(catalog.product(event["product"]), event.get("qty", 1))
+    elif op == "remove":
+        cart.remove(catalog.product(event["product"]), event.get("qty", 1))
+    elif op == "discount":
+        cart.apply_discount(event["percent"])
+    elif op == "remove_discount":
+        cart.remove_discount()
+    elif op == "bulk":
+        cart.set_bulk_discount(
+            catalog.product(event["product"]), event["buy"], event["free"]
+        )
+    else:
+        raise ValueError(f"Unknown op {op!r}")
+
+
+def write_totals(finished, out):
+    """Write one JSON line per finished cart as soon as it is produced."""
+    for cart_id, cart, status in finished:
+        cents = cart.total_cents()
+        record = {
+            "cart": cart_id,
+            "total": cart.total(),
+            "total_cents": cents,
+            "status": status,
+        }
+        out.write(json.dumps(record) + "\n")
+
+
+def replay_file(log_path, out_path, catalog, chunk_size=1 << 16, max_open_carts=None):
+    """
+    Replay a JSONL log file into a JSONL file of cart totals.
+
+    Returns:
+        The ReplayStats of the run.
+    """
+    stats = ReplayStats()
+    with open(log_path, encoding="utf-8") as log, open(out_path, "w") as out:
+        events = parse_events(read_lines(log, chunk_size), stats)
+        write_totals(replay(events, catalog, stats, max_open_carts), out)
+    stats.elapsed = time.perf_counter() - stats.started
+    return stats
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Replay a cart event log.")
+    parser.add_argument("log", help="JSONL file of cart events")
+    parser.add_argument("output", help="JSONL file to write cart totals to")
+    parser.add_argument("--catalog", required=True, help="product CSV (see ColumnarCatalog)")
+    parser.add_argument("--max-open-carts", type=int)
+    args = parser.parse_args(argv)
+
+    catalog, errors = ColumnarCatalog.load_csv(args.catalog)
+    if errors:
+        print(f"{len(errors)} catalog rows rejected")
+    stats = replay_file(args.log, args.output, catalog, max_open_carts=args.max_open_carts)
+    print(stats)
+
+
+if __name__ == "__main__":
+    main()
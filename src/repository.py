@@ -0,0 +1,400 @@
+"""
+Cart repository - persist carts to SQLite with write-behind batching.
+
+Carts live in memory while in use. Mutations made through the repository
+are applied to the in-memory cart right away and only remembered as
+"this line / these rules changed". A background writer thread then writes
+every changed line in one transaction, once batch_size changes are pending
+or flush_interval seconds have passed, so many add/remove calls on the
+same line become a single upsert and callers never wait on disk I/O.
+flush() writes synchronously; batch_size=1 disables the writer and writes
+every change in the calling thread.
+
+The repository lock only guards the in-memory state. Loads and writes run
+outside it on pooled connections, so reads of carts not yet in memory
+proceed while a batch is being written.
+
+Schema (one row per cart line and per rule):
+    carts(cart_id)
+    cart_lines(cart_id, product_id, quantity)
+    cart_bulk_discounts(cart_id, product_id, buy, free)
+    cart_discounts(cart_id, kind, target, percent)
+        kind is "cart", "category" or "threshold"; target is the category
+        or the threshold in cents. Percentages are stored as decimal text.
+
+Products are stored as catalog ids (see src/catalog.py).
+"""
+
+import queue
+import sqlite3
+import threading
+from contextlib import contextmanager
+
+from src.pricing import BulkRule, CartPercentRule, CategoryPercentRule, ThresholdRule
+from src.shopping_cart import ShoppingCart
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS carts (
+    cart_id TEXT PRIMARY KEY
+);
+CREATE TABLE IF NOT EXISTS cart_lines (
+    cart_id TEXT NOT NULL REFERENCES carts(cart_id),
+    product_id INTEGER NOT NULL,
+    quantity INTEGER NOT NULL CHECK (quantity > 0),
+    PRIMARY KEY (cart_id, product_id)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS cart_bulk_discounts (
+    cart_id TEXT NOT NULL REFERENCES carts(cart_id),
+    product_id INTEGER NOT NULL,
+    buy INTEGER NOT NULL,
+    free INTEGER NOT NULL,
+    PRIMARY KEY (cart_id, product_id)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS cart_discounts (
+    cart_id TEXT NOT NULL REFERENCES carts(cart_id),
+    kind TEXT NOT NULL,
+    target TEXT NOT NULL,
+    percent TEXT NOT NULL,
+    PRIMARY KEY (cart_id, kind, target)
+) WITHOUT ROWID;
+"""
+
+_LOAD_CART = """
+SELECT 'line', product_id, quantity, NULL, NULL FROM cart_lines WHERE cart_id = ?
+UNION ALL
+SELECT 'bulk', product_id, buy, free, NULL FROM cart_bulk_discounts WHERE cart_id = ?
+UNION ALL
+SELECT kind, NULL, NULL, target, percent FROM cart_discounts WHERE cart_id = ?
+"""
+
+
+class ConnectionPool:
+    """A fixed-size pool of SQLite connections to one database file."""
+
+    def __init__(self, path, size=4):
+        """Open size connections to the database at path."""
+        self._connections = queue.Queue()
+        self._all = []
+        for _ in range(size):
+            connection = sqlite3.connect(path, check_same_thread=False)
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("PRAGMA synchronous=NORMAL")
+            self._all.append(connection)
+            self._connections.put(connection)
+
+    @contextmanager
+    def connection(self):
+        """Borrow a connection, returning it to the pool afterwards."""
+        connection = self._connections.get()
+        try:
+            yield connection
+        finally:
+            self._connections.put(connection)
+
+    def close(self):
+        """Close every connection in the pool."""
+        for connection in self._all:
+            connection.close()
+
+
+class CartRepository:
+    """
+    SQLite-backed storage for carts, with write-behind batching.
+
+    Example:
+        repo = CartRepository("carts.db", catalog)
+        repo.add("alice", apple, 3)
+        repo.apply_discount("alice", 10)
+        repo.flush()
+    """
+
+    def __init__(self, path, catalog, batch_size=500, pool_size=4, flush_interval=1.0):
+        """
+        Open (and if needed create) the database at path.
+
+        Args:
+            path: SQLite database file
+            catalog: Any catalog with id_of(product) and product(id)
+            batch_size: Wake the writer after this many pending changes;
+                1 writes every change immediately, in the caller
+            pool_size: Number of pooled connections
+            flush_interval: Seconds after which the writer flushes whatever
+                is pending, however few changes that is
+        """
+        self._catalog = catalog
+        self._batch_size = batch_size
+        self._flush_interval = flush_interval
+        self._pool = ConnectionPool(path, pool_size)
+        self._lock = threading.RLock()
+        # Serializes flushes so batches reach the database in snapshot order.
+        self._flush_lock = threading.Lock()
+        self._carts = {}
+        self._evictions = 0
+        self._dirty_lines = set()
+        self._dirty_rules = set()
+        self._pending = 0
+        self.flush_errors = 0
+        self.dropped_rows = 0
+        with self._pool.connection() as connection:
+            connection.executescript(SCHEMA)
+        self._closed = False
+        self._wakeup = threading.Event()
+        self._writer = None
+        if batch_size > 1:
+            self._writer = threading.Thread(
+                target=self._write_behind, name="cart-repository-writer", daemon=True
+            )
+            self._writer.start()
+
+    # -------------------------------------------------------------------------
+    # Reading
+    # -------------------------------------------------------------------------
+
+    def get(self, cart_id) -> ShoppingCart:
+        """Return the in-memory cart for cart_id, loading it on first use."""
+        while True:
+            with self._lock:
+                cart = self._carts.get(cart_id)
+                if cart is not None:
+                    return cart
+                evictions = self._evictions
+            cart = self._load(cart_id)
+            with self._lock:
+                # An evict() while loading may mean we read a stale row set.
+                if self._evictions == evictions:
+                    return self._carts.setdefault(cart_id, cart)
+
+    def _load(self, cart_id):
+        """Build a cart from its lines and rules, fetched in one query."""
+        with self._pool.connection() as connection:
+            rows = connection.execute(_LOAD_CART, (cart_id,) * 3).fetchall()
+        product = self._catalog.product
+        lines = []
+        rules = []
+        for kind, product_id, first, target, percent in rows:
+            if kind == "line":
+                lines.append((product(product_id), first))
+            elif kind == "bulk":
+                rules.append(BulkRule(product(product_id), first, int(target)))
+            elif kind == "cart":
+                rules.append(CartPercentRule(_parse_percent(percent)))
+            elif kind == "category":
+                rules.append(CategoryPercentRule(target, _parse_percent(percent)))
+            elif kind == "threshold":
+                rules.append(ThresholdRule(int(target) / 100, _parse_percent(percent)))
+        cart = ShoppingCart()
+        cart.add_many(lines)
+        for rule in rules:
+            cart.add_rule(rule)
+        return cart
+
+    # -------------------------------------------------------------------------
+    # Mutations (applied now, written on flush)
+    #
+    # Products are looked up in the catalog before the cart is touched, so
+    # a product that could never be written raises ValueError up front
+    # instead of failing a later flush.
+    # -------------------------------------------------------------------------
+
+    def add(self, cart_id, product, quantity=1):
+        self._catalog.id_of(product)
+        self._mutate(cart_id, lambda cart: cart.add(product, quantity),
+                     lines=(product,))
+
+    def remove(self, cart_id, product, quantity=1):
+        self._catalog.id_of(product)
+        self._mutate(cart_id, lambda cart: cart.remove(product, quantity),
+                     lines=(product,))
+
+    def apply_discount(self, cart_id, percent):
+        self.add_rule(cart_id, CartPercentRule(percent))
+
+    def remove_discount(self, cart_id):
+        self.remove_rule(cart_id, CartPercentRule(0))
+
+    def set_bulk_discount(self, cart_id, product, buy_quantity, free_quantity):
+        self.add_rule(cart_id, BulkRule(product, buy_quantity, free_quantity))
+
+    def add_rule(self, cart_id, rule):
+        if isinstance(rule, BulkRule):
+            self._catalog.id_of(rule.product)
+        self._mutate(cart_id, lambda cart: cart.add_rule(rule), rules=True)
+
+    def remove_rule(self, cart_id, rule):
+        self._mutate(cart_id, lambda cart: cart.remove_rule(rule), rules=True)
+
+    def _mutate(self, cart_id, change, lines=(), rules=False):
+        """Apply change to the resident cart and mark what it touched dirty."""
+        while True:
+            cart = self.get(cart_id)
+            with self._lock:
+                if self._carts.get(cart_id) is not cart:
+                    continue        # evicted since get(); load it again
+                change(cart)
+                for product in lines:
+                    self._dirty_lines.add((cart_id, product))
+                if rules:
+                    self._dirty_rules.add(cart_id)
+                self._pending += 1
+                due = self._pending >= self._batch_size
+                break
+        if due:
+            if self._writer is None:
+                self.flush()
+            else:
+                self._wakeup.set()
+
+    # -------------------------------------------------------------------------
+    # Writing
+    # -------------------------------------------------------------------------
+
+    def flush(self):
+        """Write every pending change in a single transaction, now."""
+        with self._flush_lock:
+            with self._lock:
+                if not self._pending:
+                    return
+                dirty_lines, dirty_rules = self._dirty_lines, self._dirty_rules
+                self._dirty_lines, self._dirty_rules = set(), set()
+                pending, self._pending = self._pending, 0
+                try:
+                    batch = self._snapshot(dirty_lines, dirty_rules)
+                except Exception:
+                    self._restore(dirty_lines, dirty_rules, pending)
+                    raise
+            try:
+                self._write(*batch)
+            except Exception:
+                # Keep the changes pending; the next flush retries them.
+                with self._lock:
+                    self._restore(dirty_lines, dirty_rules, pending)
+                raise
+
+    def _restore(self, dirty_lines, dirty_rules, pending):
+        self._dirty_lines |= dirty_lines
+        self._dirty_rules |= dirty_rules
+        self._pending += pending
+
+    def _write_behind(self):
+        """Writer thread: flush when woken by a full batch or on the interval."""
+        while not self._closed:
+            self._wakeup.wait(self._flush_interval)
+            self._wakeup.clear()
+            try:
+                self.flush()
+            except Exception:
+                self.flush_errors += 1
+
+    def _snapshot(self, dirty_lines, dirty_rules):
+        """
+        Rows to write for the dirty lines and rules (called under the lock).
+
+        A line or bulk rule whose product has no catalog id (e.g. the catalog
+        was swapped underneath a resident cart) is skipped and counted in
+        dropped_rows rather than failing the batch for every other cart.
+        """
+        touched = {cart_id for cart_id, _ in dirty_lines} | dirty_rules
+        upserts = []
+        deletes = []
+        for cart_id, product in dirty_lines:
+            product_id = self._product_id(product)
+            if product_id is None:
+                continue
+            qty = self._carts[cart_id].get_quantity(product)
+            if qty:
+                upserts.append((cart_id, product_id, qty))
+            else:
+                deletes.append((cart_id, product_id))
+        bulk_rows = []
+        discount_rows = []
+        for cart_id in dirty_rules:
+            for rule in self._carts[cart_id].pricing.rules:
+                if isinstance(rule, BulkRule):
+                    product_id = self._product_id(rule.product)
+                    if product_id is not None:
+                        bulk_rows.append((cart_id, product_id, rule.buy, rule.free))
+                elif isinstance(rule, CartPercentRule):
+                    discount_rows.append((cart_id, "cart", "", repr(rule.percent)))
+                elif isinstance(rule, CategoryPercentRule):
+                    discount_rows.append(
+                        (cart_id, "category", rule.category, repr(rule.percent))
+                    )
+                elif isinstance(rule, ThresholdRule):
+                    discount_rows.append(
+                        (cart_id, "threshold", str(rule.key[1]), repr(rule.percent))
+                    )
+        rule_carts = [(cart_id,) for cart_id in dirty_rules]
+        return touched, upserts, deletes, rule_carts, bulk_rows, discount_rows
+
+    def _product_id(self, product):
+        """The catalog id of product, or None (counted) if it has none."""
+        try:
+            return self._catalog.id_of(product)
+        except ValueError:
+            self.dropped_rows += 1
+            return None
+
+    def _write(self, touched, upserts, deletes, rule_carts, bulk_rows, discount_rows):
+        """Write one snapshot in a single transaction (no repository lock held)."""
+        with self._pool.connection() as connection, connection:
+            connection.executemany(
+                "INSERT OR IGNORE INTO carts (cart_id) VALUES (?)",
+                [(cart_id,) for cart_id in touched],
+            )
+            connection.executemany(
+                "INSERT INTO cart_lines (cart_id, product_id, quantity) "
+                "VALUES (?, ?, ?) ON CONFLICT (cart_id, product_id) "
+                "DO UPDATE SET quantity = excluded.quantity",
+                upserts,
+            )
+            connection.executemany(
+                "DELETE FROM cart_lines WHERE cart_id = ? AND product_id = ?",
+                deletes,
+            )
+            connection.executemany(
+                "DELETE FROM cart_bulk_discounts WHERE cart_id = ?", rule_carts
+            )
+            connection.executemany(
+                "DELETE FROM cart_discounts WHERE cart_id = ?", rule_carts
+            )
+            connection.executemany(
+                "INSERT INTO cart_bulk_discounts VALUES (?, ?, ?, ?)", bulk_rows
+            )
+            connection.executemany(
+                "INSERT INTO cart_discounts VALUES (?, ?, ?, ?)", discount_rows
+            )
+
+    def evict(self, cart_id):
+        """Flush and drop a cart from memory; it reloads on the next get()."""
+        while True:
+            self.flush()
+            with self._lock:
+                if cart_id in self._dirty_rules or any(
+                    dirty == cart_id for dirty, _ in self._dirty_lines
+                ):
+                    continue        # changed again while flushing
+                if self._carts.pop(cart_id, None) is not None:
+                    self._evictions += 1
+                return
+
+    def close(self):
+        """Stop the writer, flush pending changes and close all connections."""
+        self._closed = True
+        if self._writer is not None:
+            self._wakeup.set()
+            self._writer.join()
+        self.flush()
+        self._pool.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def _parse_percent(text):
+    try:
+        return int(text)
+    except ValueError:
+        return float(text)
@@ -0,0 +1,307 @@
+"""
+Cart service - an asyncio facade over ShoppingCart with request coalescing.
+
+Every operation is a coroutine. Operations are not applied immediately:
+they are queued per cart, and the queue is drained once per event-loop
+tick. Within a drain, consecutive adds (or removes) on the same cart
+become a single add_many (or remove_many), and because ShoppingCart
+prices lazily, all of them share one repricing when a total is read.
+Per-cart order is preserved because each queue is drained front to back.
+
+The service can be exposed over TCP or a Unix socket with a line protocol
+(one request per line, one response per line, in request order):
+
+    ADD <cart> <product id> [qty]        -> OK
+    REMOVE <cart> <product id> [qty]     -> OK
+    TOTAL <cart>                         -> OK <total>
+    DISCOUNT <cart> <percent>            -> OK
+    BULK <cart> <product id> <buy> <free> -> OK
+    (any failure)                        -> ERR <message>
+
+CartClient speaks this protocol and pipelines requests.
+"""
+
+import asyncio
+from collections import deque
+
+from src.shopping_cart import ShoppingCart
+
+
+class CartService:
+    """
+    Async cart operations, coalesced per cart and per event-loop tick.
+
+    Attributes:
+        operations (int): Operations received
+        batches (int): Coalesced mutations actually applied to carts
+    """
+
+    def __init__(self, catalog):
+        """
+        Args:
+            catalog: Any catalog with product(id), used by the line protocol
+        """
+        self.catalog = catalog
+        self.carts = {}
+        self.operations = 0
+        self.batches = 0
+        self._queues = {}
+
+    def cart(self, cart_id) -> ShoppingCart:
+        """Return the cart for cart_id, creating an empty one if needed."""
+        cart = self.carts.get(cart_id)
+        if cart is None:
+            cart = self.carts[cart_id] = ShoppingCart()
+        return cart
+
+    async def add(self, cart_id, product, quantity=1):
+        return await self._submit(cart_id, "add", (product, quantity))
+
+    async def remove(self, cart_id, product, quantity=1):
+        return await self._submit(cart_id, "remove", (product, quantity))
+
+    async def total(self, cart_id):
+        return await self._submit(cart_id, "total", ())
+
+    async def apply_discount(self, cart_id, percent):
+        return await self._submit(cart_id, "apply_discount", (percent,))
+
+    async def set_bulk_discount(self, cart_id, product, buy_quantity, free_quantity):
+        return await self._submit(
+            cart_id, "set_bulk_discount", (product, buy_quantity, free_quantity)
+        )
+
+    def _submit(self, cart_id, op, args):
+        """Queue an operation for this tick's drain and return its future."""
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        pending = self._queues.get(cart_id)
+        if pending is None:
+            pending = self._queues[cart_id] = []
+            loop.call_soon(self._drain, cart_id)
+        pending.append((op, args, future))
+        self.operations += 1
+        return future
+
+    def _drain(self, cart_id):
+        """Apply everything queued for one cart during this tick, in order."""
+        pending = self._queues.pop(cart_id)
+        try:
+            cart = self.cart(cart_id)
+            i = 0
+            while i < len(pending):
+                op = pending[i][0]
+                j = i + 1
+                if op in ("add", "remove"):
+                    while j < len(pending) and pending[j][0] == op:
+                        j += 1
+                    self._apply_run(cart, op, pending[i:j])
+                else:
+                    self._apply_one(cart, *pending[i])
+                i = j
+        except Exception as error:
+            # Never leave a caller waiting on a future nobody will resolve.
+            for _, _, future in pending:
+                if not future.done():
+                    future.set_exception(error)
+
+    def _apply_run(self, cart, op, run):
+        """Apply a run of adds or removes as one bulk mutation."""
+        lines = [args for _, args, _ in run]
+        bulk = cart.add_many if op == "add" else cart.remove_many
+        try:
+            batched = op == "add" or self._removes_commute(cart, lines)
+            if batched:
+                bulk(lines)
+        except Exception:
+            # Bulk calls are atomic, so nothing was applied.
+            batched = False
+        if not batched:
+            # One call per request so each gets its own result or error.
+            for entry in run:
+                self._apply_one(cart, *entry)
+            return
+        self.batches += 1
+        for _, _, future in run:
+            if not future.done():
+                future.set_result(None)
+
+    @staticmethod
+    def _removes_commute(cart, lines):
+        """
+        True if one remove_many gives the same results as separate removes.
+
+        That fails only when a product is removed more than once and the
+        earlier removals would empty its line, making a later one raise.
+        """
+        requested = {}
+        for product, qty in lines:
+            requested.setdefault(product, []).append(qty)
+        for product, quantities in requested.items():
+            if len(quantities) > 1 and sum(quantities[:-1]) >= cart.get_quantity(product):
+                return False
+        return True
+
+    def _apply_one(self, cart, op, args, future):
+        try:
+            if op == "total":
+                result = cart.total()
+            else:
+                self.batches += 1
+                result = getattr(cart, op)(*args)
+        except Exception as error:
+            if not future.done():
+                future.set_exception(error)
+            return
+        if not future.done():
+            future.set_result(result)
+
+    # -------------------------------------------------------------------------
+    # Line protocol
+    # -------------------------------------------------------------------------
+
+    async def start_server(self, host="127.0.0.1", port=0):
+        """Serve the line protocol over TCP; returns the asyncio server."""
+        return await asyncio.start_server(self._handle, host, port)
+
+    async def start_unix_server(self, path):
+        """Serve the line protocol over a Unix socket."""
+        return await asyncio.start_unix_server(self._handle, path)
+
+    def _dispatch(self, line):
+        """Queue one request line as an operation and return its future."""
+        parts = line.split()
+        if not parts:
+            raise ValueError("Empty request")
+        command, args = parts[0].upper(), parts[1:]
+        if command == "TOTAL" and len(args) == 1:
+            return self._submit(args[0], "total", ())
+        if command == "DISCOUNT" and len(args) == 2:
+            return self._submit(args[0], "apply_discount", (_number(args[1]),))
+        if command in ("ADD", "REMOVE") and len(args) in (2, 3):
+            product = self._product(args[1])
+            quantity = int(args[2]) if len(args) == 3 else 1
+            return self._submit(args[0], command.lower(), (product, quantity))
+        if command == "BULK" and len(args) == 4:
+            product = self._product(args[1])
+            rule = (product, int(args[2]), int(args[3]))
+            return self._submit(args[0], "set_bulk_discount", rule)
+        raise ValueError(f"Bad request: {line.strip()}")
+
+    def _product(self, text):
+        product_id = int(text)
+        if product_id < 0:
+            raise ValueError(f"Unknown product {text}")
+        try:
+            return self.catalog.product(product_id)
+        except (IndexError, KeyError):
+            raise ValueError(f"Unknown product {text}") from None
+
+    async def _handle(self, reader, writer):
+        """Read requests as they arrive and answer them in order."""
+        responses = asyncio.Queue()
+
+        async def respond():
+            while True:
+                request = await responses.get()
+                if request is None:
+                    break
+                try:
+                    result = await request
+                except Exception as error:
+                    writer.write(f"ERR {error}\n".encode())
+                else:
+                    reply = "OK" if result is None else f"OK {result:.2f}"
+                    writer.write(f"{reply}\n".encode())
+                if responses.empty():
+                    await writer.drain()
+
+        responder = asyncio.create_task(respond())
+        try:
+            while line := await reader.readline():
+                try:
+                    request = self._dispatch(line.decode())
+                except ValueError as error:
+                    request = asyncio.get_running_loop().create_future()
+                    request.set_exception(error)
+                responses.put_nowait(request)
+        finally:
+            responses.put_nowait(None)
+            await responder
+            writer.close()
+
+
+def _number(text):
+    try:
+        return int(text)
+    except ValueError:
+        return float(text)
+
+
+class CartServiceError(Exception):
+    """An ERR response from the cart service."""
+
+
+class CartClient:
+    """
+    A pipelining client for the cart service line protocol.
+
+    Example:
+        client = await CartClient.connect("127.0.0.1", port)
+        await client.add("alice", 0, 3)
+        print(await client.total("alice"))
+        await client.close()
+    """
+
+    def __init__(self, reader, writer):
+        self._reader = reader
+        self._writer = writer
+        self._waiting = deque()
+        self._listener = asyncio.create_task(self._listen())
+
+    @classmethod
+    async def connect(cls, host, port):
+        reader, writer = await asyncio.open_connection(host, port)
+        return cls(reader, writer)
+
+    @classmethod
+    async def connect_unix(cls, path):
+        reader, writer = await asyncio.open_unix_connection(path)
+        return cls(reader, writer)
+
+    async def _listen(self):
+        while line := await self._reader.readline():
+            self._waiting.popleft().set_result(line.decode().strip())
+        while self._waiting:
+            self._waiting.popleft().set_exception(ConnectionError("Connection closed"))
+
+    async def request(self, line):
+        """Send one request line and return the value of its OK response."""
+        future = asyncio.get_running_loop().create_future()
+        self._waiting.append(future)
+        self._writer.write(f"{line}\n".encode())
+        reply = await future
+        status, _, value = reply.partition(" ")
+        if status != "OK":
+            raise CartServiceError(value)
+        return value or None
+
+    async def add(self, cart_id, product_id, quantity=1):
+        await self.request(f"ADD {cart_id} {product_id} {quantity}")
+
+    async def remove(self, cart_id, product_id, quantity=1):
+        await self.request(f"REMOVE {cart_id} {product_id} {quantity}")
+
+    async def total(self, cart_id):
+        return float(await self.request(f"TOTAL {cart_id}"))
+
+    async def apply_discount(self, cart_id, percent):
+        await self.request(f"DISCOUNT {cart_id} {percent}")
+
+    async def set_bulk_discount(self, cart_id, product_id, buy_quantity, free_quantity):
+        await self.request(f"BULK {cart_id} {product_id} {buy_quantity} {free_quantity}")
+
+    async def close(self):
+        self._writer.close()
+        await self._writer.wait_closed()
+        await self._listener
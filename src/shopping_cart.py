@@ -12,7 +12,19 @@ Instructions:
 Remember: Only write enough code to pass the current failing test!
 """
 
+import heapq
+
+from src.cart_diff import MERGE_POLICIES, CartDiff
+from src.cow import CowDict
+from src.instrumentation import CartInstrumentation
+from src.money import from_cents
+from src.pricing import BulkRule, CartPercentRule, CategoryPercentRule, PricingPipeline
 from src.product import Product
+from src.quote_cache import line_fingerprint
+
+# Chains of CowDict layers deeper than this are flattened on the next fork,
+# keeping lookups in heavily forked carts cheap.
+_MAX_FORK_DEPTH = 8
 
 
 class ShoppingCart:
@@ -23,102 +35,565 @@ class ShoppingCart:
     Start with the tests in tests/test_shopping_cart.py
     """
     
-    def __init__(self):
-        """Initialize an empty shopping cart."""
+    def __init__(self, quote_cache=None, inventory=None):
+        """
+        Initialize an empty shopping cart.
+
+        Args:
+            quote_cache: Optional QuoteCache shared with other carts; total()
+                reuses a quote for identical contents (src/quote_cache.py)
+            inventory: Optional Inventory to reserve stock against on add
+                and release on remove (src/inventory.py)
+        """
         # TODO: Exercise 1 - Initialize the cart
-        self.items = []
-        self.overall_total = 0.0
-        self.discount_amount = 0.0
-        self.bulk_discounts = {}
+        # Quantities are kept per distinct product rather than one list
+        # entry per unit, so every lookup and update is a dict operation.
+        self._quantities = {}
+        self._unit_count = 0
+        # Cached price of each line in cents (rules already applied) and
+        # their sum. Pricing is lazy: mutations only mark lines dirty, and
+        # total() reprices the dirty lines and memoizes the result until
+        # the next change. All arithmetic is integer cents (src/money.py).
+        self._line_totals = {}
+        self._subtotal = 0
+        self._dirty = set()
+        self._total_cents = 0
+        self._total_valid = True
+        self.recomputations = 0
+        self.recomputations_avoided = 0
+        # Lines grouped by product category, so a category rule only
+        # reprices the lines it affects.
+        self._category_lines = {}
+        self.pricing = PricingPipeline()
+        # Copy-on-write bookkeeping for fork(): None means this cart owns
+        # every category set; otherwise only the categories listed. The
+        # pipeline is copied before its first change while shared.
+        self._owned_categories = None
+        self._pricing_shared = False
+        # Opt-in call stats; see enable_instrumentation().
+        self.instrumentation = None
+        self.quote_cache = quote_cache
+        # Order-independent digest of the lines, kept by _set_quantity so a
+        # quote cache lookup costs O(1) (see QuoteCache.fingerprint).
+        self._lines_fingerprint = 0
+        self.inventory = inventory
+        # Objects told when a line appears or disappears, e.g. a
+        # ProductCatalog keeping a reverse index of open carts.
+        self._observers = []
+
+    @property
+    def overall_total(self):
+        """The cart total in dollars, after every rule."""
+        return self.total()
+
+    @property
+    def original_total(self):
+        """The sum of line totals in dollars, before cart-level rules."""
+        return from_cents(self.subtotal_cents())
+
+    @property
+    def discount_amount(self):
+        """Dollars taken off by cart-level rules."""
+        total = self.total_cents()
+        return from_cents(self.subtotal_cents() - total)
+
+    @property
+    def bulk_discounts(self):
+        """Active bulk rules as {product: {"buy": n, "free": m}} (read-only)."""
+        return {
+            product: {"buy": cycle_size - free, "free": free}
+            for product, (cycle_size, free) in self.pricing.bulk_by_product.items()
+        }
+
+    @property
+    def items(self):
+        """Every unit in the cart, expanded into a flat list (read-only)."""
+        expanded = []
+        for product, qty in self._quantities.items():
+            expanded.extend([product] * qty)
+        return expanded
         
     def is_empty(self):
-        return len(self.items) == 0
+        return self._unit_count == 0
     
     def item_count(self):
-        return len(self.items)
+        return self._unit_count
     
     def total(self):
-        return round(self.overall_total, 2)
-    
-    def add(self, product, quantity=1):
-        for _ in range(quantity):
-            self.items.append(product)
-    
-        if product in self.bulk_discounts:
-            self._recalculate_total()
-        else:
-            self.overall_total += product.price * quantity
+        return from_cents(self.total_cents())
 
+    def total_cents(self):
+        if self._total_valid:
+            self.recomputations_avoided += 1
+            return self._total_cents
+        cache = self.quote_cache
+        if cache is not None:
+            key = cache.fingerprint(self)
+            cached = cache.get(key)
+            if cached is not None:
+                self._total_cents = cached
+                self._total_valid = True
+                self.recomputations_avoided += 1
+                return cached
+        self._flush_dirty_lines()
+        self._total_cents = self.pricing.cart_total(self._subtotal)
+        self._total_valid = True
+        self.recomputations += 1
+        if cache is not None:
+            cache.put(key, self._total_cents)
+        return self._total_cents
 
+    def subtotal_cents(self):
+        """Sum of line totals in cents, before cart-level rules."""
+        self._flush_dirty_lines()
+        return self._subtotal
+    
+    def add(self, product, quantity=1):
+        if not isinstance(product, Product):
+            raise TypeError(f"Not a product: {product!r}")
+        self._check_quantity(quantity)
+        if quantity <= 0:
+            return
+        if self.inventory is not None:
+            self.inventory.reserve(product, quantity, self)
+        self._set_quantity(product, self._quantities.get(product, 0) + quantity)
+        self._reprice_line(product)
     
     def contains(self, product):
-        if product in self.items: return True
-        return False
+        return product in self._quantities
     
     def get_quantity(self, item):
-        return self.items.count(item)
+        return self._quantities.get(item, 0)
     
     def remove(self, product, quantity=1):
-        removed = 0
-        if product not in self.items:
+        if product not in self._quantities:
             raise ValueError("Product not in cart")
-        while product in self.items and removed < quantity:
-            self.items.remove(product)
-            self.overall_total -= product.price
-            removed += 1
+        self._check_quantity(quantity)
+        current = self._quantities[product]
+        removed = min(current, max(quantity, 0))
+        self._set_quantity(product, current - removed)
+        self._reprice_line(product)
+        if self.inventory is not None and removed:
+            self.inventory.release(product, removed, self)
     
-    def clear(self):
-        self.items.clear()
-        self.overall_total = 0
+    def add_many(self, lines):
+        """
+        Add several (product, quantity) pairs and reprice once.
 
-    
-    def apply_discount(self, percent):
-        if percent < 0 or percent > 100:
-            raise ValueError("Discount must be between 0 and 100.")
+        All pairs are validated before anything changes, so a bad pair
+        leaves the cart untouched.
+
+        Raises:
+            TypeError: If any item is not a Product or any quantity is not
+                an integer
+            ValueError: If any quantity is less than 1
+        """
+        deltas = self._collect(lines, minimum=1)
+        self._reserve_all(deltas)
+        for product, qty in deltas.items():
+            self._set_quantity(product, self._quantities.get(product, 0) + qty)
+        self._reprice_lines(deltas)
+
+    def remove_many(self, lines):
+        """
+        Remove several (product, quantity) pairs and reprice once.
+
+        As with remove, asking for more units than the cart holds removes
+        the whole line.
+
+        Raises:
+            TypeError: If any item is not a Product or any quantity is not
+                an integer
+            ValueError: If any product is not in the cart or any quantity is
+                less than 1
+            In every case the cart is left untouched.
+        """
+        deltas = self._collect(lines, minimum=1)
+        for product in deltas:
+            if product not in self._quantities:
+                raise ValueError("Product not in cart")
+        released = {}
+        for product, qty in deltas.items():
+            current = self._quantities[product]
+            released[product] = min(qty, current)
+            self._set_quantity(product, current - released[product])
+        self._reprice_lines(deltas)
+        self._release_all(released)
+
+    def update(self, lines):
+        """
+        Set the quantity of several products at once; 0 removes the line.
+
+        Later pairs for the same product win. Validation is done up front
+        and repricing happens once, as in add_many.
+
+        Raises:
+            TypeError: If any item is not a Product or any quantity is not
+                an integer
+            ValueError: If any quantity is negative
+        """
+        targets = {}
+        for product, qty in self._validated(lines, minimum=0):
+            targets[product] = qty
+        changes = {p: qty - self._quantities.get(p, 0) for p, qty in targets.items()}
+        self._reserve_all({p: d for p, d in changes.items() if d > 0})
+        for product, qty in targets.items():
+            self._set_quantity(product, qty)
+        self._reprice_lines(targets)
+        self._release_all({p: -d for p, d in changes.items() if d < 0})
+
+    def lines(self):
+        """
+        Yield (product, quantity, line_total) for each distinct line.
+
+        Nothing is expanded per unit; line totals are in dollars after
+        line-level rules (bulk, category).
+        """
+        self._flush_dirty_lines()
+        line_totals = self._line_totals
+        for product, qty in self._quantities.items():
+            yield product, qty, from_cents(line_totals[product])
+
+    def lines_in_category(self, category):
+        """Yield (product, quantity, line_total) for lines in one category."""
+        self._flush_dirty_lines()
+        for product in self._category_lines.get(category, ()):
+            yield (product, self._quantities[product],
+                   from_cents(self._line_totals[product]))
+
+    def top_lines(self, n):
+        """The n most expensive lines by line total, largest first."""
+        self._flush_dirty_lines()
+        line_totals = self._line_totals
+        top = heapq.nlargest(n, line_totals.items(), key=lambda item: item[1])
+        return [
+            (product, self._quantities[product], from_cents(cents))
+            for product, cents in top
+        ]
+
+    def __iter__(self):
+        """Iterate over the distinct products in the cart."""
+        return iter(self._quantities)
+
+    def __str__(self):
+        count = self.item_count()
+        out = [f"ShoppingCart ({count} item{'s' if count != 1 else ''})"]
+        for product, qty, line_total in self.lines():
+            out.append(f"  {product.name} x{qty} @ ${product.price:.2f} = ${line_total:.2f}")
+        discount = self.discount_amount
+        if discount:
+            out.append(f"  Discount: -${discount:.2f}")
+        out.append(f"Total: ${self.total():.2f}")
+        return "\n".join(out)
+
+    def diff(self, other):
+        """
+        Return the CartDiff that turns this cart's lines into other's.
+
+        Only distinct lines are compared, so the cost is O(lines of both).
+        """
+        delta = CartDiff()
+        mine = self._quantities
+        theirs = other._quantities
+        for product, qty in mine.items():
+            delta.record(product, qty, theirs.get(product, 0))
+        for product, qty in theirs.items():
+            if product not in mine:
+                delta.record(product, 0, qty)
+        return delta
+
+    def merge(self, other, policy="sum"):
+        """
+        Merge another cart's lines into this one, e.g. a guest cart at login.
+
+        Policies for a product in both carts:
+            "sum"           add the quantities
+            "max"           keep the larger quantity
+            "prefer-other"  take the other cart's quantity
 
-        if not hasattr(self, "original_total"):
-            self.original_total = self.overall_total
+        Lines only in this cart are kept; pricing rules are not merged.
+        The cart is repriced once.
 
-        discount_amount = self.original_total * (percent / 100)
-        self.overall_total = self.original_total - discount_amount
+        Returns:
+            The CartDiff of lines this cart changed.
+
+        Raises:
+            ValueError: If policy is not one of the above
+        """
+        if policy not in MERGE_POLICIES:
+            raise ValueError(f"Unknown merge policy {policy!r}")
+        delta = CartDiff()
+        targets = []
+        for product, qty in other._quantities.items():
+            old = self._quantities.get(product, 0)
+            if policy == "sum":
+                new = old + qty
+            elif policy == "max":
+                new = max(old, qty)
+            else:
+                new = qty
+            delta.record(product, old, new)
+            targets.append((product, new))
+        self.update(targets)
+        return delta
+
+    def clear(self):
+        for observer in self._observers:
+            for product in self._quantities:
+                observer.line_removed(self, product)
+        self._release_all(self._quantities)
+        self._quantities = {}
+        self._line_totals = {}
+        self._category_lines = {}
+        self._lines_fingerprint = 0
+        self._owned_categories = None
+        self._dirty.clear()
+        self._unit_count = 0
+        self._subtotal = 0
+        self._total_valid = False
+
+    def apply_discount(self, percent):
+        self.add_rule(CartPercentRule(percent))
     
     def remove_discount(self):
-        self.overall_total = self.original_total + self.discount_amount
+        self.remove_rule(CartPercentRule(0))
 
     def set_bulk_discount(self, product, buy_quantity, free_quantity):
-        self.bulk_discounts[product] = {
-        "buy": buy_quantity,
-        "free": free_quantity
-    }
-        
-    def _apply_bulk_discount(self, product):
-    
-        info = self.bulk_discounts[product]
-        buy = info["buy"]
-        free = info["free"]
-    
-        qty = self.get_quantity(product)
- 
-        cycle_size = buy + free
-        free_items = (qty // cycle_size) * free
+        self.add_rule(BulkRule(product, buy_quantity, free_quantity))
 
-        total_price = product.price * (qty - free_items)
+    def set_category_discount(self, category, percent):
+        self.add_rule(CategoryPercentRule(category, percent))
 
-        self._recalculate_total()
+    def add_rule(self, rule):
+        """Add or replace a pricing rule (see src/pricing.py)."""
+        self._own_pricing()
+        self.pricing.add(rule)
+        self._notify_bulk_rule(rule, present=True)
+        self._reprice_lines(self._lines_affected_by(rule))
 
-    def _recalculate_total(self):
-        total = 0
-        for product in set(self.items):
-            qty = self.get_quantity(product)
-            if product in self.bulk_discounts:
-                info = self.bulk_discounts[product]
-                buy = info["buy"]
-                free = info["free"]
-                cycle_size = buy + free
-                free_items = (qty // cycle_size) * free
-                total += product.price * (qty - free_items)
+    def remove_rule(self, rule):
+        """Remove the pricing rule with the same key as rule."""
+        self._own_pricing()
+        self.pricing.remove(rule)
+        self._notify_bulk_rule(rule, present=False)
+        self._reprice_lines(self._lines_affected_by(rule))
+
+    def _lines_affected_by(self, rule):
+        """The lines whose own price depends on rule (none for cart rules)."""
+        if isinstance(rule, BulkRule):
+            return (rule.product,) if rule.product in self._quantities else ()
+        if isinstance(rule, CategoryPercentRule):
+            return tuple(self._category_lines.get(rule.category, ()))
+        return ()
+
+    def _line_total(self, product, qty):
+        """Price in cents of qty units of product after line-level rules."""
+        return self.pricing.line_total(product, qty)
+
+    def fork(self):
+        """
+        Return a copy-on-write child of this cart, e.g. for a "what if" quote.
+
+        Parent and child share their lines and pricing rules until one of
+        them changes something; each then copies only what it changes. A
+        fork costs O(1) (amortized), not O(cart size).
+        """
+        self._flush_dirty_lines()
+        child = ShoppingCart(quote_cache=self.quote_cache)
+        for name in ("_quantities", "_line_totals", "_category_lines"):
+            current = getattr(self, name)
+            if isinstance(current, CowDict):
+                base = current.shareable()
+                if isinstance(base, CowDict) and base.depth >= _MAX_FORK_DEPTH:
+                    base = dict(base)
             else:
-                total += product.price * qty
-        self.overall_total = total  
+                base = current
+            setattr(self, name, CowDict(base))
+            setattr(child, name, CowDict(base))
+        self._owned_categories = set()
+        child._owned_categories = set()
+        child.pricing = self.pricing
+        self._pricing_shared = child._pricing_shared = True
+        child._unit_count = self._unit_count
+        child._lines_fingerprint = self._lines_fingerprint
+        child._subtotal = self._subtotal
+        child._total_cents = self._total_cents
+        child._total_valid = self._total_valid
+        return child
+
+    def enable_instrumentation(self, stats=None):
+        """
+        Start recording call stats for this cart (see src/instrumentation.py).
+
+        Args:
+            stats: A CartInstrumentation to record into, e.g. one shared by
+                many carts; a new one is created if omitted
+
+        Returns:
+            The CartInstrumentation in use.
+        """
+        self.disable_instrumentation()
+        stats = stats or CartInstrumentation()
+        stats.install(self)
+        self.instrumentation = stats
+        return stats
 
+    def disable_instrumentation(self):
+        """Stop recording; the cart goes back to the uninstrumented methods."""
+        if self.instrumentation is not None:
+            self.instrumentation.uninstall(self)
+            self.instrumentation = None
 
+    def _reserve_all(self, deltas):
+        """Reserve stock for every (product: units) or for none of them."""
+        if self.inventory is None:
+            return
+        done = []
+        try:
+            for product, qty in deltas.items():
+                self.inventory.reserve(product, qty, self)
+                done.append((product, qty))
+        except ValueError:
+            for product, qty in done:
+                self.inventory.release(product, qty, self)
+            raise
+
+    def _release_all(self, deltas):
+        """Return reserved stock for every (product: units)."""
+        if self.inventory is None:
+            return
+        for product, qty in deltas.items():
+            if qty:
+                self.inventory.release(product, qty, self)
+
+    def _set_quantity(self, product, qty):
+        """Store a line's quantity (dropping it at 0) and keep the unit count."""
+        previous = self._quantities.get(product, 0)
+        self._unit_count += qty - previous
+        self._lines_fingerprint = line_fingerprint(
+            self._lines_fingerprint, product, previous, qty)
+        if qty:
+            self._quantities[product] = qty
+            if not previous:
+                self._category_set(product.category).add(product)
+                for observer in self._observers:
+                    observer.line_added(self, product)
+        elif previous:
+            del self._quantities[product]
+            lines = self._category_set(product.category)
+            lines.discard(product)
+            if not lines:
+                del self._category_lines[product.category]
+            for observer in self._observers:
+                observer.line_removed(self, product)
+
+    def replace_product(self, old, new):
+        """
+        Move old's line (and its bulk rule) to new, e.g. after a price change.
+
+        A bulk rule on old moves even if the cart has no old line. Only
+        that one line is repriced.
+        """
+        rule = self.pricing.find(BulkRule(old, 1, 0))
+        qty = self._quantities.get(old, 0)
+        if rule is None and not qty:
+            return
+        if rule is not None:
+            self._own_pricing()
+            self.pricing.remove(rule)
+            self._notify_bulk_rule(rule, present=False)
+            moved = BulkRule(new, rule.buy, rule.free)
+            self.pricing.add(moved)
+            self._notify_bulk_rule(moved, present=True)
+        if qty:
+            self._set_quantity(old, 0)
+            self._set_quantity(new, self._quantities.get(new, 0) + qty)
+        self._reprice_lines((old, new))
+
+    def _notify_bulk_rule(self, rule, present):
+        """Tell observers a bulk rule now refers (or no longer refers) to a product."""
+        if isinstance(rule, BulkRule):
+            for observer in self._observers:
+                if present:
+                    observer.bulk_rule_added(self, rule.product)
+                else:
+                    observer.bulk_rule_removed(self, rule.product)
+
+    def _category_set(self, category):
+        """The writable set of lines in category, copied first if shared."""
+        lines = self._category_lines.get(category)
+        owned = self._owned_categories
+        if lines is None:
+            lines = self._category_lines[category] = set()
+        elif owned is not None and category not in owned:
+            lines = self._category_lines[category] = set(lines)
+        if owned is not None:
+            owned.add(category)
+        return lines
+
+    def _own_pricing(self):
+        if self._pricing_shared:
+            self.pricing = PricingPipeline(self.pricing.rules)
+            self._pricing_shared = False
+
+    @staticmethod
+    def _check_quantity(quantity):
+        """Reject non-integer quantities, as range(quantity) once did."""
+        if not isinstance(quantity, int) or isinstance(quantity, bool):
+            raise TypeError(f"Quantity must be an integer, not {quantity!r}")
+
+    @staticmethod
+    def _validated(lines, minimum):
+        """
+        Return the pairs as a list, raising if any of them is invalid.
+
+        Bad types raise TypeError, as in add and remove; an integer below
+        minimum raises ValueError.
+        """
+        pairs = list(lines)
+        for product, qty in pairs:
+            if not isinstance(product, Product):
+                raise TypeError(f"Not a product: {product!r}")
+            ShoppingCart._check_quantity(qty)
+            if qty < minimum:
+                raise ValueError(f"Invalid quantity {qty!r} for {product!r}")
+        return pairs
+
+    @staticmethod
+    def _collect(lines, minimum):
+        """Validate pairs and sum the quantities of repeated products."""
+        deltas = {}
+        for product, qty in ShoppingCart._validated(lines, minimum):
+            deltas[product] = deltas.get(product, 0) + qty
+        return deltas
+
+    def _reprice_line(self, product):
+        """Mark one line as needing a reprice."""
+        self._dirty.add(product)
+        self._total_valid = False
+
+    def _reprice_lines(self, products):
+        """Mark lines as needing a reprice and drop the memoized total."""
+        self._dirty.update(products)
+        self._total_valid = False
+
+    def _flush_dirty_lines(self):
+        """Reprice each dirty line once and adjust the subtotal."""
+        for product in self._dirty:
+            old = self._line_totals.pop(product, 0)
+            qty = self._quantities.get(product, 0)
+            new = self._line_total(product, qty) if qty else 0
+            if qty:
+                self._line_totals[product] = new
+            self._subtotal += new - old
+        self._dirty.clear()
+
+    def _recalculate_total(self):
+        """Reprice every line from scratch."""
+        self._line_totals = {
+            product: self._line_total(product, qty)
+            for product, qty in self._quantities.items()
+        }
+        self._subtotal = sum(self._line_totals.values())
+        self._dirty.clear()
+        self._total_valid = False
@@ -0,0 +1,309 @@
+"""
+Cart snapshots - a compact, versioned binary format for ShoppingCart.
+
+A snapshot stores products as catalog ids and all integers as LEB128
+varints, so a typical line takes 2-4 bytes:
+
+    b"CART" | version (1 byte)
+    varint line count, then per line:  varint product id, varint quantity
+    varint rule count, then per rule:  tag byte + payload
+        1 bulk:       varint product id, varint buy, varint free
+        2 category:   string category, number percent
+        3 cart:       number percent
+        4 threshold:  varint minimum cents, number percent
+
+Strings are a varint byte length followed by UTF-8. Percentages are
+stored as their decimal text so fractional values round-trip exactly.
+
+CartStore packs many snapshots into one file with an index of cart id to
+(offset, length) at the end. Opening a store reads only that index; each
+load() then decodes just one cart from a memory-mapped view of the file.
+"""
+
+import mmap
+import struct
+
+from src.pricing import BulkRule, CartPercentRule, CategoryPercentRule, ThresholdRule
+from src.shopping_cart import ShoppingCart
+
+MAGIC = b"CART"
+VERSION = 1
+
+STORE_MAGIC = b"CSTO"
+STORE_VERSION = 1
+_TRAILER = struct.Struct("<Q4s")
+
+_BULK, _CATEGORY, _CART, _THRESHOLD = 1, 2, 3, 4
+
+
+class SnapshotError(ValueError):
+    """Raised when snapshot or store data cannot be decoded."""
+
+
+# -----------------------------------------------------------------------------
+# Primitive encoding
+# -----------------------------------------------------------------------------
+
+def _write_varint(out, value):
+    if value < 0:
+        raise SnapshotError("Varints must be non-negative")
+    while value >= 0x80:
+        out.append((value & 0x7F) | 0x80)
+        value >>= 7
+    out.append(value)
+
+
+def _read_varint(data, pos):
+    result = 0
+    shift = 0
+    while True:
+        try:
+            byte = data[pos]
+        except IndexError:
+            raise SnapshotError("Truncated snapshot") from None
+        pos += 1
+        result |= (byte & 0x7F) << shift
+        if byte < 0x80:
+            return result, pos
+        shift += 7
+
+
+def _write_str(out, text):
+    encoded = text.encode("utf-8")
+    _write_varint(out, len(encoded))
+    out.extend(encoded)
+
+
+def _read_str(data, pos):
+    length, pos = _read_varint(data, pos)
+    end = pos + length
+    if end > len(data):
+        raise SnapshotError("Truncated snapshot")
+    return bytes(data[pos:end]).decode("utf-8"), end
+
+
+def _write_number(out, value):
+    _write_str(out, repr(value))
+
+
+def _read_number(data, pos):
+    text, pos = _read_str(data, pos)
+    try:
+        value = int(text)
+    except ValueError:
+        value = float(text)
+    return value, pos
+
+
+# -----------------------------------------------------------------------------
+# Single cart snapshots
+# -----------------------------------------------------------------------------
+
+def dumps(cart, catalog) -> bytes:
+    """
+    Serialize a cart's lines and pricing rules.
+
+    Args:
+        cart: The ShoppingCart to serialize
+        catalog: Any catalog with id_of(product) and product(id)
+
+    Raises:
+        ValueError: If a product in the cart is not in the catalog
+    """
+    out = bytearray(MAGIC)
+    out.append(VERSION)
+    _write_varint(out, len(cart._quantities))
+    for product, qty in cart._quantities.items():
+        _write_varint(out, catalog.id_of(product))
+        _write_varint(out, qty)
+    rules = cart.pricing.rules
+    _write_varint(out, len(rules))
+    for rule in rules:
+        if isinstance(rule, BulkRule):
+            out.append(_BULK)
+            _write_varint(out, catalog.id_of(rule.product))
+            _write_varint(out, rule.buy)
+            _write_varint(out, rule.free)
+        elif isinstance(rule, CategoryPercentRule):
+            out.append(_CATEGORY)
+            _write_str(out, rule.category)
+            _write_number(out, rule.percent)
+        elif isinstance(rule, CartPercentRule):
+            out.append(_CART)
+            _write_number(out, rule.percent)
+        elif isinstance(rule, ThresholdRule):
+            out.append(_THRESHOLD)
+            _write_varint(out, rule.key[1])
+            _write_number(out, rule.percent)
+        else:
+            raise SnapshotError(f"Cannot serialize rule {rule!r}")
+    return bytes(out)
+
+
+def loads(data, catalog, cart=None) -> ShoppingCart:
+    """
+    Rebuild a ShoppingCart from dumps() output (bytes or a memoryview).
+
+    Args:
+        data: The snapshot
+        catalog: Catalog the snapshot's product ids refer to
+        cart: Empty cart to load into, e.g. one set up with an inventory
+            or quote cache; a plain ShoppingCart by default
+
+    Raises:
+        SnapshotError: If the data is not a snapshot of a known version
+    """
+    if bytes(data[:4]) != MAGIC:
+        raise SnapshotError("Not a cart snapshot")
+    if len(data) < 5 or data[4] != VERSION:
+        raise SnapshotError("Unsupported snapshot version")
+    pos = 5
+    count, pos = _read_varint(data, pos)
+    lines = []
+    for _ in range(count):
+        product_id, pos = _read_varint(data, pos)
+        qty, pos = _read_varint(data, pos)
+        lines.append((catalog.product(product_id), qty))
+    if cart is None:
+        cart = ShoppingCart()
+    cart.add_many(lines)
+    count, pos = _read_varint(data, pos)
+    for _ in range(count):
+        if pos >= len(data):
+            raise SnapshotError("Truncated snapshot")
+        tag = data[pos]
+        pos += 1
+        if tag == _BULK:
+            product_id, pos = _read_varint(data, pos)
+            buy, pos = _read_varint(data, pos)
+            free, pos = _read_varint(data, pos)
+            rule = BulkRule(catalog.product(product_id), buy, free)
+        elif tag == _CATEGORY:
+            category, pos = _read_str(data, pos)
+            percent, pos = _read_number(data, pos)
+            rule = CategoryPercentRule(category, percent)
+        elif tag == _CART:
+            percent, pos = _read_number(data, pos)
+            rule = CartPercentRule(percent)
+        elif tag == _THRESHOLD:
+            minimum_cents, pos = _read_varint(data, pos)
+            percent, pos = _read_number(data, pos)
+            rule = ThresholdRule(minimum_cents / 100, percent)
+        else:
+            raise SnapshotError(f"Unknown rule tag {tag}")
+        cart.add_rule(rule)
+    return cart
+
+
+# -----------------------------------------------------------------------------
+# Memory-mapped store of many snapshots
+# -----------------------------------------------------------------------------
+
+class CartStore:
+    """
+    A read-only, memory-mapped file of cart snapshots keyed by cart id.
+
+    Layout: b"CSTO" | version | snapshots... | index | trailer, where the
+    index is a varint count followed by (string id, varint offset, varint
+    length) entries and the trailer is the index offset (uint64 LE) plus
+    b"CSTO".
+
+    Example:
+        CartStore.write("carts.bin", [("alice", cart)], catalog)
+        with CartStore("carts.bin", catalog) as store:
+            cart = store.load("alice")
+    """
+
+    def __init__(self, path, catalog):
+        """Open a store and read its index."""
+        self._catalog = catalog
+        self._file = open(path, "rb")
+        try:
+            self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            self._file.close()
+            raise SnapshotError("Empty cart store") from None
+        self._view = memoryview(self._map)
+        try:
+            self._index = self._read_index()
+        except Exception:
+            self.close()
+            raise
+
+    @staticmethod
+    def write(path, carts, catalog):
+        """
+        Write (cart id, cart) pairs to a new store file at path.
+
+        Returns:
+            The number of carts written.
+        """
+        index = []
+        with open(path, "wb") as f:
+            f.write(STORE_MAGIC + bytes([STORE_VERSION]))
+            offset = 5
+            for cart_id, cart in carts:
+                data = dumps(cart, catalog)
+                f.write(data)
+                index.append((cart_id, offset, len(data)))
+                offset += len(data)
+            out = bytearray()
+            _write_varint(out, len(index))
+            for cart_id, start, length in index:
+                _write_str(out, cart_id)
+                _write_varint(out, start)
+                _write_varint(out, length)
+            f.write(out)
+            f.write(_TRAILER.pack(offset, STORE_MAGIC))
+        return len(index)
+
+    def _read_index(self):
+        view = self._view
+        if len(view) < 5 + _TRAILER.size or bytes(view[:4]) != STORE_MAGIC:
+            raise SnapshotError("Not a cart store")
+        if view[4] != STORE_VERSION:
+            raise SnapshotError("Unsupported cart store version")
+        index_offset, magic = _TRAILER.unpack(bytes(view[-_TRAILER.size:]))
+        if magic != STORE_MAGIC:
+            raise SnapshotError("Corrupt cart store trailer")
+        data = view[:len(view) - _TRAILER.size]
+        count, pos = _read_varint(data, index_offset)
+        index = {}
+        for _ in range(count):
+            cart_id, pos = _read_str(data, pos)
+            start, pos = _read_varint(data, pos)
+            length, pos = _read_varint(data, pos)
+            index[cart_id] = (start, length)
+        return index
+
+    def load(self, cart_id) -> ShoppingCart:
+        """
+        Decode one cart, touching only its own bytes.
+
+        Raises:
+            KeyError: If the store has no cart with that id
+        """
+        start, length = self._index[cart_id]
+        return loads(self._view[start:start + length], self._catalog)
+
+    def __contains__(self, cart_id):
+        return cart_id in self._index
+
+    def __len__(self):
+        return len(self._index)
+
+    def ids(self):
+        """The cart ids in the store, in the order they were written."""
+        return list(self._index)
+
+    def close(self):
+        """Release the memory map and the file."""
+        self._view.release()
+        self._map.close()
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
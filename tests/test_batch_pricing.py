@@ -0,0 +1,104 @@
+"""
+Batch Pricing Tests - many carts priced in one pass
+
+Run these tests:
+    pytest tests/test_batch_pricing.py -v
+"""
+
+import random
+
+import pytest
+from src.batch_pricing import (
+    RowBatch,
+    _rule_columns,
+    _subtotals_numpy,
+    _subtotals_python,
+    price_rows,
+)
+from src.catalog import ColumnarCatalog, ProductCatalog
+from src.checkout import Order, price_order
+from src.pricing import BulkRule, CategoryPercentRule, PricingPipeline, ThresholdRule
+
+
+def random_orders(seed=340):
+    """A catalog, store rules and 300 random orders against it."""
+    rng = random.Random(seed)
+    catalog = ProductCatalog()
+    for i in range(30):
+        catalog.get(f"P{i}", rng.randint(0, 5000) / 100, rng.choice(["a", "b", "c"]))
+    rules = [
+        BulkRule(catalog.product(3), 2, 1),
+        BulkRule(catalog.product(7), 1, 1),
+        CategoryPercentRule("b", 12.5),
+        CategoryPercentRule("c", 15),
+        ThresholdRule(50, 5),
+    ]
+    orders = [
+        Order(
+            f"cart-{i}",
+            tuple((rng.randrange(30), rng.randint(1, 9)) for _ in range(rng.randint(0, 6))),
+            rng.choice([0, 10, 33.3]),
+        )
+        for i in range(300)
+    ]
+    return catalog, rules, orders
+
+
+class TestRowPricing:
+    """Raw rows must price like carts built from the same lines."""
+    
+    def test_empty_batch(self):
+        """No carts gives no totals."""
+        assert price_rows(RowBatch(), ProductCatalog()) == []
+    
+    def test_rows_match_carts(self):
+        """Orders priced as rows equal price_order() for each one."""
+        catalog, rules, orders = random_orders()
+        
+        totals = price_rows(RowBatch.from_orders(orders), catalog, rules)
+        
+        assert totals == [price_order(order, catalog, rules) for order in orders]
+    
+    def test_columnar_catalog(self, tmp_path):
+        """Rows can refer to ColumnarCatalog rows without building products."""
+        path = tmp_path / "catalog.csv"
+        path.write_text("name,price,category\nApple,3.00,fruit\nBread,2.25,bakery\n")
+        catalog, errors = ColumnarCatalog.load_csv(path)
+        batch = RowBatch()
+        batch.append([(0, 3), (1, 1), (0, 1)], percent=10)
+        rules = [BulkRule(catalog.product(0), 2, 1)]
+        
+        assert price_rows(batch, catalog, rules) == [1012]
+        assert len(batch.product_ids) == 2
+    
+    def test_invalid_product_ids_are_rejected(self):
+        """Negative ids fail on append, unknown ones when pricing."""
+        catalog, rules, _ = random_orders()
+        batch = RowBatch()
+        
+        with pytest.raises(ValueError):
+            batch.append([(-1, 1)])
+        batch.append([(30, 1)])
+        with pytest.raises(IndexError):
+            price_rows(batch, catalog, rules)
+    
+    def test_prices_beyond_int64_products_match_carts(self, tmp_path):
+        """Huge prices times quantities are summed exactly, not wrapped."""
+        path = tmp_path / "catalog.csv"
+        path.write_text("name,price\nBig,92233720368547758.07\nSmall,1.00\n")
+        catalog, _ = ColumnarCatalog.load_csv(path)
+        orders = [Order("a", ((0, 3), (1, 2)), 10), Order("b", ((1, 1),), 0)]
+        
+        totals = price_rows(RowBatch.from_orders(orders), catalog)
+        
+        assert totals == [price_order(order, catalog, []) for order in orders]
+        assert totals[0] > 2**63
+    
+    def test_numpy_subtotals_match_python(self):
+        """The NumPy path prices every line exactly like the pure-Python one."""
+        pytest.importorskip("numpy")
+        catalog, rules, orders = random_orders(seed=7)
+        batch = RowBatch.from_orders(orders)
+        columns = _rule_columns(catalog, PricingPipeline(rules))
+        
+        assert _subtotals_numpy(batch, *columns) == _subtotals_python(batch, *columns)
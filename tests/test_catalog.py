@@ -0,0 +1,283 @@
+"""
+Catalog Tests - interning products through ProductCatalog
+
+Run these tests:
+    pytest tests/test_catalog.py -v
+"""
+
+import pickle
+
+import pytest
+from src.catalog import ColumnarCatalog, ProductCatalog, RowError
+from src.product import Product
+from src.shopping_cart import ShoppingCart
+
+
+class TestProductCatalog:
+    """Tests for the flyweight product catalog."""
+    
+    def test_same_product_is_shared(self):
+        """Requesting the same product twice should return one instance."""
+        catalog = ProductCatalog()
+        
+        first = catalog.get("Apple", 1.50)
+        second = catalog.get("  Apple ", 1.5)
+        
+        assert first is second
+        assert len(catalog) == 1
+    
+    def test_different_category_is_separate(self):
+        """Category is part of the catalog key."""
+        catalog = ProductCatalog()
+        
+        first = catalog.get("Apple", 1.50, category="fruit")
+        second = catalog.get("Apple", 1.50)
+        
+        assert first is not second
+        assert second.category == "general"
+    
+    def test_intern_existing_product(self):
+        """intern should return the catalog's copy of an equal product."""
+        catalog = ProductCatalog()
+        shared = catalog.get("Apple", 1.50)
+        
+        assert catalog.intern(Product("Apple", 1.50)) is shared
+        assert Product("Apple", 1.50) in catalog
+    
+    def test_products_have_stable_ids(self):
+        """Ids are assigned in order and map back to the same product."""
+        catalog = ProductCatalog()
+        apple = catalog.get("Apple", 1.50)
+        bread = catalog.get("Bread", 2.00)
+        
+        assert catalog.id_of(apple) == 0
+        assert catalog.id_of(Product("Bread", 2.00)) == 1
+        assert catalog.product(1) is bread
+        with pytest.raises(ValueError):
+            catalog.id_of(Product("Pear", 1.00))
+        for missing in (-1, 2):
+            with pytest.raises(IndexError):
+                catalog.product(missing)
+    
+    def test_prices_beyond_float_precision_get_their_own_ids(self):
+        """Products are keyed on exact cents, like Product equality."""
+        catalog = ProductCatalog()
+        low = catalog.intern(Product.from_cents("Apple", 2**60))
+        high = catalog.intern(Product.from_cents("Apple", 2**60 + 1))
+        
+        assert low is not high
+        assert catalog.id_of(high) == 1
+        assert catalog.get("Apple", 1.50) is catalog.get("Apple", "1.50")
+    
+    def test_invalid_product_is_not_interned(self):
+        """Validation errors from Product should propagate."""
+        catalog = ProductCatalog()
+        
+        with pytest.raises(ValueError):
+            catalog.get("Apple", -1)
+        assert len(catalog) == 0
+
+
+class TestColumnarCatalog:
+    """Tests for bulk loading products into columns."""
+    
+    def test_load_csv(self, tmp_path):
+        """Valid CSV rows should become columns, with default category."""
+        path = tmp_path / "products.csv"
+        path.write_text("name,price,category\nApple,1.50,fruit\n Bread ,2,\n")
+        
+        catalog, errors = ColumnarCatalog.load_csv(path)
+        
+        assert errors == []
+        assert len(catalog) == 2
+        assert catalog.names == ["Apple", "Bread"]
+        assert list(catalog.prices_cents) == [150, 200]
+        assert catalog.categories == ["fruit", "general"]
+    
+    def test_csv_rows_are_validated_like_product(self, tmp_path):
+        """Invalid rows are reported with their line number and skipped."""
+        path = tmp_path / "products.csv"
+        path.write_text("name,price\nApple,1.50\n   ,1.00\nPear,-1\nFig,abc\n")
+        
+        catalog, errors = ColumnarCatalog.load_csv(path)
+        
+        assert catalog.names == ["Apple"]
+        assert errors == [
+            RowError(3, "Product name cannot be empty"),
+            RowError(4, "Price cannot be negative"),
+            RowError(5, "Price is not a number"),
+        ]
+    
+    def test_out_of_range_prices_are_row_errors(self, tmp_path):
+        """Prices beyond the 64-bit cents column are rejected, not fatal."""
+        path = tmp_path / "products.csv"
+        path.write_text("name,price\nA,1e17\nB,1e30\nC,92233720368547758.07\nD,1.005\n")
+        
+        catalog, errors = ColumnarCatalog.load_csv(path)
+        
+        assert catalog.names == ["C", "D"]
+        assert list(catalog.prices_cents) == [2**63 - 1, 101]
+        assert errors == [RowError(2, "Price is too large"), RowError(3, "Price is too large")]
+    
+    def test_views_keep_exact_cents_beyond_float_precision(self, tmp_path):
+        """A huge price's view has the column's cents and maps back to its row."""
+        path = tmp_path / "products.csv"
+        path.write_text("name,price\nA,90000000000000001.23\n")
+        catalog, errors = ColumnarCatalog.load_csv(path)
+        
+        view = catalog.product(0)
+        
+        assert errors == []
+        assert view.price_cents == catalog.prices_cents[0] == 9000000000000000123
+        assert catalog.id_of(view) == 0
+        assert pickle.loads(pickle.dumps(view)).price_cents == 9000000000000000123
+    
+    def test_bad_category_and_tiny_negative_price_are_row_errors(self, tmp_path):
+        """A non-text category or a sub-cent negative price rejects only its row."""
+        path = tmp_path / "products.jsonl"
+        path.write_text(
+            '{"name": "A", "price": 1, "category": 5}\n'
+            '{"name": "B", "price": "-0.001"}\n'
+            '{"name": "C", "price": -0.001}\n'
+            '{"name": "D", "price": 2}\n'
+        )
+        
+        catalog, errors = ColumnarCatalog.load_jsonl(path)
+        
+        assert catalog.names == ["D"]
+        assert errors == [
+            RowError(1, "Category must be text"),
+            RowError(2, "Price cannot be negative"),
+            RowError(3, "Price cannot be negative"),
+        ]
+    
+    def test_load_jsonl(self, tmp_path):
+        """JSONL rows load the same way; malformed lines are reported."""
+        path = tmp_path / "products.jsonl"
+        path.write_text(
+            '{"name": "Apple", "price": 1.5, "category": "fruit"}\n'
+            "not json\n"
+            "\n"
+            '{"name": "", "price": 3}\n'
+        )
+        
+        catalog, errors = ColumnarCatalog.load_jsonl(path)
+        
+        assert catalog.names == ["Apple"]
+        assert errors == [
+            RowError(2, "Invalid JSON"),
+            RowError(4, "Product name cannot be empty"),
+        ]
+    
+    def test_product_view_is_created_on_add(self, tmp_path):
+        """Adding a row to a cart creates one shared Product view."""
+        path = tmp_path / "products.csv"
+        path.write_text("name,price\nApple,1.50\nBread,2.25\n")
+        catalog, _ = ColumnarCatalog.load_csv(path)
+        cart = ShoppingCart()
+        
+        apple = catalog.add_to_cart(cart, 0, quantity=2)
+        
+        assert apple == Product("Apple", 1.50)
+        assert catalog.product(0) is apple
+        assert catalog.id_of(Product("Bread", 2.25)) == 1
+        assert cart.total() == 3.00
+        for missing in (-1, 2):
+            with pytest.raises(IndexError):
+                catalog.product(missing)
+
+
+class TestCatalogPriceUpdates:
+    """Price changes reach only the open carts that hold the product."""
+    
+    def test_update_price_reprices_tracked_carts(self):
+        """Tracked carts holding the product pick up the new price."""
+        catalog = ProductCatalog()
+        apple = catalog.get("Apple", 3.00)
+        bread = catalog.get("Bread", 2.00)
+        with_apple = ShoppingCart()
+        without_apple = ShoppingCart()
+        catalog.track(with_apple)
+        catalog.track(without_apple)
+        with_apple.add_many([(apple, 3), (bread, 1)])
+        with_apple.set_bulk_discount(apple, buy_quantity=2, free_quantity=1)
+        without_apple.add(bread)
+        with_apple.total()
+        without_apple.total()
+        
+        new_apple = catalog.update_price(catalog.id_of(apple), 4.00)
+        
+        assert with_apple._dirty == {apple, new_apple}
+        assert catalog.id_of(new_apple) == 0
+        assert catalog.product(0) is new_apple
+        assert catalog.version == 1
+        assert with_apple.get_quantity(new_apple) == 3
+        assert with_apple.total() == 10.00
+        assert without_apple._total_valid == True
+        assert catalog.carts_with(0) == [with_apple]
+    
+    def test_untracked_and_emptied_carts_are_not_indexed(self):
+        """Carts leave the reverse index when the line or tracking goes."""
+        catalog = ProductCatalog()
+        apple = catalog.get("Apple", 3.00)
+        cart = ShoppingCart()
+        catalog.track(cart)
+        cart.add(apple)
+        other = ShoppingCart()
+        other.add(apple)
+        
+        cart.remove(apple)
+        
+        assert catalog.carts_with(0) == []
+        catalog.update_price(0, 5.00)
+        assert other.total() == 3.00
+    
+    def test_update_price_rejects_duplicate(self):
+        """Two ids cannot end up as the same product."""
+        catalog = ProductCatalog()
+        catalog.get("Apple", 3.00)
+        catalog.get("Apple", 4.00)
+        
+        with pytest.raises(ValueError):
+            catalog.update_price(0, 4.00)
+    
+    def test_update_price_rejects_unknown_id(self):
+        """A negative or missing id raises instead of repricing another product."""
+        catalog = ProductCatalog()
+        apple = catalog.get("Apple", 3.00)
+        cart = ShoppingCart()
+        catalog.track(cart)
+        cart.add(apple)
+        
+        for missing in (-1, 1):
+            with pytest.raises(IndexError):
+                catalog.update_price(missing, 5.00)
+        assert catalog.product(0) is apple
+        assert cart.total() == 3.00
+    
+    def test_bulk_rule_without_line_follows_price_change(self):
+        """A bulk rule moves to the new product even before the line exists."""
+        catalog = ProductCatalog()
+        apple = catalog.get("Apple", 3.00)
+        cart = ShoppingCart()
+        catalog.track(cart)
+        cart.set_bulk_discount(apple, buy_quantity=1, free_quantity=1)
+        
+        new_apple = catalog.update_price(0, 2.00)
+        cart.add(new_apple, quantity=4)
+        
+        assert cart.total() == 4.00
+    
+    def test_catalog_with_tracked_carts_pickles(self):
+        """Tracked carts are not part of a pickled catalog."""
+        catalog = ProductCatalog()
+        apple = catalog.get("Apple", 3.00)
+        cart = ShoppingCart()
+        catalog.track(cart)
+        cart.add(apple)
+        
+        copy = pickle.loads(pickle.dumps(catalog))
+        
+        assert copy.product(0) == apple
+        assert copy.carts_with(0) == []
+        assert catalog.carts_with(0) == [cart]
@@ -0,0 +1,56 @@
+"""
+Checkout Tests - sharded batch checkout across processes
+
+Run these tests:
+    pytest tests/test_checkout.py -v
+"""
+
+import random
+
+from src.catalog import ProductCatalog
+from src.checkout import Order, checkout_serial, run_batch_checkout, shard_of
+from src.pricing import BulkRule, CategoryPercentRule
+
+
+def make_catalog():
+    catalog = ProductCatalog()
+    for i in range(30):
+        catalog.get(f"P{i}", (i * 37 % 1000) / 100, category="fruit" if i % 3 else "general")
+    return catalog
+
+
+def make_orders(count, seed=340):
+    rng = random.Random(seed)
+    return [
+        Order(
+            f"cart-{i}",
+            tuple((rng.randrange(30), rng.randint(1, 9)) for _ in range(rng.randint(0, 6))),
+            rng.choice([0, 0, 10, 12.5]),
+        )
+        for i in range(count)
+    ]
+
+
+class TestBatchCheckout:
+    """The process pool must match the single-process path exactly."""
+    
+    def test_parallel_matches_serial(self):
+        """Totals and order are identical with 2 workers."""
+        catalog = make_catalog()
+        rules = (BulkRule(catalog.product(1), 2, 1), CategoryPercentRule("fruit", 5))
+        orders = make_orders(300)
+        
+        serial = checkout_serial(orders, catalog, rules)
+        parallel = run_batch_checkout(orders, catalog, rules, workers=2)
+        
+        assert parallel == serial
+        assert [cart_id for cart_id, _ in parallel] == [o.cart_id for o in orders]
+    
+    def test_empty_batch(self):
+        """No orders gives no results."""
+        assert run_batch_checkout([], make_catalog(), workers=2) == []
+    
+    def test_shard_is_stable(self):
+        """Shards come from a fixed hash, not Python's salted hash()."""
+        assert shard_of("cart-1", 8) == shard_of("cart-1", 8)
+        assert 0 <= shard_of("cart-1", 8) < 8
@@ -0,0 +1,95 @@
+"""
+Concurrent Cart Tests - striped locking under many threads
+
+Run these tests:
+    pytest tests/test_concurrent_cart.py -v
+"""
+
+import random
+import threading
+
+import pytest
+from src.concurrent_cart import ConcurrentShoppingCart
+from src.product import Product
+from src.shopping_cart import ShoppingCart
+
+
+class TestConcurrentCartBasics:
+    """The concurrent cart behaves like ShoppingCart on one thread."""
+    
+    def test_matches_shopping_cart(self):
+        """Adds, removes, bulk rules and discounts give the same totals."""
+        apple = Product("Apple", 10.00)
+        orange = Product("Orange", 2.00, category="fruit")
+        carts = [ShoppingCart(), ConcurrentShoppingCart(stripes=4)]
+        for cart in carts:
+            cart.set_bulk_discount(apple, buy_quantity=2, free_quantity=1)
+            cart.add(apple, quantity=4)
+            cart.add_many([(orange, 5), (apple, 2)])
+            cart.remove(orange, quantity=2)
+            cart.set_category_discount("fruit", 50)
+            cart.apply_discount(10)
+        
+        assert carts[1].total_cents() == carts[0].total_cents()
+        assert carts[1].item_count() == carts[0].item_count() == 9
+    
+    def test_remove_missing_product_raises(self):
+        """remove_many fails atomically like ShoppingCart.remove_many."""
+        cart = ConcurrentShoppingCart(stripes=4)
+        apple = Product("Apple", 1.00)
+        cart.add(apple, quantity=2)
+        
+        with pytest.raises(ValueError):
+            cart.remove_many([(apple, 1), (Product("Pear", 1.00), 1)])
+        assert cart.get_quantity(apple) == 2
+
+
+class TestConcurrentCartStress:
+    """Many threads mutating one cart must match a serial replay."""
+    
+    def test_parallel_mutations_match_serial_replay(self):
+        """Final quantities and totals equal replaying every op in order."""
+        products = [Product(f"P{i}", 0.5 + i) for i in range(24)]
+        seed_quantity = 10_000
+        threads_count = 8
+        ops_per_thread = 2_000
+        plans = []
+        for t in range(threads_count):
+            rng = random.Random(t)
+            plans.append([
+                (rng.choice(("add", "remove")), rng.choice(products), rng.randint(1, 3))
+                for _ in range(ops_per_thread)
+            ])
+        
+        def setup(cart):
+            cart.set_bulk_discount(products[0], buy_quantity=2, free_quantity=1)
+            cart.add_many([(p, seed_quantity) for p in products])
+        
+        concurrent = ConcurrentShoppingCart(stripes=8)
+        setup(concurrent)
+        barrier = threading.Barrier(threads_count)
+        totals_seen = []
+        
+        def worker(plan):
+            barrier.wait()
+            for op, product, qty in plan:
+                getattr(concurrent, op)(product, qty)
+            totals_seen.append(concurrent.total_cents())
+        
+        threads = [threading.Thread(target=worker, args=(plan,)) for plan in plans]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        
+        serial = ShoppingCart()
+        setup(serial)
+        for plan in plans:
+            for op, product, qty in plan:
+                getattr(serial, op)(product, qty)
+        
+        for product in products:
+            assert concurrent.get_quantity(product) == serial.get_quantity(product)
+        assert concurrent.item_count() == serial.item_count()
+        assert concurrent.total_cents() == serial.total_cents()
+        assert len(totals_seen) == threads_count
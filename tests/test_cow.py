@@ -0,0 +1,47 @@
+"""
+CowDict Tests - the copy-on-write mapping behind ShoppingCart.fork()
+
+Run these tests:
+    pytest tests/test_cow.py -v
+"""
+
+import pytest
+from src.cow import CowDict
+
+
+class TestCowDict:
+    """Writes go to the overlay; the base is never modified."""
+    
+    def test_reads_fall_through_to_base(self):
+        """Unchanged keys come from the base."""
+        view = CowDict({"a": 1, "b": 2})
+        
+        assert view["a"] == 1
+        assert view.get("c", 0) == 0
+        assert len(view) == 2
+    
+    def test_writes_and_deletes_do_not_touch_base(self):
+        """Set and delete only affect the overlay."""
+        base = {"a": 1, "b": 2}
+        view = CowDict(base)
+        
+        view["a"] = 10
+        view["c"] = 3
+        del view["b"]
+        
+        assert dict(view) == {"a": 10, "c": 3}
+        assert "b" not in view
+        assert len(view) == 2
+        assert base == {"a": 1, "b": 2}
+        with pytest.raises(KeyError):
+            view["b"]
+    
+    def test_shareable_skips_unchanged_layers(self):
+        """An unchanged view shares its base instead of adding a layer."""
+        base = {"a": 1}
+        view = CowDict(base)
+        
+        assert view.shareable() is base
+        view["a"] = 2
+        assert view.shareable() is view
+        assert CowDict(view.shareable()).depth == 2
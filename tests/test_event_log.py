@@ -0,0 +1,114 @@
+"""
+Event Log Tests - event-sourced carts with undo, redo and snapshots
+
+Run these tests:
+    pytest tests/test_event_log.py -v
+"""
+
+import pytest
+from src.event_log import EventSourcedCart
+from src.product import Product
+
+
+class TestEventSourcedCart:
+    """Tests for logging, undo/redo and rebuilding versions."""
+    
+    def test_undo_and_redo(self):
+        """Each change can be reversed and re-applied."""
+        cart = EventSourcedCart()
+        apple = Product("Apple", 3.00)
+        cart.set_bulk_discount(apple, buy_quantity=2, free_quantity=1)
+        cart.add(apple, quantity=3)
+        cart.apply_discount(10)
+        assert cart.total() == 5.40
+        
+        cart.undo()
+        assert cart.total() == 6.00
+        cart.undo()
+        assert cart.is_empty()
+        cart.redo()
+        cart.redo()
+        assert cart.total() == 5.40
+    
+    def test_undo_remove_restores_actual_quantity(self):
+        """Undoing an over-sized remove restores only what was removed."""
+        cart = EventSourcedCart()
+        apple = Product("Apple", 1.00)
+        cart.add(apple, quantity=2)
+        cart.remove(apple, quantity=10)
+        
+        cart.undo()
+        
+        assert cart.get_quantity(apple) == 2
+    
+    def test_undo_discount_restores_previous_rule(self):
+        """Replacing a discount and undoing brings the old one back."""
+        cart = EventSourcedCart()
+        cart.add(Product("Item", 100.00))
+        cart.apply_discount(10)
+        cart.apply_discount(25)
+        cart.remove_discount()
+        
+        cart.undo()
+        assert cart.total() == 75.00
+        cart.undo()
+        assert cart.total() == 90.00
+    
+    def test_new_change_discards_redo(self):
+        """Changing the cart after an undo drops the undone events."""
+        cart = EventSourcedCart()
+        apple = Product("Apple", 1.00)
+        cart.add(apple)
+        cart.add(apple)
+        cart.undo()
+        cart.add(apple, quantity=5)
+        
+        assert cart.can_redo() == False
+        assert cart.get_quantity(apple) == 6
+        assert len(cart.history()) == 2
+    
+    def test_rebuild_any_version_from_snapshots(self):
+        """at_version replays from the nearest snapshot."""
+        cart = EventSourcedCart(snapshot_every=4)
+        products = [Product(f"P{i}", i + 1) for i in range(5)]
+        totals = [cart.total()]
+        for i in range(20):
+            cart.add(products[i % 5], quantity=i % 3 + 1)
+            if i == 10:
+                cart.clear()
+            totals.append(cart.total())
+        
+        for version, expected in enumerate(totals[:11]):
+            assert cart.at_version(version).total() == expected
+        assert cart.at_version(cart.version).total() == cart.total()
+    
+    def test_compact_drops_old_events(self):
+        """After compaction only versions from the last snapshot remain."""
+        cart = EventSourcedCart(snapshot_every=5)
+        apple = Product("Apple", 1.00)
+        for _ in range(12):
+            cart.add(apple)
+        
+        cart.compact()
+        
+        assert len(cart.history()) == 2
+        assert cart.at_version(11).get_quantity(apple) == 11
+        with pytest.raises(IndexError):
+            cart.at_version(4)
+        cart.undo()
+        cart.undo()
+        with pytest.raises(IndexError):
+            cart.undo()
+        assert cart.get_quantity(apple) == 10
+    
+    def test_only_reads_are_passed_through(self):
+        """Mutators the log does not record are not reachable."""
+        cart = EventSourcedCart()
+        apple = Product("Apple", 3.00)
+        cart.add(apple)
+        
+        for name in ("merge", "replace_product", "add_many", "update", "fork"):
+            with pytest.raises(AttributeError):
+                getattr(cart, name)
+        assert cart.total() == 3.00
+        assert cart.get_quantity(apple) == 1
@@ -0,0 +1,100 @@
+"""
+Instrumentation Tests - opt-in call stats for carts
+
+Run these tests:
+    pytest tests/test_instrumentation.py -v
+"""
+
+import pytest
+from src.instrumentation import CartInstrumentation
+from src.product import Product
+from src.shopping_cart import ShoppingCart
+
+
+class TestCartInstrumentation:
+    """Tests for enabling, recording and exporting stats."""
+    
+    def test_disabled_cart_uses_plain_methods(self):
+        """Without instrumentation no wrapper is installed."""
+        cart = ShoppingCart()
+        
+        assert "add" not in vars(cart)
+        assert cart.instrumentation is None
+    
+    def test_counts_calls_and_cart_size(self):
+        """Calls, latency samples and lines at call time are recorded."""
+        cart = ShoppingCart()
+        stats = cart.enable_instrumentation()
+        apple = Product("Apple", 1.50)
+        orange = Product("Orange", 2.00)
+        
+        cart.add(apple, quantity=3)
+        cart.add(orange)
+        cart.remove(apple)
+        assert cart.total() == 5.00
+        assert cart.total() == 5.00
+        
+        data = stats.to_dict()
+        assert data["methods"]["add"]["calls"] == 2
+        assert data["methods"]["remove"]["calls"] == 1
+        assert data["methods"]["add"]["latency_seconds"]["count"] == 2
+        assert data["methods"]["remove"]["lines_at_call"]["sum"] == 2
+        assert data["methods"]["total_cents"]["calls"] == 2
+        assert data["recomputations"] == 1
+        assert data["repriced_lines"] == 2
+    
+    def test_pricing_entry_points_are_recorded(self):
+        """discount_amount and lazy line reads show up in the stats."""
+        cart = ShoppingCart()
+        stats = cart.enable_instrumentation()
+        cart.add(Product("Apple", 1.50), quantity=2)
+        cart.apply_discount(10)
+        
+        assert cart.discount_amount == pytest.approx(0.30)
+        cart.add(Product("Orange", 2.00))
+        list(cart.lines())
+        
+        assert stats.methods["total_cents"].calls >= 1
+        assert stats.methods["total_cents"].latency.count >= 1
+        assert stats.recomputations == 1
+        assert stats.repriced_lines == 2
+    
+    def test_sampling_still_counts_every_call(self):
+        """With sampling only every Nth call is timed."""
+        stats = CartInstrumentation(sample_rate=0.25)
+        cart = ShoppingCart()
+        cart.enable_instrumentation(stats)
+        
+        for _ in range(8):
+            cart.add(Product("Apple", 1.50))
+        
+        assert stats.methods["add"].calls == 8
+        assert stats.methods["add"].latency.count == 2
+    
+    def test_disable_restores_plain_methods(self):
+        """Disabling removes the wrappers and stops recording."""
+        cart = ShoppingCart()
+        stats = cart.enable_instrumentation()
+        cart.disable_instrumentation()
+        
+        cart.add(Product("Apple", 1.50))
+        
+        assert "add" not in vars(cart)
+        assert stats.methods["add"].calls == 0
+    
+    def test_prometheus_export(self):
+        """The text format has counters and cumulative histogram buckets."""
+        cart = ShoppingCart()
+        stats = cart.enable_instrumentation()
+        cart.add(Product("Apple", 1.50))
+        
+        text = stats.to_prometheus()
+        
+        assert 'cart_calls_total{method="add"} 1' in text
+        assert 'cart_call_latency_seconds_bucket{method="add",le="+Inf"} 1' in text
+        assert "# TYPE cart_lines_at_call histogram" in text
+    
+    def test_invalid_sample_rate(self):
+        """The sample rate must be a fraction in (0, 1]."""
+        with pytest.raises(ValueError):
+            CartInstrumentation(sample_rate=0)
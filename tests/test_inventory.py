@@ -0,0 +1,140 @@
+"""
+Inventory Tests - sharded stock with per-cart reservations
+
+Run these tests:
+    pytest tests/test_inventory.py -v
+"""
+
+import threading
+
+import pytest
+from src.inventory import InsufficientStock, Inventory
+from src.product import Product
+from src.shopping_cart import ShoppingCart
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+    
+    def __call__(self):
+        return self.now
+
+
+class TestInventory:
+    """Tests for reservations, expiry and cart integration."""
+    
+    def test_cart_reserves_and_releases(self):
+        """add() reserves stock and remove()/clear() give it back."""
+        inventory = Inventory()
+        apple = Product("Apple", 1.00)
+        inventory.set_stock(apple, 10)
+        cart = ShoppingCart(inventory=inventory)
+        
+        cart.add(apple, quantity=4)
+        assert inventory.available(apple) == 6
+        cart.remove(apple, quantity=1)
+        assert inventory.available(apple) == 7
+        cart.clear()
+        assert inventory.available(apple) == 10
+    
+    def test_failed_add_leaves_cart_unchanged(self):
+        """An add beyond the available stock raises and changes nothing."""
+        inventory = Inventory()
+        apple, bread = Product("Apple", 1.00), Product("Bread", 2.00)
+        inventory.set_stock(apple, 5)
+        inventory.set_stock(bread, 1)
+        cart = ShoppingCart(inventory=inventory)
+        
+        with pytest.raises(InsufficientStock):
+            cart.add_many([(apple, 2), (bread, 2)])
+        
+        assert cart.is_empty()
+        assert inventory.available(apple) == 5
+    
+    def test_update_reserves_only_the_difference(self):
+        """update() reserves increases and releases decreases."""
+        inventory = Inventory()
+        apple = Product("Apple", 1.00)
+        inventory.set_stock(apple, 10)
+        cart = ShoppingCart(inventory=inventory)
+        cart.add(apple, quantity=3)
+        
+        cart.update([(apple, 8)])
+        assert inventory.available(apple) == 2
+        cart.update([(apple, 1)])
+        assert inventory.available(apple) == 9
+    
+    def test_abandoned_reservations_expire(self):
+        """expire() returns stock whose reservation passed its TTL."""
+        clock = FakeClock()
+        inventory = Inventory(ttl=60, clock=clock)
+        apple = Product("Apple", 1.00)
+        inventory.set_stock(apple, 10)
+        abandoned = ShoppingCart(inventory=inventory)
+        active = ShoppingCart(inventory=inventory)
+        abandoned.add(apple, quantity=4)
+        clock.now = 50
+        active.add(apple, quantity=2)
+        
+        clock.now = 70
+        assert inventory.expire() == 4
+        assert inventory.available(apple) == 8
+        assert inventory.reserved_by(apple, active) == 2
+    
+    def test_commit_removes_sold_units(self):
+        """A committed reservation leaves the stock for good."""
+        inventory = Inventory()
+        apple = Product("Apple", 1.00)
+        inventory.set_stock(apple, 10)
+        cart = ShoppingCart(inventory=inventory)
+        cart.add(apple, quantity=3)
+        
+        inventory.commit(apple, 3, cart)
+        
+        assert inventory.available(apple) == 7
+        assert inventory.reserved_by(apple, cart) == 0
+    
+    def test_commit_after_expiry_reserves_again(self):
+        """An expired hold is re-reserved at commit, or the sale fails."""
+        clock = FakeClock()
+        inventory = Inventory(ttl=60, clock=clock)
+        apple = Product("Apple", 1.00)
+        inventory.set_stock(apple, 5)
+        late = ShoppingCart(inventory=inventory)
+        late.add(apple, quantity=3)
+        clock.now = 100
+        inventory.expire()
+        rival = ShoppingCart(inventory=inventory)
+        rival.add(apple, quantity=4)
+        
+        with pytest.raises(InsufficientStock):
+            inventory.commit(apple, 3, late)
+        rival.remove(apple, quantity=2)
+        inventory.commit(apple, 3, late)
+        
+        assert inventory.available(apple) == 0
+        assert inventory.reserved_by(apple, rival) == 2
+    
+    def test_hot_sku_is_never_oversold(self):
+        """Many threads racing for one SKU reserve exactly the stock."""
+        inventory = Inventory(shards=4)
+        apple = Product("Apple", 1.00)
+        inventory.set_stock(apple, 500)
+        carts = [ShoppingCart(inventory=inventory) for _ in range(8)]
+        
+        def worker(cart):
+            for _ in range(200):
+                try:
+                    cart.add(apple)
+                except InsufficientStock:
+                    pass
+        
+        threads = [threading.Thread(target=worker, args=(cart,)) for cart in carts]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        
+        assert sum(cart.get_quantity(apple) for cart in carts) == 500
+        assert inventory.available(apple) == 0
@@ -0,0 +1,50 @@
+"""
+Money Tests - fixed-point cents arithmetic
+
+Run these tests:
+    pytest tests/test_money.py -v
+"""
+
+from decimal import Decimal
+
+from src.money import from_cents, percent_of, to_cents
+
+
+class TestToCents:
+    """Tests for converting dollar amounts to whole cents."""
+
+    def test_int_dollars(self):
+        """Whole dollars convert without rounding."""
+        assert to_cents(3) == 300
+
+    def test_float_uses_shortest_repr(self):
+        """0.1 should be exactly 10 cents, not a float approximation."""
+        assert to_cents(0.1) == 10
+        assert to_cents(19.99) == 1999
+
+    def test_half_cent_rounds_up(self):
+        """Half a cent rounds away from zero."""
+        assert to_cents("1.005") == 101
+        assert to_cents(Decimal("2.675")) == 268
+
+    def test_from_cents(self):
+        """Cents convert back to a dollar float."""
+        assert from_cents(1999) == 19.99
+
+
+class TestPercentOf:
+    """Tests for taking a percentage of a cents amount."""
+
+    def test_integer_percent(self):
+        """An integer percentage stays exact."""
+        assert percent_of(10000, 10) == 1000
+
+    def test_integer_percent_rounds_half_up(self):
+        """Half a cent rounds up, less than half rounds down."""
+        assert percent_of(5, 10) == 1
+        assert percent_of(4, 10) == 0
+
+    def test_fractional_percent(self):
+        """Fractional percentages round half up too."""
+        assert percent_of(1000, 12.5) == 125
+        assert percent_of(999, 12.5) == 125
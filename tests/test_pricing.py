@@ -0,0 +1,140 @@
+"""
+Pricing Tests - the compiled rule pipeline
+
+Run these tests:
+    pytest tests/test_pricing.py -v
+"""
+
+import pytest
+from src.batch_pricing import RowBatch, price_rows
+from src.catalog import ProductCatalog
+from src.pricing import (
+    BulkRule,
+    CartPercentRule,
+    CategoryPercentRule,
+    PricingPipeline,
+    ThresholdRule,
+)
+from src.product import Product
+from src.shopping_cart import ShoppingCart
+
+
+class TestPricingPipeline:
+    """Tests for rule indexing and evaluation order."""
+    
+    def test_line_applies_bulk_then_category(self):
+        """Bulk units are removed before the category percentage."""
+        apple = Product("Apple", 10.00, category="fruit")
+        pipeline = PricingPipeline([
+            BulkRule(apple, 2, 1),
+            CategoryPercentRule("fruit", 50),
+        ])
+        
+        assert pipeline.line_total(apple, 3) == 1000
+    
+    def test_cart_applies_best_threshold_then_percent(self):
+        """Only the highest threshold reached applies, then the cart percent."""
+        pipeline = PricingPipeline([
+            ThresholdRule(50, 10),
+            ThresholdRule(100, 20),
+            CartPercentRule(50),
+        ])
+        
+        assert pipeline.cart_total(4000) == 2000
+        assert pipeline.cart_total(6000) == 2700
+        assert pipeline.cart_total(10000) == 4000
+    
+    def test_same_key_replaces_rule(self):
+        """A second rule with the same key replaces the first."""
+        pipeline = PricingPipeline([CartPercentRule(10), CartPercentRule(25)])
+        
+        assert pipeline.cart_percent == 25
+        assert pipeline.rules == [CartPercentRule(25)]
+    
+    def test_remove_rule(self):
+        """Removing a rule drops it from its index."""
+        apple = Product("Apple", 3.00)
+        pipeline = PricingPipeline([BulkRule(apple, 2, 1)])
+        
+        pipeline.remove(BulkRule(apple, 2, 1))
+        
+        assert pipeline.line_total(apple, 3) == 900
+        assert pipeline.rules == []
+    
+    def test_invalid_rules_raise(self):
+        """Percentages must be 0-100 and bulk quantities positive."""
+        with pytest.raises(ValueError):
+            CategoryPercentRule("fruit", 101)
+        with pytest.raises(ValueError):
+            BulkRule(Product("Apple", 1.00), 0, 0)
+        with pytest.raises(ValueError):
+            ThresholdRule(-1, 10)
+    
+    def test_non_finite_values_raise(self):
+        """NaN and infinity are rejected instead of breaking every total."""
+        nan = float("nan")
+        for make in (
+            lambda: CartPercentRule(nan),
+            lambda: CategoryPercentRule("fruit", nan),
+            lambda: ThresholdRule(nan, 10),
+            lambda: ThresholdRule(float("inf"), 10),
+            lambda: ThresholdRule(10, nan),
+        ):
+            with pytest.raises(ValueError):
+                make()
+        cart = ShoppingCart()
+        cart.add(Product("Apple", 2.00))
+        with pytest.raises(ValueError):
+            cart.apply_discount(nan)
+        assert cart.total() == 2.00
+
+
+class TestCartPricingRules:
+    """Tests for rules applied through ShoppingCart."""
+    
+    def test_category_discount_reprices_matching_lines(self):
+        """A category rule only changes lines in that category."""
+        cart = ShoppingCart()
+        cart.add(Product("Apple", 2.00, category="fruit"), quantity=2)
+        cart.add(Product("Soap", 5.00), quantity=1)
+        
+        cart.set_category_discount("fruit", 25)
+        
+        assert cart.total() == 8.00
+    
+    def test_threshold_rule(self):
+        """A threshold discount applies once the subtotal reaches it."""
+        cart = ShoppingCart()
+        item = Product("Item", 30.00)
+        cart.add_rule(ThresholdRule(50, 10))
+        cart.add(item)
+        assert cart.total() == 30.00
+        
+        cart.add(item)
+        
+        assert cart.total() == 54.00
+    
+    def test_remove_category_rule(self):
+        """Removing a rule restores full prices."""
+        cart = ShoppingCart()
+        cart.add(Product("Apple", 2.00, category="fruit"), quantity=2)
+        cart.set_category_discount("fruit", 50)
+        
+        cart.remove_rule(CategoryPercentRule("fruit", 0))
+        
+        assert cart.total() == 4.00
+    
+    def test_batch_pricing_uses_same_rules(self):
+        """Batch totals follow category and threshold rules too."""
+        catalog = ProductCatalog()
+        apple = catalog.get("Apple", 2.00, category="fruit")
+        rules = [CategoryPercentRule("fruit", 10), ThresholdRule(50, 5)]
+        cart = ShoppingCart()
+        cart.add(apple, quantity=30)
+        for rule in rules:
+            cart.add_rule(rule)
+        cart.apply_discount(10)
+        batch = RowBatch()
+        batch.append([(0, 30)], percent=10)
+        
+        assert price_rows(batch, catalog, rules) == [cart.total_cents()]
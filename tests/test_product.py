@@ -11,6 +11,9 @@ Run these tests:
     pytest tests/test_product.py -v
 """
 
+import copy
+import pickle
+
 import pytest
 from src.product import Product
 
@@ -50,6 +53,19 @@ class TestProductCreation:
         assert isinstance(product.price, float)
         assert product.price == 1.0
 
+    def test_product_price_in_cents(self):
+        """Price should also be available as exact integer cents."""
+        product = Product("Banana", 0.29)
+
+        assert product.price_cents == 29
+
+    def test_product_from_cents(self):
+        """A product can be created directly from a cents price."""
+        product = Product.from_cents("Banana", 129)
+
+        assert product.price == 1.29
+        assert product.price_cents == 129
+
 
 # =============================================================================
 # VALIDATION TESTS
@@ -65,6 +81,14 @@ class TestProductValidation:
         
         assert "negative" in str(exc_info.value).lower()
     
+    def test_unrepresentable_price_raises_value_error(self):
+        """Infinite, NaN or huge prices should raise ValueError."""
+        for price in (float("inf"), float("nan"), 1e26):
+            with pytest.raises(ValueError) as exc_info:
+                Product("Apple", price)
+            
+            assert "price" in str(exc_info.value).lower()
+    
     def test_zero_price_is_allowed(self):
         """Zero price should be allowed (e.g., for free samples)."""
         product = Product("Free Sample", 0)
@@ -116,6 +140,23 @@ class TestProductEquality:
         
         assert product1 != product2
     
+    def test_prices_beyond_float_precision_are_distinct(self):
+        """Equality and hash use exact cents, not the float price."""
+        product1 = Product.from_cents("Apple", 2**60)
+        product2 = Product.from_cents("Apple", 2**60 + 1)
+        
+        assert product1 != product2
+        assert len({product1, product2}) == 2
+    
+    def test_pickle_and_copy_keep_identity(self):
+        """A copied product keeps its price, cents and equality."""
+        for product in (Product("Apple", 1.005), Product.from_cents("Apple", 2**60 + 1)):
+            for clone in (pickle.loads(pickle.dumps(product)), copy.copy(product)):
+                assert clone == product
+                assert clone.price == product.price
+                assert clone.price_cents == product.price_cents
+                assert hash(clone) == hash(product)
+    
     def test_product_not_equal_to_non_product(self):
         """A product should not be equal to non-Product objects."""
         product = Product("Apple", 1.50)
@@ -170,3 +211,35 @@ class TestProductHash:
         inventory = {product: 100}
         
         assert inventory[product] == 100
+
+
+# =============================================================================
+# IMMUTABILITY TESTS
+# =============================================================================
+
+class TestProductImmutability:
+    """Products are slotted and cannot change after creation."""
+    
+    def test_product_has_no_instance_dict(self):
+        """Slotted products should not carry a __dict__."""
+        product = Product("Apple", 1.50)
+        
+        assert not hasattr(product, "__dict__")
+    
+    def test_cannot_change_price(self):
+        """Assigning to an attribute should raise AttributeError."""
+        product = Product("Apple", 1.50)
+        
+        with pytest.raises(AttributeError):
+            product.price = 2.00
+    
+    def test_product_survives_pickling(self):
+        """A pickled product should come back equal, with the same hash."""
+        import pickle
+        product = Product("Apple", 1.50, category="fruit")
+        
+        restored = pickle.loads(pickle.dumps(product))
+        
+        assert restored == product
+        assert hash(restored) == hash(product)
+        assert restored.category == "fruit"
@@ -0,0 +1,123 @@
+"""
+Quote Cache Tests - shared totals for carts with identical contents
+
+Run these tests:
+    pytest tests/test_quote_cache.py -v
+"""
+
+import pytest
+from src import quote_cache
+from src.product import Product
+from src.quote_cache import QuoteCache
+from src.shopping_cart import ShoppingCart
+
+
+def bundle(cache, order=1):
+    cart = ShoppingCart(quote_cache=cache)
+    apple = Product("Apple", 3.00)
+    lines = [(apple, 3), (Product("Bread", 2.00), 1)]
+    cart.add_many(lines[::order])
+    cart.set_bulk_discount(apple, buy_quantity=2, free_quantity=1)
+    return cart
+
+
+class TestQuoteCache:
+    """Tests for fingerprinting, LRU eviction and invalidation."""
+    
+    def test_identical_carts_share_a_quote(self):
+        """The second cart with the same contents hits the cache."""
+        cache = QuoteCache()
+        first = bundle(cache)
+        second = bundle(cache, order=-1)
+        
+        assert first.total() == 8.00
+        assert second.total() == 8.00
+        assert cache.hits == 1
+        assert cache.misses == 1
+        assert second.recomputations == 0
+    
+    def test_rules_are_part_of_the_key(self):
+        """A cart with a different bulk rule does not reuse the quote."""
+        cache = QuoteCache()
+        bundle(cache).total()
+        other = bundle(cache)
+        other.set_bulk_discount(Product("Apple", 3.00), buy_quantity=1, free_quantity=1)
+        
+        assert other.total() == 8.00
+        assert cache.misses == 2
+    
+    def test_lru_eviction(self):
+        """Beyond maxsize the least recently used quote is dropped."""
+        cache = QuoteCache(maxsize=2)
+        for price in (1, 2, 3):
+            cart = ShoppingCart(quote_cache=cache)
+            cart.add(Product("Item", price))
+            cart.total()
+        
+        assert len(cache) == 2
+        assert cache.evictions == 1
+    
+    def test_clear(self):
+        """clear() drops every quote and keeps the counters."""
+        cache = QuoteCache()
+        bundle(cache).total()
+        
+        cache.clear()
+        
+        assert len(cache) == 0
+        assert bundle(cache).total() == 8.00
+        assert cache.stats()["misses"] == 2
+    
+    def test_moving_units_between_lines_changes_the_key(self):
+        """Same lines and unit count, different split: never a shared quote."""
+        cache = QuoteCache()
+        apple = Product("Apple", 1.00)
+        laptop = Product("Laptop", 999.99)
+        for total_units in range(2, 22):
+            for apples in range(1, total_units):
+                cart = ShoppingCart(quote_cache=cache)
+                cart.add(apple, apples)
+                cart.add(laptop, total_units - apples)
+                expected = apples * 100 + (total_units - apples) * 99999
+                assert cart.total_cents() == expected
+        assert cache.hits == 0
+    
+    def test_moving_free_units_between_rules_changes_the_key(self):
+        """Rules with swapped quantities do not share a quote either."""
+        cache = QuoteCache()
+        apple = Product("Apple", 1.00)
+        pear = Product("Pear", 1.00)
+        
+        def cart(apple_buy, pear_buy):
+            c = ShoppingCart(quote_cache=cache)
+            c.add(apple, 6)
+            c.add(pear, 6)
+            c.set_bulk_discount(apple, buy_quantity=apple_buy, free_quantity=1)
+            c.set_bulk_discount(pear, buy_quantity=pear_buy, free_quantity=1)
+            return c
+        
+        assert cart(1, 2).total() == 7.00
+        assert cart(2, 1).total() == 7.00
+        assert cart(2, 5).total() == 9.00
+        assert cache.hits == 0
+    
+    def test_size_must_be_positive(self):
+        """A cache needs room for at least one quote."""
+        with pytest.raises(ValueError):
+            QuoteCache(maxsize=0)
+    
+    def test_key_update_does_not_touch_other_lines(self, monkeypatch):
+        """add + total on a large cached cart digests only the changed line."""
+        cache = QuoteCache()
+        cart = ShoppingCart(quote_cache=cache)
+        cart.add_many((Product(f"Item {i}", 1.00), 1) for i in range(1000))
+        cart.total()
+        calls = []
+        real_digest = quote_cache.digest
+        monkeypatch.setattr(quote_cache, "digest",
+                            lambda parts: calls.append(parts) or real_digest(parts))
+        
+        cart.add(Product("Extra", 1.00))
+        assert cart.total() == 1001.00
+        
+        assert calls == [("Extra", 100, "general")]
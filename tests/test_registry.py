@@ -0,0 +1,180 @@
+"""
+Registry Tests - per-session carts with TTL, budget and spilling
+
+Run these tests:
+    pytest tests/test_registry.py -v
+"""
+
+import pytest
+from src.catalog import ProductCatalog
+from src.product import Product
+from src.inventory import Inventory
+from src.registry import CART_BYTES, LINE_BYTES, CartRegistry, DirectoryStore, estimate_size
+from src.shopping_cart import ShoppingCart
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+    
+    def __call__(self):
+        return self.now
+
+
+class TestCartRegistry:
+    """Tests for lookup, eviction, spilling and metrics."""
+    
+    def test_same_session_same_cart(self):
+        """get() creates a cart once and returns it afterwards."""
+        registry = CartRegistry()
+        cart = registry.get("s1")
+        
+        assert registry.get("s1") is cart
+        assert registry.get("s2") is not cart
+        assert registry.get("s3", create=False) is None
+        assert len(registry) == 2
+    
+    def test_idle_carts_expire(self):
+        """Carts idle past the TTL are evicted; recent ones stay."""
+        clock = FakeClock()
+        registry = CartRegistry(ttl=60, clock=clock)
+        registry.get("old")
+        clock.now = 40
+        registry.get("new")
+        
+        clock.now = 70
+        assert registry.evict_expired() == 1
+        assert "old" not in registry
+        assert "new" in registry
+    
+    def test_budget_evicts_least_recently_used(self):
+        """Over budget, the least recently used cart goes first."""
+        catalog = ProductCatalog()
+        apple = catalog.get("Apple", 1.00)
+        registry = CartRegistry(memory_budget=3 * CART_BYTES + LINE_BYTES)
+        for session in ("a", "b", "c"):
+            registry.get(session)
+        registry.get("a")
+        
+        registry.get("c").add(apple)
+        registry.get("d")
+        
+        assert "b" not in registry
+        assert all(session in registry for session in ("a", "c", "d"))
+        assert registry.resident_bytes <= registry.memory_budget
+    
+    def test_spilled_cart_reloads_lazily(self, tmp_path):
+        """An evicted cart is written to the store and read back on access."""
+        catalog = ProductCatalog()
+        apple = catalog.get("Apple", 2.00)
+        clock = FakeClock()
+        store = DirectoryStore(str(tmp_path), catalog)
+        registry = CartRegistry(ttl=10, store=store, clock=clock)
+        cart = registry.get("s1")
+        cart.add(apple, quantity=3)
+        cart.apply_discount(10)
+        
+        clock.now = 20
+        registry.evict_expired()
+        assert "s1" not in registry
+        
+        reloaded = registry.get("s1")
+        assert reloaded.get_quantity(apple) == 3
+        assert reloaded.total() == 5.40
+        metrics = registry.metrics()
+        assert metrics["spills"] == 1
+        assert metrics["reloads"] == 1
+        assert metrics["reload_latency"]["count"] == 1
+        assert metrics["resident_carts"] == 1
+    
+    def test_discard_removes_spilled_copy(self, tmp_path):
+        """discard() forgets the session in memory and on disk."""
+        catalog = ProductCatalog()
+        store = DirectoryStore(str(tmp_path), catalog)
+        registry = CartRegistry(memory_budget=CART_BYTES, store=store)
+        registry.get("s1").add(catalog.get("Apple", 1.00))
+        registry.get("s2")
+        
+        registry.discard("s1")
+        
+        assert registry.get("s1", create=False) is None
+    
+    def test_size_grows_with_distinct_lines(self):
+        """Size is estimated from distinct lines, not units."""
+        catalog = ProductCatalog()
+        registry = CartRegistry()
+        cart = registry.get("s1")
+        cart.add(catalog.get("Apple", 1.00), quantity=50)
+        cart.add(catalog.get("Bread", 1.00))
+        registry.get("s1")
+        
+        assert estimate_size(cart) == CART_BYTES + 2 * LINE_BYTES
+        assert registry.metrics()["resident_bytes"] == estimate_size(cart)
+    
+    def test_failed_spill_keeps_the_cart(self, tmp_path):
+        """If save() fails the cart stays resident and other sessions work."""
+        catalog = ProductCatalog()
+        store = DirectoryStore(str(tmp_path), catalog)
+        registry = CartRegistry(memory_budget=CART_BYTES, store=store)
+        stray = Product("Stray", 1.00)      # not in the catalog
+        registry.get("a").add(stray)
+        
+        registry.get("b")
+        
+        assert registry.get("a").get_quantity(stray) == 1
+        assert registry.metrics()["spill_errors"] >= 1
+    
+    def test_reloaded_cart_comes_from_the_factory(self, tmp_path):
+        """A reloaded cart keeps the factory's inventory and its reservations."""
+        catalog = ProductCatalog()
+        apple = catalog.get("Apple", 1.00)
+        inventory = Inventory()
+        inventory.set_stock(apple, 10)
+        clock = FakeClock()
+        registry = CartRegistry(
+            ttl=10, store=DirectoryStore(str(tmp_path), catalog), clock=clock,
+            cart_factory=lambda: ShoppingCart(inventory=inventory),
+        )
+        registry.get("s1").add(apple, quantity=3)
+        
+        clock.now = 20
+        registry.evict_expired()
+        assert inventory.available(apple) == 10
+        
+        cart = registry.get("s1")
+        assert cart.inventory is inventory
+        assert inventory.available(apple) == 7
+        cart.add(apple, quantity=2)
+        assert inventory.available(apple) == 5
+    
+    def test_reload_keeps_only_stock_still_available(self, tmp_path):
+        """Units sold while a cart was spilled are dropped, not an error."""
+        catalog = ProductCatalog()
+        apple = catalog.get("Apple", 1.00)
+        bread = catalog.get("Bread", 2.00)
+        inventory = Inventory()
+        inventory.set_stock(apple, 5)
+        inventory.set_stock(bread, 1)
+        clock = FakeClock()
+        registry = CartRegistry(
+            ttl=10, store=DirectoryStore(str(tmp_path), catalog), clock=clock,
+            cart_factory=lambda: ShoppingCart(inventory=inventory),
+        )
+        registry.get("s1").add_many([(apple, 4), (bread, 1)])
+        
+        clock.now = 20
+        registry.evict_expired()
+        registry.get("s2").add_many([(apple, 3), (bread, 1)])
+        
+        cart = registry.get("s1")
+        assert cart.get_quantity(apple) == 2
+        assert cart.contains(bread) == False
+        assert inventory.available(apple) == 0
+        assert inventory.reserved_by(apple, cart) == 2
+        assert registry.metrics()["unreserved_units"] == 3
+        assert registry.get("s1") is cart
+    
+    def test_budget_must_be_positive(self):
+        """A registry needs room for at least one cart."""
+        with pytest.raises(ValueError):
+            CartRegistry(memory_budget=0)
@@ -0,0 +1,112 @@
+"""
+Replay Tests - streaming JSONL cart-operation replay
+
+Run these tests:
+    pytest tests/test_replay.py -v
+"""
+
+import io
+import json
+
+from src.catalog import ProductCatalog
+from src.replay import ReplayStats, parse_events, read_lines, replay, replay_file
+
+
+def make_catalog():
+    catalog = ProductCatalog()
+    catalog.get("Apple", 3.00)
+    catalog.get("Orange", 2.00)
+    return catalog
+
+
+def write_log(path, events):
+    path.write_text("".join(json.dumps(e) + "\n" for e in events) + "not json\n")
+
+
+class TestReplay:
+    """Tests for the generator pipeline."""
+    
+    def test_read_lines_joins_chunks(self):
+        """Lines split across chunk boundaries are reassembled."""
+        text = "first line\nsecond\n\nlast"
+        
+        assert list(read_lines(io.StringIO(text), chunk_size=3)) == [
+            "first line", "second", "", "last",
+        ]
+    
+    def test_replay_file(self, tmp_path):
+        """Totals are written per cart at checkout and for open carts."""
+        log = tmp_path / "events.jsonl"
+        out = tmp_path / "totals.jsonl"
+        write_log(log, [
+            {"cart": "a", "op": "bulk", "product": 0, "buy": 2, "free": 1},
+            {"cart": "a", "op": "add", "product": 0, "qty": 3},
+            {"cart": "b", "op": "add", "product": 1, "qty": 5},
+            {"cart": "a", "op": "discount", "percent": 10},
+            {"cart": "a", "op": "checkout"},
+            {"cart": "b", "op": "remove", "product": 0},
+            {"cart": "b", "op": "remove", "product": 1, "qty": 2},
+        ])
+        
+        stats = replay_file(log, out, make_catalog(), chunk_size=16)
+        
+        totals = [json.loads(line) for line in out.read_text().splitlines()]
+        assert totals == [
+            {"cart": "a", "total": 5.40, "total_cents": 540, "status": "checkout"},
+            {"cart": "b", "total": 6.00, "total_cents": 600, "status": "open"},
+        ]
+        assert stats.events == 7
+        assert stats.errors == 2
+        assert stats.carts == 2
+        assert stats.events_per_second > 0
+    
+    def test_finished_carts_are_not_kept(self):
+        """Only open carts stay in memory, up to max_open_carts."""
+        catalog = make_catalog()
+        
+        def events():
+            for i in range(1000):
+                yield {"cart": i, "op": "add", "product": 0}
+                yield {"cart": i, "op": "checkout"}
+        
+        finished = replay(events(), catalog, ReplayStats(), max_open_carts=1)
+        
+        assert sum(1 for _ in finished) == 1000
+    
+    def test_lru_eviction_bounds_open_carts(self):
+        """Too many open carts evicts the least recently used one."""
+        stats = ReplayStats()
+        events = [{"cart": i, "op": "add", "product": 0} for i in range(3)]
+        
+        finished = [(cart_id, status) for cart_id, _, status in
+                    replay(events, make_catalog(), stats, max_open_carts=2)]
+        
+        assert finished == [(0, "evicted"), (1, "open"), (2, "open")]
+    
+    def test_events_after_eviction_mark_the_cart_partial(self):
+        """A cart resumed after eviction is never reported as a full total."""
+        stats = ReplayStats()
+        events = [
+            {"cart": "c", "op": "add", "product": 0},
+            {"cart": "d", "op": "add", "product": 1},
+            {"cart": "c", "op": "add", "product": 0},
+            {"cart": "c", "op": "checkout"},
+        ]
+        
+        finished = [(cart_id, cart.total_cents(), status) for cart_id, cart, status in
+                    replay(events, make_catalog(), stats, max_open_carts=1)]
+        
+        assert finished == [("c", 300, "evicted"), ("d", 200, "evicted"),
+                            ("c", 300, "partial")]
+        assert stats.partial_carts == 1
+    
+    def test_unhashable_cart_id_is_an_error(self):
+        """A cart id that is not a string or integer is skipped, not fatal."""
+        stats = ReplayStats()
+        lines = ['{"cart": [1], "op": "add", "product": 0}',
+                 '{"cart": "a", "op": "add", "product": 0}']
+        
+        finished = list(replay(parse_events(lines, stats), make_catalog(), stats))
+        
+        assert [cart_id for cart_id, _, _ in finished] == ["a"]
+        assert stats.errors == 1
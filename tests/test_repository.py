@@ -0,0 +1,140 @@
+"""
+Repository Tests - SQLite persistence with write-behind batching
+
+Run these tests:
+    pytest tests/test_repository.py -v
+"""
+
+import time
+
+import pytest
+from src.catalog import ProductCatalog
+from src.pricing import ThresholdRule
+from src.product import Product
+from src.repository import CartRepository
+
+
+@pytest.fixture
+def catalog():
+    catalog = ProductCatalog()
+    catalog.get("Apple", 3.00, category="fruit")
+    catalog.get("Bread", 2.25)
+    return catalog
+
+
+class TestCartRepository:
+    """Tests for saving and reloading carts."""
+    
+    def test_cart_survives_reopen(self, tmp_path, catalog):
+        """Lines and all discount state come back after a restart."""
+        path = tmp_path / "carts.db"
+        apple, bread = catalog.product(0), catalog.product(1)
+        with CartRepository(path, catalog) as repo:
+            repo.add("alice", apple, 6)
+            repo.add("alice", bread, 2)
+            repo.remove("alice", apple, 1)
+            repo.set_bulk_discount("alice", apple, 2, 1)
+            repo.add_rule("alice", ThresholdRule(10, 5))
+            repo.apply_discount("alice", 12.5)
+            expected = repo.get("alice").total_cents()
+        
+        with CartRepository(path, catalog) as repo:
+            cart = repo.get("alice")
+            assert cart.get_quantity(apple) == 5
+            assert cart.get_quantity(bread) == 2
+            assert cart.total_cents() == expected
+    
+    def test_changes_are_written_on_flush(self, tmp_path, catalog):
+        """Mutations are buffered until flush or the batch size is reached."""
+        path = tmp_path / "carts.db"
+        apple = catalog.product(0)
+        writer = CartRepository(path, catalog, batch_size=1000, flush_interval=60)
+        reader = CartRepository(path, catalog)
+        for _ in range(10):
+            writer.add("bob", apple, 1)
+        
+        assert reader.get("bob").is_empty()
+        
+        writer.flush()
+        reader.evict("bob")
+        assert reader.get("bob").get_quantity(apple) == 10
+        writer.close()
+        reader.close()
+    
+    def test_removed_line_is_deleted(self, tmp_path, catalog):
+        """A line removed completely is gone after reloading."""
+        path = tmp_path / "carts.db"
+        apple = catalog.product(0)
+        with CartRepository(path, catalog, batch_size=1) as repo:
+            repo.add("carol", apple, 2)
+            repo.remove("carol", apple, 2)
+        
+        with CartRepository(path, catalog) as repo:
+            assert repo.get("carol").contains(apple) == False
+    
+    def test_writer_thread_flushes_in_the_background(self, tmp_path, catalog):
+        """A full batch, or the flush interval, is written without flush()."""
+        path = tmp_path / "carts.db"
+        apple = catalog.product(0)
+        by_size = CartRepository(path, catalog, batch_size=5, flush_interval=60)
+        by_time = CartRepository(path, catalog, batch_size=1000, flush_interval=0.01)
+        reader = CartRepository(path, catalog)
+        for _ in range(5):
+            by_size.add("dave", apple, 1)
+        by_time.add("erin", apple, 2)
+        
+        deadline = time.monotonic() + 5
+        while time.monotonic() < deadline:
+            reader.evict("dave")
+            reader.evict("erin")
+            if reader.get("dave").get_quantity(apple) == 5 and \
+                    reader.get("erin").get_quantity(apple) == 2:
+                break
+            time.sleep(0.01)
+        
+        assert reader.get("dave").get_quantity(apple) == 5
+        assert reader.get("erin").get_quantity(apple) == 2
+        for repo in (by_size, by_time, reader):
+            repo.close()
+    
+    def test_unknown_product_is_rejected_before_the_cart_changes(self, tmp_path, catalog):
+        """A product with no catalog id raises at once and blocks no flush."""
+        path = tmp_path / "carts.db"
+        apple = catalog.product(0)
+        stray = Product("Stray", 1.00)
+        with CartRepository(path, catalog, batch_size=1) as repo:
+            with pytest.raises(ValueError):
+                repo.add("bob", stray)
+            with pytest.raises(ValueError):
+                repo.set_bulk_discount("bob", stray, 2, 1)
+            assert repo.get("bob").is_empty()
+            repo.add("alice", apple, 2)
+        
+        with CartRepository(path, catalog) as repo:
+            assert repo.get("alice").get_quantity(apple) == 2
+    
+    def test_row_without_an_id_does_not_block_other_carts(self, tmp_path, catalog):
+        """A line whose product lost its id is dropped; the rest is written."""
+        path = tmp_path / "carts.db"
+        apple, bread = catalog.product(0), catalog.product(1)
+        
+        class RetiringCatalog:
+            retired = set()
+            product = staticmethod(catalog.product)
+            
+            def id_of(self, product):
+                if product in self.retired:
+                    raise ValueError(f"{product!r} is not in the catalog")
+                return catalog.id_of(product)
+        
+        retiring = RetiringCatalog()
+        with CartRepository(path, retiring, batch_size=1000, flush_interval=60) as repo:
+            repo.add("bob", bread)
+            repo.add("alice", apple, 2)
+            retiring.retired.add(bread)
+            repo.flush()
+            assert repo.dropped_rows == 1
+        
+        with CartRepository(path, catalog) as repo:
+            assert repo.get("alice").get_quantity(apple) == 2
+            assert repo.get("bob").is_empty()
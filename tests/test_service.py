@@ -0,0 +1,146 @@
+"""
+Service Tests - the asyncio cart service and its line protocol
+
+Run these tests:
+    pytest tests/test_service.py -v
+"""
+
+import asyncio
+
+import pytest
+from src.catalog import ProductCatalog
+from src.service import CartClient, CartService, CartServiceError
+
+
+@pytest.fixture
+def catalog():
+    catalog = ProductCatalog()
+    catalog.get("Apple", 3.00)
+    catalog.get("Orange", 2.00)
+    return catalog
+
+
+class TestCartService:
+    """Tests for the coroutine API and coalescing."""
+    
+    def test_operations_in_one_tick_are_coalesced(self, catalog):
+        """Adds issued together become one bulk mutation and one repricing."""
+        apple, orange = catalog.product(0), catalog.product(1)
+        service = CartService(catalog)
+        
+        async def scenario():
+            await service.set_bulk_discount("a", apple, 2, 1)
+            adds = [service.add("a", apple, 1) for _ in range(6)]
+            adds.append(service.add("a", orange, 2))
+            await asyncio.gather(*adds)
+            return await service.total("a")
+        
+        assert asyncio.run(scenario()) == 16.00
+        assert service.operations == 9
+        assert service.batches == 2
+        assert service.cart("a").recomputations == 1
+    
+    def test_per_cart_order_is_preserved(self, catalog):
+        """A total queued between mutations sees only the earlier ones."""
+        apple = catalog.product(0)
+        service = CartService(catalog)
+        
+        async def scenario():
+            return await asyncio.gather(
+                service.add("a", apple, 2),
+                service.total("a"),
+                service.remove("a", apple, 1),
+                service.total("a"),
+            )
+        
+        assert asyncio.run(scenario()) == [None, 6.00, None, 3.00]
+    
+    def test_error_goes_to_its_own_request(self, catalog):
+        """A failing remove does not fail the others in its batch."""
+        apple, orange = catalog.product(0), catalog.product(1)
+        service = CartService(catalog)
+        
+        async def scenario():
+            await service.add("a", apple, 1)
+            return await asyncio.gather(
+                service.remove("a", apple, 1),
+                service.remove("a", apple, 1),
+                service.remove("a", orange, 1),
+                return_exceptions=True,
+            )
+        
+        results = asyncio.run(scenario())
+        
+        assert results[0] is None
+        assert isinstance(results[1], ValueError)
+        assert isinstance(results[2], ValueError)
+    
+    def test_bad_argument_does_not_stall_the_queue(self, catalog):
+        """A malformed request fails alone; the total queued after it answers."""
+        apple = catalog.product(0)
+        service = CartService(catalog)
+        
+        async def scenario():
+            return await asyncio.wait_for(asyncio.gather(
+                service.add("c", apple, 1),
+                service.add("c", "x"),
+                service.total("c"),
+                return_exceptions=True,
+            ), timeout=1)
+        
+        results = asyncio.run(scenario())
+        
+        assert results[0] is None
+        assert isinstance(results[1], TypeError)
+        assert results[2] == 3.00
+        assert service.cart("c").get_quantity(apple) == 1
+        assert service.cart("c").item_count() == 1
+
+
+class TestLineProtocol:
+    """Tests for the TCP and Unix socket protocol with CartClient."""
+    
+    def test_tcp_round_trip(self, catalog):
+        """Requests over TCP are answered in order."""
+        service = CartService(catalog)
+        
+        async def scenario():
+            server = await service.start_server()
+            port = server.sockets[0].getsockname()[1]
+            client = await CartClient.connect("127.0.0.1", port)
+            await asyncio.gather(
+                client.set_bulk_discount("a", 0, 2, 1),
+                client.add("a", 0, 3),
+                client.add("a", 1),
+            )
+            await client.apply_discount("a", 10)
+            total = await client.total("a")
+            with pytest.raises(CartServiceError):
+                await client.request("FROB a")
+            with pytest.raises(CartServiceError):
+                await client.remove("b", 0)
+            with pytest.raises(CartServiceError):
+                await client.add("a", -1, 2)
+            await client.close()
+            server.close()
+            await server.wait_closed()
+            return total
+        
+        assert asyncio.run(scenario()) == 7.20
+    
+    def test_unix_socket(self, catalog, tmp_path):
+        """The same protocol works over a Unix socket."""
+        service = CartService(catalog)
+        path = str(tmp_path / "cart.sock")
+        
+        async def scenario():
+            server = await service.start_unix_server(path)
+            client = await CartClient.connect_unix(path)
+            await client.add("a", 1, 2)
+            total = await client.total("a")
+            await client.close()
+            server.close()
+            await server.wait_closed()
+            return total
+        
+        assert asyncio.run(scenario()) == 4.00
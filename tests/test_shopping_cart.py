@@ -353,7 +353,6 @@ class TestExercise7_BulkDiscounts:
 class TestBonus_EdgeCases:
     """Extra credit! These test some tricky edge cases."""
     
-    @pytest.mark.skip(reason="Bonus 1")
     def test_cart_summary_string(self):
         """Cart should provide a readable summary."""
         cart = ShoppingCart()
@@ -363,7 +362,6 @@ class TestBonus_EdgeCases:
         assert "Apple" in summary
         assert "Banana" in summary
     
-    @pytest.mark.skip(reason="Bonus 2")
     def test_cart_is_iterable(self):
         """Should be able to iterate over cart items."""
         cart = ShoppingCart()
@@ -375,7 +373,6 @@ class TestBonus_EdgeCases:
         assert apple in products
         assert banana in products
     
-    @pytest.mark.skip(reason="Bonus 3")
     def test_cart_with_free_products(self):
         """Cart should handle products with zero price."""
         cart = ShoppingCart()
@@ -383,3 +380,416 @@ class TestBonus_EdgeCases:
         cart.add(Product("Paid Item", 10.00))
         assert cart.item_count() == 6
         assert cart.total() == 10.00
+
+
+# =============================================================================
+# QUANTITY STORAGE
+# =============================================================================
+
+class TestQuantityStorage:
+    """The cart stores one entry per distinct product, not per unit."""
+
+    def test_large_quantity_is_stored_as_single_line(self):
+        """Adding many units should not expand them one by one."""
+        cart = ShoppingCart()
+        apple = Product("Apple", 1.50)
+        cart.add(apple, quantity=100_000)
+        assert cart.item_count() == 100_000
+        assert cart.get_quantity(apple) == 100_000
+        assert len(cart._quantities) == 1
+
+    def test_items_expands_units_for_compatibility(self):
+        """The items view should still list one entry per unit."""
+        cart = ShoppingCart()
+        apple = Product("Apple", 1.50)
+        banana = Product("Banana", 0.75)
+        cart.add(apple, quantity=2)
+        cart.add(banana)
+        assert sorted(p.name for p in cart.items) == ["Apple", "Apple", "Banana"]
+
+    def test_partial_remove_keeps_remaining_quantity(self):
+        """Removing some units should leave the rest in the cart."""
+        cart = ShoppingCart()
+        apple = Product("Apple", 1.50)
+        cart.add(apple, quantity=5)
+        cart.remove(apple, quantity=2)
+        assert cart.get_quantity(apple) == 3
+        assert cart.total() == 4.50
+
+    def test_adding_zero_quantity_does_not_create_line(self):
+        """A zero-quantity add should leave the cart unchanged."""
+        cart = ShoppingCart()
+        apple = Product("Apple", 1.50)
+        cart.add(apple, quantity=0)
+        assert cart.contains(apple) == False
+        assert cart.is_empty() == True
+
+    def test_non_integer_quantity_is_rejected(self):
+        """Fractional or boolean quantities should raise and change nothing."""
+        cart = ShoppingCart()
+        apple = Product("Apple", 1.50)
+        cart.add(apple, quantity=2)
+        with pytest.raises(TypeError):
+            cart.add(apple, quantity=1.5)
+        with pytest.raises(TypeError):
+            cart.add(apple, quantity=True)
+        with pytest.raises(TypeError):
+            cart.remove(apple, quantity=0.5)
+        with pytest.raises(TypeError):
+            cart.add("Apple")
+        assert cart.item_count() == 2
+        assert cart.total_cents() == 300
+
+
+# =============================================================================
+# INCREMENTAL LINE PRICING
+# =============================================================================
+
+class TestIncrementalLinePricing:
+    """Each line keeps its own subtotal, so bulk rules hold on every change."""
+
+    def test_remove_reapplies_bulk_discount(self):
+        """Removing units from a bulk line should reprice that line."""
+        cart = ShoppingCart()
+        apple = Product("Apple", 3.00)
+        cart.set_bulk_discount(apple, buy_quantity=2, free_quantity=1)
+        cart.add(apple, quantity=6)
+        cart.remove(apple)
+        assert cart.total() == 12.00
+
+    def test_setting_bulk_discount_reprices_existing_line(self):
+        """A bulk rule set after adding should apply to the current quantity."""
+        cart = ShoppingCart()
+        apple = Product("Apple", 3.00)
+        cart.add(apple, quantity=3)
+        cart.set_bulk_discount(apple, buy_quantity=2, free_quantity=1)
+        assert cart.total() == 6.00
+
+    def test_add_after_discount_keeps_discount(self):
+        """Items added after a percentage discount are discounted too."""
+        cart = ShoppingCart()
+        apple = Product("Apple", 10.00)
+        cart.set_bulk_discount(apple, buy_quantity=2, free_quantity=1)
+        cart.add(apple, quantity=2)
+        cart.apply_discount(10)
+        cart.add(apple)
+        assert cart.total() == 18.00
+
+
+# =============================================================================
+# EXACT MONEY
+# =============================================================================
+
+class TestExactMoney:
+    """Cart arithmetic is done in integer cents."""
+
+    def test_many_adds_and_removes_do_not_drift(self):
+        """Thousands of float-priced operations should leave an exact total."""
+        cart = ShoppingCart()
+        dime = Product("Dime Candy", 0.1)
+        for _ in range(5000):
+            cart.add(dime, quantity=3)
+            cart.remove(dime, quantity=2)
+        assert cart.total_cents() == 50000
+        assert cart.total() == 500.00
+
+    def test_fractional_discount_rounds_half_up(self):
+        """A percentage that lands on half a cent should round up."""
+        cart = ShoppingCart()
+        cart.add(Product("Item", 0.05))
+        cart.apply_discount(10)
+        assert cart.total_cents() == 4
+
+
+# =============================================================================
+# BULK OPERATIONS
+# =============================================================================
+
+class TestBulkOperations:
+    """add_many / remove_many / update apply many lines at once."""
+
+    def test_add_many(self):
+        """Repeated products are combined and bulk rules apply."""
+        cart = ShoppingCart()
+        apple = Product("Apple", 3.00)
+        orange = Product("Orange", 2.00)
+        cart.set_bulk_discount(apple, buy_quantity=2, free_quantity=1)
+        cart.add_many([(apple, 2), (orange, 1), (apple, 1)])
+        assert cart.get_quantity(apple) == 3
+        assert cart.item_count() == 4
+        assert cart.total() == 8.00
+
+    def test_add_many_is_atomic(self):
+        """One invalid pair should leave the cart unchanged."""
+        cart = ShoppingCart()
+        apple = Product("Apple", 3.00)
+        with pytest.raises(ValueError):
+            cart.add_many([(apple, 2), (Product("Pear", 1.00), 0)])
+        assert cart.is_empty() == True
+        assert cart.total() == 0
+
+    def test_bad_types_raise_type_error_like_add(self):
+        """Bulk calls reject the same inputs as add/remove, with TypeError."""
+        cart = ShoppingCart()
+        apple = Product("Apple", 3.00)
+        cart.add(apple, quantity=2)
+        for bulk in (cart.add_many, cart.remove_many, cart.update):
+            with pytest.raises(TypeError):
+                bulk([(apple, 1.5)])
+            with pytest.raises(TypeError):
+                bulk([(apple, True)])
+            with pytest.raises(TypeError):
+                bulk([("Apple", 1)])
+        with pytest.raises(ValueError):
+            cart.update([(apple, -1)])
+        assert cart.get_quantity(apple) == 2
+
+    def test_remove_many(self):
+        """Removing more than held drops the line."""
+        cart = ShoppingCart()
+        apple = Product("Apple", 3.00)
+        orange = Product("Orange", 2.00)
+        cart.add_many([(apple, 5), (orange, 2)])
+        cart.remove_many([(apple, 2), (orange, 10)])
+        assert cart.get_quantity(apple) == 3
+        assert cart.contains(orange) == False
+        assert cart.total() == 9.00
+
+    def test_remove_many_missing_product_is_atomic(self):
+        """A product not in the cart aborts the whole removal."""
+        cart = ShoppingCart()
+        apple = Product("Apple", 3.00)
+        cart.add(apple, quantity=2)
+        with pytest.raises(ValueError) as exc_info:
+            cart.remove_many([(apple, 1), (Product("Pear", 1.00), 1)])
+        assert "not in cart" in str(exc_info.value).lower()
+        assert cart.get_quantity(apple) == 2
+
+    def test_update_sets_quantities(self):
+        """update sets absolute quantities; zero removes a line."""
+        cart = ShoppingCart()
+        apple = Product("Apple", 3.00)
+        orange = Product("Orange", 2.00)
+        cart.add_many([(apple, 5), (orange, 2)])
+        cart.update([(apple, 1), (orange, 0)])
+        assert cart.get_quantity(apple) == 1
+        assert cart.contains(orange) == False
+        assert cart.item_count() == 1
+        assert cart.total() == 3.00
+
+
+# =============================================================================
+# LAZY TOTAL
+# =============================================================================
+
+class TestLazyTotal:
+    """Mutations mark lines dirty; total() reprices and memoizes."""
+
+    def test_mutations_do_not_price_until_total(self):
+        """Adding and removing should not reprice anything by itself."""
+        cart = ShoppingCart()
+        apple = Product("Apple", 3.00)
+        cart.set_bulk_discount(apple, buy_quantity=2, free_quantity=1)
+        for _ in range(100):
+            cart.add(apple)
+        cart.remove(apple, quantity=10)
+        assert cart.recomputations == 0
+        assert cart.total() == 180.00
+        assert cart.recomputations == 1
+
+    def test_repeated_total_is_memoized(self):
+        """Calling total() again without changes reuses the result."""
+        cart = ShoppingCart()
+        cart.add(Product("Apple", 1.50), quantity=2)
+        cart.total()
+        cart.total()
+        cart.total()
+        assert cart.recomputations == 1
+        assert cart.recomputations_avoided == 2
+
+    def test_only_dirty_lines_are_repriced(self):
+        """A change to one line leaves other cached lines alone."""
+        cart = ShoppingCart()
+        apple = Product("Apple", 1.50)
+        orange = Product("Orange", 2.00)
+        cart.add(apple)
+        cart.add(orange)
+        cart.total()
+        cart.add(apple)
+        assert cart._dirty == {apple}
+        assert cart.total() == 5.00
+
+    def test_discount_invalidates_memo(self):
+        """A new cart discount forces a recomputation."""
+        cart = ShoppingCart()
+        cart.add(Product("Item", 100.00))
+        assert cart.total() == 100.00
+        cart.apply_discount(10)
+        assert cart.total() == 90.00
+        assert cart.discount_amount == 10.00
+
+
+# =============================================================================
+# COPY-ON-WRITE FORKS
+# =============================================================================
+
+class TestFork:
+    """fork() gives an independent cart that shares unchanged state."""
+
+    def test_fork_is_independent(self):
+        """Changes to the child or the parent do not leak into the other."""
+        cart = ShoppingCart()
+        apple = Product("Apple", 3.00, category="fruit")
+        bread = Product("Bread", 2.00)
+        cart.add(apple, quantity=3)
+        cart.add(bread)
+        preview = cart.fork()
+        preview.add(apple, quantity=2)
+        preview.remove(bread)
+        cart.add(bread, quantity=4)
+        assert preview.total() == 15.00
+        assert preview.contains(bread) == False
+        assert cart.total() == 19.00
+        assert cart.get_quantity(apple) == 3
+
+    def test_fork_pricing_is_copy_on_write(self):
+        """A coupon on the preview does not apply to the original."""
+        cart = ShoppingCart()
+        apple = Product("Apple", 3.00, category="fruit")
+        cart.add(apple, quantity=3)
+        preview = cart.fork()
+        preview.set_bulk_discount(apple, buy_quantity=2, free_quantity=1)
+        preview.set_category_discount("fruit", 50)
+        assert preview.total() == 3.00
+        assert cart.total() == 9.00
+        assert cart.pricing.rules == []
+
+    def test_fork_shares_unchanged_lines(self):
+        """The child only stores the lines it changed."""
+        cart = ShoppingCart()
+        cart.add_many([(Product(f"P{i}", 1.00), 1) for i in range(1000)])
+        preview = cart.fork()
+        preview.add(Product("Extra", 5.00))
+        assert len(preview._quantities._changes) == 1
+        assert preview.item_count() == 1001
+        assert preview.total() == 1005.00
+
+    def test_repeated_forks_stay_correct(self):
+        """Deep fork chains are flattened without changing contents."""
+        cart = ShoppingCart()
+        apple = Product("Apple", 1.00, category="fruit")
+        for i in range(20):
+            cart.add(apple)
+            cart = cart.fork()
+        cart.remove(apple, quantity=5)
+        assert cart.get_quantity(apple) == 15
+        assert cart._quantities.depth <= 9
+        assert sorted(p.name for p in cart._category_lines["fruit"]) == ["Apple"]
+
+
+# =============================================================================
+# MERGE AND DIFF
+# =============================================================================
+
+class TestMergeAndDiff:
+    """Guest-to-user cart merging works on distinct lines."""
+
+    def make_carts(self):
+        apple = Product("Apple", 3.00)
+        bread = Product("Bread", 2.00)
+        milk = Product("Milk", 1.00)
+        user = ShoppingCart()
+        user.add_many([(apple, 2), (bread, 1)])
+        guest = ShoppingCart()
+        guest.add_many([(apple, 1), (milk, 4)])
+        return user, guest, apple, bread, milk
+
+    def test_merge_sum(self):
+        """Quantities of shared products are added together."""
+        user, guest, apple, bread, milk = self.make_carts()
+        delta = user.merge(guest)
+        assert user.get_quantity(apple) == 3
+        assert user.get_quantity(bread) == 1
+        assert user.get_quantity(milk) == 4
+        assert delta.added == {milk: 4}
+        assert delta.changed == {apple: (2, 3)}
+        assert user.total() == 15.00
+
+    def test_merge_max_and_prefer_other(self):
+        """Other policies pick the larger or the guest's quantity."""
+        user, guest, apple, _, _ = self.make_carts()
+        delta = user.merge(guest, policy="max")
+        assert user.get_quantity(apple) == 2
+        assert apple not in delta.changed
+        user.merge(guest, policy="prefer-other")
+        assert user.get_quantity(apple) == 1
+
+    def test_merge_rejects_unknown_policy(self):
+        """Only the documented policies are accepted."""
+        user, guest, _, _, _ = self.make_carts()
+        with pytest.raises(ValueError):
+            user.merge(guest, policy="min")
+
+    def test_diff(self):
+        """diff reports added, removed and changed lines."""
+        user, guest, apple, bread, milk = self.make_carts()
+        delta = user.diff(guest)
+        assert delta.added == {milk: 4}
+        assert delta.removed == {bread: 1}
+        assert delta.changed == {apple: (2, 1)}
+        assert len(delta) == 3
+        assert not user.diff(user)
+        assert delta.to_dict()["added"] == [{"name": "Milk", "price": 1.0, "quantity": 4}]
+
+
+# =============================================================================
+# LINE VIEWS
+# =============================================================================
+
+class TestLineViews:
+    """Iteration, receipts and indexed views work per distinct line."""
+
+    def make_cart(self):
+        cart = ShoppingCart()
+        self.apple = Product("Apple", 3.00, category="fruit")
+        self.pear = Product("Pear", 1.00, category="fruit")
+        self.laptop = Product("Laptop", 999.99, category="electronics")
+        cart.set_bulk_discount(self.apple, buy_quantity=2, free_quantity=1)
+        cart.add_many([(self.apple, 3), (self.pear, 10), (self.laptop, 1)])
+        return cart
+
+    def test_lines_yield_distinct_lines(self):
+        """Each line appears once with its quantity and line total."""
+        cart = self.make_cart()
+        assert sorted(cart.lines(), key=lambda line: line[0].name) == [
+            (self.apple, 3, 6.00),
+            (self.laptop, 1, 999.99),
+            (self.pear, 10, 10.00),
+        ]
+
+    def test_iteration_yields_distinct_products(self):
+        """Iterating a cart gives each product once, not each unit."""
+        cart = self.make_cart()
+        assert len(list(cart)) == 3
+
+    def test_lines_in_category(self):
+        """The category index returns only matching lines."""
+        cart = self.make_cart()
+        names = sorted(p.name for p, _, _ in cart.lines_in_category("fruit"))
+        assert names == ["Apple", "Pear"]
+        assert list(cart.lines_in_category("toys")) == []
+
+    def test_top_lines(self):
+        """The most expensive lines come first."""
+        cart = self.make_cart()
+        top = cart.top_lines(2)
+        assert [p.name for p, _, _ in top] == ["Laptop", "Pear"]
+
+    def test_str_is_a_receipt(self):
+        """The summary lists each line, any discount and the total."""
+        cart = self.make_cart()
+        cart.apply_discount(10)
+        summary = str(cart)
+        assert "Apple x3 @ $3.00 = $6.00" in summary
+        assert "Discount: -$101.60" in summary
+        assert "Total: $914.39" in summary
@@ -0,0 +1,94 @@
+"""
+Snapshot Tests - binary cart serialization and the memory-mapped store
+
+Run these tests:
+    pytest tests/test_snapshot.py -v
+"""
+
+import pytest
+from src.catalog import ProductCatalog
+from src.pricing import ThresholdRule
+from src.shopping_cart import ShoppingCart
+from src.snapshot import CartStore, SnapshotError, dumps, loads
+
+
+def make_cart(catalog, quantity=3):
+    cart = ShoppingCart()
+    apple = catalog.get("Apple", 3.00, category="fruit")
+    bread = catalog.get("Bread", 2.25)
+    cart.add(apple, quantity=quantity)
+    cart.add(bread, quantity=300)
+    cart.set_bulk_discount(apple, buy_quantity=2, free_quantity=1)
+    cart.set_category_discount("fruit", 12.5)
+    cart.add_rule(ThresholdRule(100, 5))
+    cart.apply_discount(10)
+    return cart
+
+
+class TestSnapshot:
+    """Tests for dumps/loads of a single cart."""
+    
+    def test_round_trip(self):
+        """A loaded cart has the same lines, rules and total."""
+        catalog = ProductCatalog()
+        cart = make_cart(catalog)
+        
+        restored = loads(dumps(cart, catalog), catalog)
+        
+        assert restored._quantities == cart._quantities
+        assert restored.pricing.rules == cart.pricing.rules
+        assert restored.total_cents() == cart.total_cents()
+    
+    def test_snapshot_is_compact(self):
+        """Large quantities cost a few bytes, not one entry per unit."""
+        catalog = ProductCatalog()
+        cart = ShoppingCart()
+        cart.add(catalog.get("Apple", 1.00), quantity=1_000_000)
+        
+        assert len(dumps(cart, catalog)) < 16
+    
+    def test_rejects_unknown_data(self):
+        """Garbage or a future version should raise SnapshotError."""
+        catalog = ProductCatalog()
+        
+        with pytest.raises(SnapshotError):
+            loads(b"nope", catalog)
+        with pytest.raises(SnapshotError):
+            loads(b"CART\x09", catalog)
+    
+    def test_product_must_be_in_catalog(self):
+        """Products are written as catalog ids."""
+        from src.product import Product
+        cart = ShoppingCart()
+        cart.add(Product("Apple", 1.00))
+        
+        with pytest.raises(ValueError):
+            dumps(cart, ProductCatalog())
+
+
+class TestCartStore:
+    """Tests for the memory-mapped store."""
+    
+    def test_random_access_by_id(self, tmp_path):
+        """Any cart can be loaded by id without reading the others."""
+        catalog = ProductCatalog()
+        carts = [(f"cart-{i}", make_cart(catalog, quantity=i + 1)) for i in range(50)]
+        path = tmp_path / "carts.bin"
+        
+        assert CartStore.write(path, carts, catalog) == 50
+        
+        with CartStore(path, catalog) as store:
+            assert len(store) == 50
+            assert "cart-7" in store
+            assert store.load("cart-7").total_cents() == carts[7][1].total_cents()
+            assert store.load("cart-49").get_quantity(catalog.product(0)) == 50
+            with pytest.raises(KeyError):
+                store.load("missing")
+    
+    def test_rejects_non_store_file(self, tmp_path):
+        """A file that is not a store should raise SnapshotError."""
+        path = tmp_path / "other.bin"
+        path.write_bytes(b"x" * 32)
+        
+        with pytest.raises(SnapshotError):
+            CartStore(path, ProductCatalog())